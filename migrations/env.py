@@ -11,6 +11,7 @@ from sqlmodel import SQLModel
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from src.app.models.contrato import Contrato
+from src.app.models.custo_manutencao import CustoManutencaoMarca, CustoManutencaoVeiculo
 from src.app.models.manutencao import Manutencao
 from src.app.models.pagamento import Pagamento
 from src.app.models.usuario import Usuario
@@ -34,6 +35,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Índices trigram (pg_trgm) só existem nas migrações, não nos models
+    if type_ == "index" and name.endswith("_trgm"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -56,6 +65,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -79,7 +89,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
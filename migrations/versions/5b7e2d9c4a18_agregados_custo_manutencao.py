@@ -0,0 +1,63 @@
+"""agregados custo manutencao
+
+Revision ID: 5b7e2d9c4a18
+Revises: c41f0e9a7d25
+Create Date: 2026-10-17 14:05:41.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c4a18'
+down_revision: Union[str, None] = 'c41f0e9a7d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('custo_manutencao_veiculo',
+    sa.Column('veiculo_id', sa.Integer(), nullable=False),
+    sa.Column('custo_total', sa.Float(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('custo_maximo', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['veiculo_id'], ['veiculo.id'], ),
+    sa.PrimaryKeyConstraint('veiculo_id')
+    )
+    op.create_index('ix_custo_manutencao_veiculo_custo_total', 'custo_manutencao_veiculo', ['custo_total'], unique=False)
+    op.create_table('custo_manutencao_marca',
+    sa.Column('marca', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('custo_total', sa.Float(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('custo_maximo', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('marca')
+    )
+    op.create_index('ix_custo_manutencao_marca_custo_total', 'custo_manutencao_marca', ['custo_total'], unique=False)
+
+    # Carga inicial a partir dos dados existentes; depois disso os
+    # repositórios mantêm os agregados a cada escrita
+    op.execute("""
+        INSERT INTO custo_manutencao_veiculo (veiculo_id, custo_total, quantidade, custo_maximo)
+        SELECT vm.veiculo_id, sum(m.custo), count(*), max(m.custo)
+        FROM veiculomanutencao vm
+        JOIN manutencao m ON m.id = vm.manutencao_id
+        GROUP BY vm.veiculo_id
+    """)
+    op.execute("""
+        INSERT INTO custo_manutencao_marca (marca, custo_total, quantidade, custo_maximo)
+        SELECT v.marca, sum(c.custo_total), sum(c.quantidade), max(c.custo_maximo)
+        FROM custo_manutencao_veiculo c
+        JOIN veiculo v ON v.id = c.veiculo_id
+        GROUP BY v.marca
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_custo_manutencao_marca_custo_total', table_name='custo_manutencao_marca')
+    op.drop_table('custo_manutencao_marca')
+    op.drop_index('ix_custo_manutencao_veiculo_custo_total', table_name='custo_manutencao_veiculo')
+    op.drop_table('custo_manutencao_veiculo')
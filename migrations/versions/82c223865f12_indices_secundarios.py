@@ -0,0 +1,54 @@
+"""indices secundarios
+
+Revision ID: 82c223865f12
+Revises: 8efbd711667a
+Create Date: 2026-10-17 11:30:12.418532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82c223865f12'
+down_revision: Union[str, None] = '8efbd711667a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY não roda dentro de transação, por isso os índices
+# são criados num autocommit_block; assim a migração não bloqueia escritas
+# nas tabelas enquanto roda num banco em produção
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_contrato_usuario_id'), 'contrato', ['usuario_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_contrato_veiculo_id'), 'contrato', ['veiculo_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_contrato_pagamento_id'), 'contrato', ['pagamento_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_contrato_data_inicio'), 'contrato', ['data_inicio'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_veiculomanutencao_veiculo_id_manutencao_id', 'veiculomanutencao', ['veiculo_id', 'manutencao_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_veiculomanutencao_manutencao_id'), 'veiculomanutencao', ['manutencao_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_pagamento_vencimento_id', 'pagamento', ['vencimento', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_pagamento_pago_vencimento_id', 'pagamento', ['pago', 'vencimento', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_pagamento_pendente', 'pagamento', ['id'], unique=False, postgresql_concurrently=True, if_not_exists=True, postgresql_include=['valor'], postgresql_where=sa.text('NOT pago'))
+        op.create_index('ix_manutencao_data_id', 'manutencao', ['data', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_manutencao_tipo_manutencao'), 'manutencao', ['tipo_manutencao'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_veiculo_marca'), 'veiculo', ['marca'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_veiculo_marca'), table_name='veiculo', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_manutencao_tipo_manutencao'), table_name='manutencao', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_manutencao_data_id', table_name='manutencao', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_pagamento_pendente', table_name='pagamento', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_pagamento_pago_vencimento_id', table_name='pagamento', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_pagamento_vencimento_id', table_name='pagamento', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_veiculomanutencao_manutencao_id'), table_name='veiculomanutencao', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_veiculomanutencao_veiculo_id_manutencao_id', table_name='veiculomanutencao', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_contrato_data_inicio'), table_name='contrato', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_contrato_pagamento_id'), table_name='contrato', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_contrato_veiculo_id'), table_name='contrato', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_contrato_usuario_id'), table_name='contrato', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""exclusao em cascata
+
+Revision ID: 9d3a6f1c2e47
+Revises: 5b7e2d9c4a18
+Create Date: 2026-10-17 16:20:13.584102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a6f1c2e47'
+down_revision: Union[str, None] = '5b7e2d9c4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# As exclusões passam a ser DELETE ... RETURNING direto no banco, sem carregar
+# relacionamentos no ORM; o que o ORM fazia (apagar os vínculos com manutenção,
+# soltar o pagamento do contrato) vira ON DELETE nas chaves estrangeiras. As
+# constraints da primeira migração não têm nome e usam o padrão do Postgres
+FOREIGN_KEYS = [
+    ('veiculomanutencao_veiculo_id_fkey', 'veiculomanutencao', 'veiculo', 'veiculo_id', 'CASCADE'),
+    ('veiculomanutencao_manutencao_id_fkey', 'veiculomanutencao', 'manutencao', 'manutencao_id', 'CASCADE'),
+    ('custo_manutencao_veiculo_veiculo_id_fkey', 'custo_manutencao_veiculo', 'veiculo', 'veiculo_id', 'CASCADE'),
+    ('contrato_pagamento_id_fkey', 'contrato', 'pagamento', 'pagamento_id', 'SET NULL'),
+]
+
+
+def upgrade() -> None:
+    for name, source, referent, column, ondelete in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'], ondelete=ondelete)
+
+
+def downgrade() -> None:
+    for name, source, referent, column, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'])
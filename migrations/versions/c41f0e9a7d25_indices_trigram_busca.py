@@ -0,0 +1,37 @@
+"""indices trigram busca
+
+Revision ID: c41f0e9a7d25
+Revises: 82c223865f12
+Create Date: 2026-10-17 11:52:40.107315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f0e9a7d25'
+down_revision: Union[str, None] = '82c223865f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Índices GIN com gin_trgm_ops atendem ILIKE '%x%' e similarity(). Eles
+# dependem da extensão pg_trgm, por isso não são declarados nos models
+# (create_all não os cria e o env.py os ignora no autogenerate)
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.create_index('ix_veiculo_placa_trgm', 'veiculo', ['placa'], unique=False, postgresql_using='gin', postgresql_ops={'placa': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_usuario_nome_trgm', 'usuario', ['nome'], unique=False, postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_manutencao_tipo_manutencao_trgm', 'manutencao', ['tipo_manutencao'], unique=False, postgresql_using='gin', postgresql_ops={'tipo_manutencao': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_manutencao_tipo_manutencao_trgm', table_name='manutencao', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_usuario_nome_trgm', table_name='usuario', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_veiculo_placa_trgm', table_name='veiculo', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,103 @@
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.app.models.BulkResult import BulkError, BulkResult
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> list[dict]:
+    try:
+        if "ndjson" in content_type:
+            items = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Corpo da requisição inválido!")
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("O corpo deve ser uma lista de objetos!")
+    return items
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors())
+
+
+def bulk_insert(db, model, items: list[dict], chunk_size: int) -> BulkResult:
+    ids, errors, rows = [], [], []
+    for index, item in enumerate(items):
+        try:
+            rows.append((index, model.model_validate(item).model_dump(exclude={"id"})))
+        except ValidationError as e:
+            errors.append(BulkError(index=index, detail=_validation_detail(e)))
+
+    # Cada chunk vira um único INSERT ... RETURNING id (executemany em lote);
+    # se o chunk violar alguma constraint, só ele é refeito linha a linha
+    # para isolar as linhas com erro sem abortar o restante
+    statement = insert(model.__table__).returning(model.__table__.c.id, sort_by_parameter_order=True)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with db.begin_nested():
+                ids.extend(db.execute(statement, [row for _, row in chunk]).scalars().all())
+        except IntegrityError:
+            for index, row in chunk:
+                try:
+                    with db.begin_nested():
+                        ids.append(db.execute(statement, [row]).scalar_one())
+                except IntegrityError as e:
+                    errors.append(BulkError(index=index, detail=str(e.orig)))
+    db.commit()
+
+    errors.sort(key=lambda error: error.index)
+    return BulkResult(total=len(items), inserted=len(ids), ids=ids, errors=errors)
+
+
+def update_returning(db, model, ids: list[int], values: dict, previous: tuple[str, ...] = ()) -> tuple[list, dict]:
+    # Um único UPDATE ... WHERE id IN (...) RETURNING com as colunas da tabela,
+    # sem carregar as linhas antes nem reler depois. Não faz commit: quem chama
+    # ainda pode atualizar os agregados na mesma transação
+    table = model.__table__
+    for key, value in values.items():
+        if value is None and not table.c[key].nullable:
+            raise ValueError(f"O campo {key} não pode ser nulo!")
+
+    # previous lista colunas cujo valor antigo quem chama precisa conhecer; só
+    # quando uma delas muda as linhas são lidas antes, já travadas para o UPDATE
+    anteriores = {}
+    changed = [column for column in previous if column in values]
+    if changed:
+        rows = db.execute(
+            select(table.c.id, *(table.c[column] for column in changed)).where(table.c.id.in_(ids)).with_for_update()
+        )
+        anteriores = {row.id: dict(row._mapping) for row in rows}
+
+    statement = update(model).where(model.id.in_(ids)).values(values).returning(*table.c)
+    try:
+        rows = db.execute(statement).all()
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(f"Erro ao atualizar {table.name}: {e.orig}")
+    # A ordem do RETURNING não é garantida; devolve na ordem dos ids pedidos
+    position = {entity_id: index for index, entity_id in enumerate(ids)}
+    rows.sort(key=lambda row: position[row.id])
+    return [model.model_validate(row._mapping) for row in rows], anteriores
+
+
+def delete_returning(db, model, ids: list[int], chunk_size: int, returning: tuple[str, ...] = ()) -> list:
+    # DELETE ... WHERE id IN (...) RETURNING id em chunks, todos na mesma
+    # transação; vínculos dependentes saem pelo ON DELETE das chaves
+    # estrangeiras. returning lista colunas extras que quem chama precisa
+    # (ex.: marca para os agregados). Não faz commit
+    table = model.__table__
+    columns = [table.c.id, *(table.c[column] for column in returning)]
+    deleted = []
+    try:
+        for start in range(0, len(ids), chunk_size):
+            statement = delete(model).where(model.id.in_(ids[start:start + chunk_size])).returning(*columns)
+            deleted.extend(db.execute(statement).all())
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(f"Erro ao deletar {table.name}: {e.orig}")
+    return deleted
@@ -0,0 +1,247 @@
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from src.app.core.config import settings
+from src.app.core.db import database
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import invalidate_counts
+
+logger = logging.getLogger(__name__)
+
+
+def _has_uncommitted_writes() -> bool:
+    # Dentro de uma unidade de trabalho que já escreveu, a sessão enxerga dados
+    # ainda não confirmados; nada lido por ela pode ir para os caches
+    db = database.current_session.get()
+    return db is not None and bool(db.info.get("touched_tables"))
+
+
+@dataclass
+class _Entry:
+    value: Any
+    tables: tuple[str, ...]
+    expires_at: float
+    stale_until: float
+
+
+class ResultCache:
+    # LRU limitado com TTL. Depois do TTL a entrada ainda é servida por
+    # stale_ttl segundos enquanto uma única thread recalcula o valor em
+    # segundo plano, então nenhum leitor espera pelo refresh. Escritas
+    # descartam as entradas das tabelas afetadas na hora
+    def __init__(self, max_size: int, ttl: float, stale_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._refreshing: set[tuple] = set()
+        # Versão por tabela: um refresh iniciado antes de uma invalidação não
+        # pode gravar o resultado antigo por cima dela
+        self._versions: dict[str, int] = {}
+        # Incrementa a cada escrita em qualquer tabela
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0,
+                         "evictions": 0, "invalidations": 0}
+
+    def _versions_of(self, tables: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def _store(self, key: tuple, value: Any, tables: tuple[str, ...], versions: tuple[int, ...]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._versions_of(tables) != versions:
+                return
+            self._entries[key] = _Entry(value, tables, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def _refresh(self, key: tuple, tables: tuple[str, ...], versions: tuple[int, ...], loader: Callable[[], Any]) -> None:
+        try:
+            self._store(key, loader(), tables, versions)
+            with self._lock:
+                self.counters["refreshes"] += 1
+        except Exception:
+            with self._lock:
+                self.counters["refresh_errors"] += 1
+            logger.exception("Erro ao atualizar o cache de %s", key[0])
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key: tuple, tables: tuple[str, ...], loader: Callable[[], Any]) -> Any:
+        if _has_uncommitted_writes():
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                if now < entry.expires_at:
+                    self.counters["hits"] += 1
+                    return entry.value
+                self.counters["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, tables, self._versions_of(tables), loader)
+                return entry.value
+            self.counters["misses"] += 1
+            versions = self._versions_of(tables)
+
+        value = loader()
+        self._store(key, value, tables, versions)
+        return value
+
+    def invalidate(self, table_name: str) -> None:
+        with self._lock:
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            self.generation += 1
+            for key in [key for key, entry in self._entries.items() if table_name in entry.tables]:
+                del self._entries[key]
+                self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_ratio": (self.counters["hits"] + self.counters["stale_hits"]) / lookups if lookups else 0.0,
+            }
+
+
+result_cache = ResultCache(settings.RESULT_CACHE_MAX_SIZE, settings.RESULT_CACHE_TTL, settings.RESULT_CACHE_STALE_TTL)
+
+
+class EntityCache:
+    # Cache de identidade por (tabela, id) para os get_by_id. Guarda o
+    # model_dump da entidade e devolve uma instância nova a cada leitura, para
+    # que quem recebe possa alterá-la sem afetar o cache
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, int], tuple[dict, float]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get_many(self, model, ids: list[int]) -> dict[int, Any]:
+        if database.in_unit_of_work():
+            # Na unidade de trabalho o identity map da sessão faz o papel do
+            # cache e as instâncias voltam anexadas a ela
+            with session_scope() as db:
+                return {row.id: row for row in db.query(model).filter(model.id.in_(ids)).all()}
+
+        table = model.__tablename__
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for entity_id in dict.fromkeys(ids):
+                entry = self._entries.get((table, entity_id))
+                if entry is not None and now < entry[1]:
+                    self._entries.move_to_end((table, entity_id))
+                    found[entity_id] = entry[0]
+                    self.counters["hits"] += 1
+                else:
+                    missing.append(entity_id)
+                    self.counters["misses"] += 1
+            version = self._versions.get(table, 0)
+
+        if missing:
+            with session_scope() as db:
+                loaded = {row.id: row.model_dump() for row in db.query(model).filter(model.id.in_(missing)).all()}
+            found.update(loaded)
+            with self._lock:
+                # Se houve escrita na tabela durante a consulta o resultado
+                # pode estar desatualizado; devolve, mas não guarda
+                if self._versions.get(table, 0) == version:
+                    for entity_id, data in loaded.items():
+                        self._entries[(table, entity_id)] = (data, now + self.ttl)
+                        self._entries.move_to_end((table, entity_id))
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self.counters["evictions"] += 1
+
+        # O construtor do model de tabela não revalida: os dados vieram do banco
+        # e um NULL em coluna anotada sem Optional não pode virar erro 500
+        return {entity_id: model(**data) for entity_id, data in found.items()}
+
+    def get(self, model, entity_id: int):
+        return self.get_many(model, [entity_id]).get(entity_id)
+
+    def invalidate(self, table_name: str, ids: list[int]) -> None:
+        with self._lock:
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            for entity_id in ids:
+                if self._entries.pop((table_name, entity_id), None) is not None:
+                    self.counters["invalidations"] += 1
+
+    def invalidate_table(self, table_name: str) -> None:
+        with self._lock:
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            for key in [key for key in self._entries if key[0] == table_name]:
+                del self._entries[key]
+                self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_ratio": self.counters["hits"] / lookups if lookups else 0.0,
+            }
+
+
+entity_cache = EntityCache(settings.ENTITY_CACHE_MAX_SIZE, settings.ENTITY_CACHE_TTL)
+
+
+def invalidate_cache(table_name: str) -> None:
+    result_cache.invalidate(table_name)
+    db = database.current_session.get()
+    if db is not None:
+        db.info.setdefault("touched_tables", set()).add(table_name)
+
+
+def invalidate_table(table_name: str, *ids: int, cascade: bool = False) -> None:
+    # Chamado pelos repositórios depois de cada escrita em table_name: descarta
+    # as contagens, os resultados que leem a tabela e as entidades ids. Com
+    # cascade=True a escrita mudou linhas que não se sabe quais (ON DELETE
+    # CASCADE/SET NULL) e a tabela inteira sai do cache de entidades
+    invalidate_counts(table_name)
+    invalidate_cache(table_name)
+    if cascade:
+        entity_cache.invalidate_table(table_name)
+    elif ids:
+        entity_cache.invalidate(table_name, list(ids))
+
+
+def cached(*tables: str):
+    # Decora métodos de leitura dos repositórios; a chave é o método mais os
+    # argumentos (sem o self) e tables lista as tabelas lidas pela consulta
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+            return result_cache.get_or_load(key, tables, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -13,6 +13,23 @@ class AppSettings:
     APP_NAME: str = config("APP_NAME", default="FastAPI app")
     APP_DESCRIPTION: str | None = config("APP_DESCRIPTION", default=None)
     APP_VERSION: str | None = config("APP_VERSION", default=None)
+    BULK_CHUNK_SIZE: int = config("BULK_CHUNK_SIZE", cast=int, default=1000)
+    MAX_IDS_PER_REQUEST: int = config("MAX_IDS_PER_REQUEST", cast=int, default=1000)
+    BATCH_LOADER_WINDOW: float = config("BATCH_LOADER_WINDOW", cast=float, default=0.002)
+    RESULT_CACHE_MAX_SIZE: int = config("RESULT_CACHE_MAX_SIZE", cast=int, default=256)
+    RESULT_CACHE_TTL: float = config("RESULT_CACHE_TTL", cast=float, default=30)
+    RESULT_CACHE_STALE_TTL: float = config("RESULT_CACHE_STALE_TTL", cast=float, default=300)
+    ENTITY_CACHE_MAX_SIZE: int = config("ENTITY_CACHE_MAX_SIZE", cast=int, default=10000)
+    ENTITY_CACHE_TTL: float = config("ENTITY_CACHE_TTL", cast=float, default=300)
+    SLOW_QUERY_THRESHOLD: float = config("SLOW_QUERY_THRESHOLD", cast=float, default=0.5)
+    DB_QUERY_BUDGET: int = config("DB_QUERY_BUDGET", cast=int, default=50)
+    DB_QUERY_BUDGET_ENFORCE: bool = config("DB_QUERY_BUDGET_ENFORCE", cast=bool, default=False)
+    N_PLUS_ONE_THRESHOLD: int = config("N_PLUS_ONE_THRESHOLD", cast=int, default=10)
+    LOG_LEVEL: str = config("LOG_LEVEL", default="INFO")
+    LOG_FORMAT: str = config("LOG_FORMAT", default="text")
+    LOG_SAMPLING: str = config("LOG_SAMPLING", default="")
+    LOG_RATE_LIMIT: str = config("LOG_RATE_LIMIT", default="src.app.repositories=200")
+    LOG_QUEUE_MAX_SIZE: int = config("LOG_QUEUE_MAX_SIZE", cast=int, default=10000)
 
 
 class DatabaseSettings(BaseSettings):
@@ -29,6 +46,13 @@ class PostgresSettings(DatabaseSettings):
     POSTGRES_ASYNC_PREFIX: str = config("POSTGRES_ASYNC_PREFIX", default="postgresql+asyncpg://")
     POSTGRES_URI: str = f"{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
     POSTGRES_URL: str | None = config("POSTGRES_URL", default=None)
+    POSTGRES_USE_ASYNC: bool = config("POSTGRES_USE_ASYNC", cast=bool, default=False)
+    POSTGRES_POOL_SIZE: int = config("POSTGRES_POOL_SIZE", cast=int, default=5)
+    POSTGRES_MAX_OVERFLOW: int = config("POSTGRES_MAX_OVERFLOW", cast=int, default=10)
+    POSTGRES_POOL_TIMEOUT: float = config("POSTGRES_POOL_TIMEOUT", cast=float, default=30)
+    POSTGRES_POOL_RECYCLE: int = config("POSTGRES_POOL_RECYCLE", cast=int, default=1800)
+    POSTGRES_POOL_PRE_PING: bool = config("POSTGRES_POOL_PRE_PING", cast=bool, default=True)
+    POSTGRES_POOL_USE_LIFO: bool = config("POSTGRES_POOL_USE_LIFO", cast=bool, default=False)
 
 
 class EnvironmentOption(Enum):
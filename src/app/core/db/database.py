@@ -1,19 +1,94 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.app.core.config import settings
+from src.app.core.db.instrumentation import instrument_engine
+from src.app.core.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_options
 
 DATABASE_URI = settings.POSTGRES_URI
 DATABASE_PREFIX = settings.POSTGRES_SYNC_PREFIX
 DATABASE_URL = f"{DATABASE_PREFIX}{DATABASE_URI}"
+ASYNC_DATABASE_PREFIX = settings.POSTGRES_ASYNC_PREFIX
+ASYNC_DATABASE_URL = f"{ASYNC_DATABASE_PREFIX}{DATABASE_URI}"
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+engine = create_engine(
+    DATABASE_URL, echo=False, future=True, poolclass=InstrumentedQueuePool, **pool_options(settings)
+)
 
 local_session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
-def get_db():
+# Engine assíncrono (asyncpg), só criado quando POSTGRES_USE_ASYNC está ativo
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=False, poolclass=InstrumentedAsyncQueuePool, **pool_options(settings)
+) if settings.POSTGRES_USE_ASYNC else None
+
+instrument_engine("sync", engine)
+if async_engine is not None:
+    instrument_engine("async", async_engine.sync_engine)
+
+async_local_session = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def use_database(url: str) -> None:
+    # Troca o engine síncrono por um apontando para url; usado pelos scripts
+    # de carga e benchmark para rodar contra outro banco (ex.: um SQLite local
+    # no lugar do Postgres). Os módulos que precisam do engine atual o leem
+    # como database.engine, não importando o nome
+    global engine, local_session
+    connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+    engine.dispose()
+    engine = create_engine(url, echo=False, future=True, connect_args=connect_args)
+    if url.startswith("sqlite"):
+        # O pysqlite só abre a transação no primeiro DML e já grava no RELEASE
+        # SAVEPOINT; com o BEGIN emitido pelo SQLAlchemy, o rollback da unidade
+        # de trabalho e os SAVEPOINTs do bulk_insert funcionam como no Postgres
+        event.listen(engine, "connect", _sqlite_manual_transactions)
+        event.listen(engine, "begin", lambda conn: conn.exec_driver_sql("BEGIN"))
+    local_session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    instrument_engine("sync", engine)
+
+
+def _sqlite_manual_transactions(dbapi_connection, connection_record) -> None:
+    dbapi_connection.isolation_level = None
+
+
+# Sessão fornecida por quem chama o repositório (AsyncSession.run_sync ou a
+# unidade de trabalho da requisição); quando definida, session_scope a entrega
+# no lugar de abrir uma nova e quem a criou é responsável por fechá-la
+current_session: ContextVar[Optional[Session]] = ContextVar("current_session", default=None)
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    db = current_session.get()
+    if db is not None:
+        yield db
+        return
     db = local_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def call_with_session(session: Session, method, *args, **kwargs):
+    token = current_session.set(session)
+    try:
+        return method(*args, **kwargs)
+    finally:
+        current_session.reset(token)
+
+
+def in_unit_of_work() -> bool:
+    db = current_session.get()
+    return db is not None and db.info.get("unit_of_work", False)
+
+
+def get_db():
+    with session_scope() as db:
+        yield db
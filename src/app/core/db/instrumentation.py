@@ -0,0 +1,104 @@
+import logging
+import re
+import time
+
+from sqlalchemy import event
+
+from src.app.core.config import settings
+from src.app.core.metrics import (
+    db_slow_statements,
+    db_statement_duration,
+    db_statement_errors,
+    db_statement_rows,
+    histogram_lines,
+    register_collector,
+)
+from src.app.core.db.pool import WAIT_BUCKETS
+from src.app.core.db.query_stats import current_request_stats
+
+# Consultas lentas vão para o arquivo rotativo configurado em core/logger.py
+slow_query_logger = logging.getLogger("app_logger")
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?(\w+)', re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_labels(statement: str) -> tuple[str, str]:
+    # Operação e primeira tabela citada; o texto inteiro teria cardinalidade demais para rótulo
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+    table = _TABLE.search(statement)
+    return operation, table.group(1).lower() if table else "-"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._started_at
+    labels = statement_labels(statement)
+    db_statement_duration.observe(elapsed, *labels)
+    stats = current_request_stats.get()
+    if stats is not None:
+        # Os lotes de um insertmanyvalues (no SQLite, com RETURNING ordenado, um
+        # INSERT por linha) compartilham o contexto e contam como um só comando,
+        # para que os endpoints /bulk não apareçam como N+1 nem estourem o limite
+        if getattr(context, "_recorded", False):
+            stats.record_batch(elapsed)
+        else:
+            stats.record(statement, elapsed)
+            context._recorded = True
+    if cursor.rowcount is not None and cursor.rowcount > 0:
+        db_statement_rows.inc(*labels, amount=cursor.rowcount)
+    if elapsed >= settings.SLOW_QUERY_THRESHOLD:
+        db_slow_statements.inc(*labels)
+        slow_query_logger.warning(
+            "Consulta lenta (%.3fs, %s linhas): %s", elapsed, cursor.rowcount, _WHITESPACE.sub(' ', statement)[:2000]
+        )
+
+
+def _handle_error(exception_context):
+    statement = exception_context.statement or ""
+    context = exception_context.execution_context
+    labels = statement_labels(statement)
+    if context is not None and hasattr(context, "_started_at"):
+        db_statement_duration.observe(time.perf_counter() - context._started_at, *labels)
+    db_statement_errors.inc(*labels, type(exception_context.original_exception).__name__)
+
+
+# Engines instrumentados, por nome ("sync", "async"), para o coletor do pool
+_engines: dict = {}
+
+
+def _collect_pools() -> list[str]:
+    gauges = {
+        "db_pool_checked_out": ("gauge", "Conexões em uso", "checked_out"),
+        "db_pool_size": ("gauge", "Tamanho configurado do pool", "pool_size"),
+        "db_pool_overflow": ("gauge", "Conexões além do pool_size", "overflow"),
+        "db_pool_checkout_timeouts_total": ("counter", "Checkouts que estouraram pool_timeout", "checkout_timeouts"),
+    }
+    snapshots = {
+        name: engine.pool.metrics.snapshot(engine.pool)
+        for name, engine in _engines.items()
+        if hasattr(engine.pool, "metrics")
+    }
+    lines = []
+    for metric, (kind, documentation, key) in gauges.items():
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{engine="{name}"}} {snapshot[key]}' for name, snapshot in snapshots.items()]
+    lines += ["# HELP db_pool_wait_seconds Espera por uma conexão livre no checkout", "# TYPE db_pool_wait_seconds histogram"]
+    for name, snapshot in snapshots.items():
+        counts = [snapshot["wait_seconds_histogram"][key] for key in (*map(str, WAIT_BUCKETS), "+Inf")]
+        lines += histogram_lines("db_pool_wait_seconds", {"engine": name}, WAIT_BUCKETS, counts, snapshot["wait_seconds_sum"])
+    return lines
+
+
+register_collector(_collect_pools)
+
+
+def instrument_engine(name: str, engine) -> None:
+    # Recebe o Engine síncrono; para o assíncrono, passar async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    _engines[name] = engine
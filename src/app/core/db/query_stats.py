@@ -0,0 +1,61 @@
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from src.app.core.config import settings
+
+# Listas de placeholders viram um só, para que o mesmo IN com tamanhos
+# diferentes tenha o mesmo formato: "IN (?, ?, ?)" -> "IN (?)"
+_PLACEHOLDER = r"(?:\?|\$\d+(?:::\w+)?|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestQueryStats:
+    # Comandos SQL executados durante uma requisição. A requisição pode rodar
+    # consultas em threads do pool, por isso o registro usa lock
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.budget = settings.DB_QUERY_BUDGET
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.queries += 1
+            self.duration += elapsed
+            self.shapes[shape] += 1
+
+    def record_batch(self, elapsed: float) -> None:
+        # Mais um lote de um comando já registrado: só soma o tempo
+        with self._lock:
+            self.duration += elapsed
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        with self._lock:
+            return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+current_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_request_stats", default=None)
+
+
+def query_budget(limit: int):
+    # Dependência de rota que troca o limite de comandos SQL da requisição:
+    # @router.get(..., dependencies=[Depends(query_budget(3))])
+    def set_budget() -> None:
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.budget = limit
+    return set_budget
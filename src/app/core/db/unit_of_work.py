@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.app.core.cache import invalidate_table
+from src.app.core.config import settings
+from src.app.core.db import database
+
+current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar("current_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    # Uma conexão e uma transação para a requisição inteira. A sessão entra na
+    # transação da conexão com join_transaction_mode="create_savepoint", então
+    # o db.commit() que os repositórios já fazem só libera um SAVEPOINT: nada
+    # é gravado até o commit() da unidade de trabalho, e sem ele tudo o que a
+    # rota fez é desfeito quando a requisição termina.
+    #
+    # Uso numa rota:
+    #     async def rota(uow: UnitOfWork = Depends(unit_of_work)):
+    #         pagamento = await pagamento_repository.create(...)
+    #         contrato = await contrato_repository.create(...)
+    #         await uow.commit()
+    #
+    # As rotas de escrita usam Depends(transaction), que faz o commit sozinho
+    # quando a rota termina sem exceção
+    def __init__(self):
+        self.use_async = settings.POSTGRES_USE_ASYNC
+        self.connection = None
+        self.transaction = None
+        self.session: Optional[Session] = None
+        self.async_session: Optional[AsyncSession] = None
+        self.committed = False
+        # A sessão não é thread-safe: chamadas concorrentes (ex.: asyncio.gather)
+        # na mesma unidade de trabalho são serializadas
+        self._lock = asyncio.Lock()
+
+    async def begin(self) -> None:
+        if self.use_async:
+            self.connection = await database.async_engine.connect()
+            self.transaction = await self.connection.begin()
+            self.async_session = AsyncSession(
+                bind=self.connection, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False
+            )
+            self.session = self.async_session.sync_session
+        else:
+            self.connection = await run_in_threadpool(database.engine.connect)
+            self.transaction = self.connection.begin()
+            self.session = Session(
+                bind=self.connection, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False
+            )
+        self.session.info["unit_of_work"] = True
+
+    async def run(self, method, *args, **kwargs):
+        async with self._lock:
+            if self.use_async:
+                return await self.async_session.run_sync(
+                    lambda session: database.call_with_session(session, method, *args, **kwargs)
+                )
+            return await run_in_threadpool(database.call_with_session, self.session, method, *args, **kwargs)
+
+    def _commit(self) -> None:
+        self.session.commit()
+        self.transaction.commit()
+
+    def _rollback(self) -> None:
+        self.session.rollback()
+        self.transaction.rollback()
+
+    async def commit(self) -> None:
+        async with self._lock:
+            if self.use_async:
+                await self.async_session.commit()
+                await self.transaction.commit()
+            else:
+                await run_in_threadpool(self._commit)
+            self.committed = True
+        # Os repositórios já invalidaram os caches no commit do SAVEPOINT, mas
+        # outra requisição pode ter lido e guardado o estado antigo antes do
+        # commit real
+        for table_name in self.session.info.pop("touched_tables", set()):
+            invalidate_table(table_name, cascade=True)
+
+    async def rollback(self) -> None:
+        async with self._lock:
+            if self.use_async:
+                await self.async_session.rollback()
+                await self.transaction.rollback()
+            else:
+                await run_in_threadpool(self._rollback)
+
+    async def close(self) -> None:
+        if not self.committed and self.transaction.is_active:
+            await self.rollback()
+        if self.use_async:
+            await self.async_session.close()
+            await self.connection.close()
+        else:
+            await run_in_threadpool(self.session.close)
+            await run_in_threadpool(self.connection.close)
+
+
+@asynccontextmanager
+async def _activate(uow: UnitOfWork) -> AsyncIterator[UnitOfWork]:
+    # Abre a unidade de trabalho e faz os repositórios chamados dentro do
+    # bloco usarem a sessão dela; na saída, o que não teve commit é desfeito
+    await uow.begin()
+    uow_token = current_unit_of_work.set(uow)
+    session_token = None if uow.use_async else database.current_session.set(uow.session)
+    try:
+        yield uow
+    finally:
+        if session_token is not None:
+            database.current_session.reset(session_token)
+        current_unit_of_work.reset(uow_token)
+        await uow.close()
+
+
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    # Dependência FastAPI: a unidade de trabalho vale até o fim da requisição e
+    # os repositórios chamados pela rota passam a usar a sessão dela
+    async with _activate(UnitOfWork()) as uow:
+        yield uow
+
+
+async def transaction() -> AsyncIterator[UnitOfWork]:
+    # Como unit_of_work, mas com commit quando a rota termina sem exceção. O
+    # FastAPI sai das dependências antes de enviar a resposta, então uma falha
+    # no commit vira erro em vez de uma resposta de sucesso já enviada
+    async with _activate(UnitOfWork()) as uow:
+        yield uow
+        await uow.commit()
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+# Quantidade de linhas agrupadas em cada chunk enviado ao cliente
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def ndjson_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(row, default=_json_default, ensure_ascii=False))
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def csv_chunks(rows: Iterable[dict], columns: list[str]) -> Iterator[str]:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns)
+    writer.writeheader()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % EXPORT_CHUNK_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    yield output.getvalue()
+
+
+def export_response(rows: Iterable[dict], formato: ExportFormat, model) -> StreamingResponse:
+    # As linhas chegam de um cursor do lado do servidor e são enviadas em chunks,
+    # então a memória usada não depende do tamanho da tabela
+    filename = model.__tablename__
+    if formato == ExportFormat.CSV:
+        columns = [column.name for column in model.__table__.columns]
+        content, media_type = csv_chunks(rows, columns), "text/csv"
+    else:
+        content, media_type = ndjson_chunks(rows), "application/x-ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{formato.value}"'}
+    )
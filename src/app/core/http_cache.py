@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Políticas de Cache-Control usadas pelas rotas
+NO_CACHE = "no-cache"
+ANALYTICS = "max-age=10, stale-while-revalidate=60"
+
+# Chave em scope["state"] que marca a resposta para o ConditionalGetMiddleware
+CONDITIONAL_GET = "conditional_get"
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def body_etag(body: bytes) -> str:
+    # O ETag vem do próprio corpo, então muda com qualquer escrita, venha ela
+    # deste processo, de outro worker, dos scripts de carga ou de SQL manual
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [_strip_weak(tag) for tag in if_none_match.split(",")]
+    return "*" in tags or _strip_weak(etag) in tags
+
+
+def conditional_get(cache_control: str = NO_CACHE):
+    # Dependência para rotas GET: anexa o Cache-Control da rota e marca a
+    # resposta para que o ConditionalGetMiddleware calcule o ETag do corpo e
+    # responda 304 quando o If-None-Match do cliente bater
+    def dependency(request: Request, response: Response) -> None:
+        if request.method not in ("GET", "HEAD"):
+            return
+        setattr(request.state, CONDITIONAL_GET, True)
+        response.headers["Cache-Control"] = cache_control
+
+    return dependency
@@ -1,8 +1,163 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import orjson
+
+from src.app.core.config import settings
+
+# Listener que escreve os registros enfileirados; None até setup_logging rodar
+_listener: "BlockingSentinelListener | None" = None
+_sampling_filter: "SamplingFilter | None" = None
+_queue_handler: "DeferredQueueHandler | None" = None
+# Fila limitada: se a escrita travar, os registros excedentes são descartados
+# (e contados) em vez de acumular memória sem limite
+_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+
+# Argumentos que podem ser formatados depois, na thread do listener, sem
+# risco de mudarem nesse meio tempo (objetos do ORM, listas e dicts não entram)
+_IMMUTABLE = (str, int, float, bool, type(None), datetime, date, Decimal, Enum)
+
+# Atributos padrão de LogRecord; o que sobrar veio de extra= e vai para o JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def parse_logger_values(value: str) -> dict[str, float]:
+    # "src.app.repositories=0.1,src.app.core=0.5" -> {"src.app.repositories": 0.1, ...}
+    result = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, separator, number = item.partition("=")
+        if not separator:
+            raise ValueError(f"Configuração de log inválida: {item!r} (esperado logger=valor)")
+        result[name.strip()] = float(number)
+    return result
+
+
+class SamplingFilter(logging.Filter):
+    # Amostragem e limite de taxa por logger (e seus filhos) para os registros
+    # abaixo de WARNING; avisos e erros sempre passam. Roda na thread que
+    # registra, antes de o registro entrar na fila, então o que é descartado
+    # não custa formatação nem I/O
+    def __init__(self, sampling: dict[str, float], rate_limits: dict[str, float]):
+        super().__init__()
+        self.sampling = sampling
+        self.rate_limits = rate_limits
+        self._prefixes: dict[str, tuple[str | None, str | None]] = {}
+        self._buckets = {name: [limit, time.monotonic()] for name, limit in rate_limits.items()}
+        self._lock = threading.Lock()
+        self.counters = {"sampled_out": {}, "rate_limited": {}}
+
+    @staticmethod
+    def _match(name: str, configured) -> str | None:
+        matches = [prefix for prefix in configured if name == prefix or name.startswith(prefix + ".")]
+        return max(matches, key=len) if matches else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        prefixes = self._prefixes.get(record.name)
+        if prefixes is None:
+            prefixes = self._prefixes[record.name] = (self._match(record.name, self.sampling), self._match(record.name, self.rate_limits))
+        sampled, limited = prefixes
+        if sampled is not None and random.random() >= self.sampling[sampled]:
+            self._count("sampled_out", sampled)
+            return False
+        if limited is not None and not self._take(limited):
+            self._count("rate_limited", limited)
+            return False
+        return True
+
+    def _take(self, prefix: str) -> bool:
+        # Token bucket: até rate_limits[prefix] registros por segundo, com rajada do mesmo tamanho
+        limit = self.rate_limits[prefix]
+        with self._lock:
+            bucket = self._buckets[prefix]
+            now = time.monotonic()
+            bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def snapshot(self, counter: str) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counters[counter])
+
+    def _count(self, counter: str, prefix: str) -> None:
+        with self._lock:
+            counters = self.counters[counter]
+            counters[prefix] = counters.get(prefix, 0) + 1
+
+
+class DeferredQueueHandler(QueueHandler):
+    # O QueueHandler padrão formata a mensagem na thread que registra. Aqui a
+    # formatação fica para o listener sempre que os argumentos são imutáveis;
+    # só o traceback vira texto na hora, porque referencia frames da thread atual.
+    # Com a fila cheia o registro é descartado e contado em dropped
+    def __init__(self, queue_):
+        super().__init__(queue_)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        args = record.args.values() if isinstance(record.args, dict) else record.args or ()
+        if not all(isinstance(arg, _IMMUTABLE) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class BlockingSentinelListener(QueueListener):
+    # O sentinela de parada espera espaço na fila: com put_nowait, stop() com a
+    # fila cheia falharia antes de escrever o que ainda está nela
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+def _formatter(fmt: str) -> logging.Formatter:
+    return JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(fmt)
+
 
 def setup_logging():
+    # Os loggers só enfileiram; formatação e escrita (console e arquivo
+    # rotativo) acontecem na thread do QueueListener
+    global _listener, _sampling_filter, _queue_handler
+    if _listener is not None:
+        return
+
     # Diretório para salvar os logs
     LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
     if not os.path.exists(LOG_DIR):
@@ -11,25 +166,43 @@ def setup_logging():
     # Arquivo de log
     LOG_FILE_PATH = os.path.join(LOG_DIR, 'app.log')
 
-    # Configuração do Logger
-    logging.basicConfig(level=logging.INFO,
-                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    root = logging.getLogger()
 
-    # Criação do logger
-    logger = logging.getLogger('app_logger')
+    # Handler para console, com tudo o que chega ao logger raiz. Se um script
+    # já configurou o raiz (logging.basicConfig), os handlers dele passam a
+    # escrever pelo listener em vez de duplicar a saída
+    console_handlers = list(root.handlers)
+    if not console_handlers:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(_formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        console_handlers.append(console_handler)
+        root.setLevel(settings.LOG_LEVEL)
+    for handler in console_handlers:
+        root.removeHandler(handler)
 
-    # Verifica se o logger já tem handlers
-    if not logger.handlers:
-        # Handler de arquivo rotativo
-        file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=10 * 1024 * 1024, backupCount=5)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
+    # Handler de arquivo rotativo, só com o logger app_logger (ex.: consultas lentas)
+    file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=10 * 1024 * 1024, backupCount=5)
+    file_handler.setFormatter(_formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    file_handler.addFilter(logging.Filter('app_logger'))
+
+    _sampling_filter = SamplingFilter(parse_logger_values(settings.LOG_SAMPLING), parse_logger_values(settings.LOG_RATE_LIMIT))
+    _queue_handler = DeferredQueueHandler(_queue)
+    _queue_handler.addFilter(_sampling_filter)
+
+    root.addHandler(_queue_handler)
+
+    _listener = BlockingSentinelListener(_queue, *console_handlers, file_handler, respect_handler_level=True)
+    _listener.start()
+    # Esvazia a fila antes de o processo terminar
+    atexit.register(_listener.stop)
 
-        # Handler para console (opcional)
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        logger.addHandler(console_handler)
 
-    print("Configuração de logging realizada com sucesso!")
+def log_stats() -> dict:
+    return {
+        "queued": _queue.qsize(),
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampling_filter.snapshot("sampled_out") if _sampling_filter else {},
+        "rate_limited": _sampling_filter.snapshot("rate_limited") if _sampling_filter else {},
+    }
 
 setup_logging()
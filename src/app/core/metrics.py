@@ -0,0 +1,127 @@
+import threading
+from typing import Callable, Iterable
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Métricas e coletores expostos no /metrics, no formato texto do Prometheus
+_metrics: list["_Metric"] = []
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def histogram_lines(name: str, labels: dict, limits: Iterable[float], counts: list[int], total: float) -> list[str]:
+    # counts são as contagens por bucket (não cumulativas), com o +Inf por último
+    lines, cumulative = [], 0
+    for limit, count in zip([*map(str, limits), "+Inf"], counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': limit})} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _labels(self, values: tuple) -> dict:
+        return dict(zip(self.labelnames, values))
+
+    def lines(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self._labels(labels))} {_format_value(value)}" for labels, value in values.items()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = next((i for i, limit in enumerate(self.buckets) if value <= limit), len(self.buckets))
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def lines(self) -> list[str]:
+        with self._lock:
+            series = {labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()}
+        lines = []
+        for labels, (counts, total) in series.items():
+            lines.extend(histogram_lines(self.name, self._labels(labels), self.buckets, counts, total))
+        return lines
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> None:
+    # Coletores geram linhas já formatadas no momento do scrape (ex.: estado do pool)
+    _collectors.append(collector)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.lines())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route", "status")
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "Latência dos comandos SQL por operação e tabela", ("operation", "table")
+)
+db_statement_rows = Counter(
+    "db_statement_rows_total", "Linhas retornadas ou afetadas pelos comandos SQL", ("operation", "table")
+)
+db_statement_errors = Counter(
+    "db_statement_errors_total", "Comandos SQL que terminaram em erro", ("operation", "table", "error")
+)
+db_slow_statements = Counter(
+    "db_slow_statements_total", "Comandos SQL acima de SLOW_QUERY_THRESHOLD", ("operation", "table")
+)
@@ -0,0 +1,162 @@
+import logging
+import time
+
+from src.app.core.config import settings
+from src.app.core.db.query_stats import QueryBudgetExceeded, RequestQueryStats, current_request_stats
+from src.app.core.http_cache import CONDITIONAL_GET, body_etag, etag_matches
+from src.app.core.metrics import http_request_duration
+
+logger = logging.getLogger(__name__)
+
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class RequestMetricsMiddleware:
+    # Middleware ASGI puro: mede a latência de cada requisição HTTP pelo
+    # template da rota (ex.: /api/veiculos/{veiculo_id}), não pelo caminho
+    # concreto, para manter a cardinalidade do rótulo limitada
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], _route_path(scope), str(status))
+
+
+class ConditionalGetMiddleware:
+    # Calcula o ETag das respostas 200 das rotas com conditional_get a partir
+    # do corpo e troca a resposta por um 304 vazio quando o If-None-Match do
+    # cliente bate. A rota roda e serializa do mesmo jeito; o que se economiza
+    # é o envio do corpo. O corpo inteiro fica em memória até o fim, por isso
+    # as exportações em streaming não usam conditional_get
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = None
+        chunks = []
+
+        async def send_with_etag(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                if message["status"] == 200 and scope.get("state", {}).get(CONDITIONAL_GET):
+                    pending_start = message
+                    return
+            elif pending_start is not None:
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._send_validated(scope, send, pending_start, b"".join(chunks))
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    async def _send_validated(scope, send, start_message, body: bytes) -> None:
+        etag = body_etag(body)
+        headers = [(name, value) for name, value in start_message.get("headers", []) if name.lower() != b"etag"]
+        if_none_match = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"if-none-match"), None)
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"content-type")]
+            headers.append((b"etag", etag.encode()))
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers.append((b"etag", etag.encode()))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class QueryCounterMiddleware:
+    # Conta os comandos SQL e o tempo de banco de cada requisição e os devolve
+    # nos headers X-DB-Queries e Server-Timing. Formatos de comando repetidos
+    # mais de N_PLUS_ONE_THRESHOLD vezes são registrados como possível N+1.
+    # Passar de DB_QUERY_BUDGET (ou do limite de query_budget na rota) gera
+    # um aviso; com DB_QUERY_BUDGET_ENFORCE a requisição falha, o que derruba
+    # os testes que a exercitam.
+    # Respostas em chunks (StreamingResponse, como os exports /all) consultam
+    # o banco enquanto o corpo é enviado, depois dos headers: elas saem sem os
+    # headers e o limite é verificado só quando o corpo termina.
+    # Comandos do batch loader e do single-flight são contados na requisição
+    # que iniciou a consulta compartilhada, não nas que esperaram por ela
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        pending_start = None
+        streaming = False
+
+        async def send_with_headers(message):
+            nonlocal pending_start, streaming
+            if message["type"] == "http.response.start":
+                # Segura o início da resposta até saber se o corpo vem inteiro
+                pending_start = message
+                return
+            if pending_start is not None:
+                start_message, pending_start = pending_start, None
+                if message.get("more_body", False):
+                    streaming = True
+                else:
+                    self._check_budget(scope, stats)
+                    start_message = self._with_headers(start_message, stats, start)
+                await send(start_message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+            if streaming:
+                self._check_budget(scope, stats)
+        finally:
+            current_request_stats.reset(token)
+            for shape, count in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                logger.warning("Possível N+1 em %s %s: %sx %s", scope["method"], _route_path(scope), count, shape[:500])
+
+    @staticmethod
+    def _with_headers(message, stats: RequestQueryStats, start: float):
+        total = (time.perf_counter() - start) * 1000
+        headers = list(message.get("headers", []))
+        headers.append((b"x-db-queries", str(stats.queries).encode()))
+        headers.append((
+            b"server-timing",
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.queries} queries", app;dur={total:.1f}'.encode(),
+        ))
+        return {**message, "headers": headers}
+
+    @staticmethod
+    def _check_budget(scope, stats: RequestQueryStats) -> None:
+        if stats.budget <= 0 or stats.queries <= stats.budget:
+            return
+        message = f"{scope['method']} {_route_path(scope)} executou {stats.queries} comandos SQL (limite {stats.budget})"
+        if settings.DB_QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
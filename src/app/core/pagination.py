@@ -0,0 +1,174 @@
+import base64
+import json
+import threading
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Table, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.util import find_tables
+
+from src.app.models.PaginationResult import PaginationResult
+
+
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+# Cache de contagens por assinatura do filtro (SQL + parâmetros), invalidado
+# pelos métodos create/update/delete dos repositórios das tabelas envolvidas
+COUNT_CACHE_MAX_SIZE = 1024
+_count_cache: dict[tuple, tuple[frozenset, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+def invalidate_counts(table_name: str) -> None:
+    with _count_cache_lock:
+        for key in [key for key, (tables, _) in _count_cache.items() if table_name in tables]:
+            del _count_cache[key]
+
+
+def _hashable(value):
+    # Parâmetros de IN (...) chegam como listas, que não servem de chave de dict
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def _cached_count(query) -> int:
+    compiled = query.statement.compile()
+    key = (str(compiled), tuple(sorted((name, _hashable(value)) for name, value in compiled.params.items())))
+    with _count_cache_lock:
+        if key in _count_cache:
+            return _count_cache[key][1]
+
+    total_items = query.count()
+    tables = frozenset(table.name for table in find_tables(query.statement))
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_SIZE:
+            del _count_cache[next(iter(_count_cache))]
+        _count_cache[key] = (tables, total_items)
+    return total_items
+
+
+class Explain(Executable, ClauseElement):
+    # EXPLAIN (FORMAT JSON) <consulta> executado por session.execute, para que o
+    # SQLAlchemy faça o bind dos parâmetros no paramstyle do driver (psycopg2 ou
+    # asyncpg) e expanda os IN (...) que só são resolvidos na execução
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _estimated_count(query) -> int:
+    # Só o Postgres expõe estimativas do planner; nos demais bancos a contagem é exata
+    db = query.session
+    if db.get_bind().dialect.name != "postgresql":
+        return query.count()
+
+    statement = query.statement
+    froms = statement.get_final_froms()
+    # reltuples só vale para uma tabela sem filtro; joins usam a estimativa do EXPLAIN
+    if statement.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+        reltuples = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table_name"),
+            {"table_name": froms[0].name}
+        ).scalar()
+        # reltuples é -1 enquanto a tabela não passou por ANALYZE
+        if reltuples is not None and reltuples >= 0:
+            return reltuples
+        return query.count()
+
+    plan = db.execute(Explain(statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_items(query, count: CountStrategy = CountStrategy.EXACT) -> Optional[int]:
+    if count == CountStrategy.NONE:
+        return None
+    if count == CountStrategy.CACHED:
+        return _cached_count(query)
+    if count == CountStrategy.ESTIMATED:
+        return _estimated_count(query)
+    return query.count()
+
+
+def encode_cursor(values: list) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, order_by: tuple) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if column.expression.type.python_type is datetime else value
+            for column, value in zip(order_by, values)
+        ]
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido!")
+
+
+def paginate(
+        query,
+        order_by: tuple,
+        page: Optional[int] = 1,
+        limit: Optional[int] = 10,
+        cursor: Optional[str] = None,
+        count: CountStrategy = CountStrategy.EXACT,
+        rank=None
+) -> PaginationResult:
+    # Com cursor a página é buscada por keyset (WHERE chave > cursor), sem OFFSET,
+    # então o custo não cresce com a profundidade da página
+    total_items = count_items(query, count)
+    number_of_pages = None
+    if total_items is not None:
+        number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
+
+    if rank is not None:
+        # Ordena por relevância decrescente usando -rank crescente, para que o
+        # keyset continue sendo uma única comparação de tupla
+        rank_key = (-rank).label("rank")
+        query = query.add_columns(rank_key)
+        order_by = (rank_key, *order_by)
+
+    query = query.order_by(*order_by)
+    if cursor:
+        values = decode_cursor(cursor, order_by)
+        query = query.filter(tuple_(*order_by) > tuple_(*values))
+        page = None
+    else:
+        query = query.offset((page - 1) * limit)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        if rank is not None:
+            values = [last.rank, *(getattr(last[0], column.key) for column in order_by[1:])]
+        else:
+            values = [getattr(last, column.key) for column in order_by]
+        next_cursor = encode_cursor(values)
+    data = [row[0] for row in rows[:limit]] if rank is not None else rows[:limit]
+
+    return PaginationResult(
+        page=page,
+        limit=limit,
+        total_items=total_items,
+        number_of_pages=number_of_pages,
+        next_cursor=next_cursor,
+        data=data
+    )
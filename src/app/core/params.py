@@ -0,0 +1,20 @@
+from fastapi import HTTPException, Query, status
+
+from src.app.core.config import settings
+
+
+def id_list(ids: list[str] = Query(..., description="Ids separados por vírgula ou repetidos (?ids=1,2&ids=3)")) -> list[int]:
+    try:
+        parsed = [int(value) for item in ids for value in item.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Lista de ids inválida!")
+    # Remove repetidos mantendo a ordem em que foram pedidos
+    parsed = list(dict.fromkeys(parsed))
+    if not parsed:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe ao menos um id!")
+    if len(parsed) > settings.MAX_IDS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No máximo {settings.MAX_IDS_PER_REQUEST} ids por requisição!",
+        )
+    return parsed
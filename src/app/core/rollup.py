@@ -0,0 +1,110 @@
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, text
+
+# Os relacionamentos de Veiculo chegam a Contrato, Usuario e Pagamento pelo
+# nome; os models precisam estar carregados quando o rollup roda fora da
+# aplicação (scripts)
+from src.app.models import contrato, pagamento, usuario  # noqa: F401
+from src.app.models.custo_manutencao import CustoManutencaoMarca, CustoManutencaoVeiculo
+from src.app.models.manutencao import Manutencao
+from src.app.models.veiculo import Veiculo
+from src.app.models.veiculo_manutencao import VeiculoManutencao
+
+# As tabelas de agregados guardam soma, quantidade e maior custo de manutenção
+# por veículo e por marca. Cada escrita recalcula só as chaves afetadas dentro
+# da mesma transação: o custo é proporcional às manutenções dos veículos
+# tocados, não ao join inteiro. O máximo não pode ser mantido por delta quando
+# uma manutenção sai, por isso a chave afetada é recalculada inteira
+
+VEICULO_COLUMNS = ["veiculo_id", "custo_total", "quantidade", "custo_maximo"]
+MARCA_COLUMNS = ["marca", "custo_total", "quantidade", "custo_maximo"]
+
+
+def _veiculo_totals(*where):
+    return (
+        select(
+            VeiculoManutencao.veiculo_id,
+            func.sum(Manutencao.custo),
+            func.count(),
+            func.max(Manutencao.custo),
+        )
+        .join(Manutencao, Manutencao.id == VeiculoManutencao.manutencao_id)
+        .where(*where)
+        .group_by(VeiculoManutencao.veiculo_id)
+    )
+
+
+def _marca_totals(*where):
+    # A marca é agregada a partir dos totais por veículo, não do join com manutenção
+    return (
+        select(
+            Veiculo.marca,
+            func.sum(CustoManutencaoVeiculo.custo_total),
+            func.sum(CustoManutencaoVeiculo.quantidade),
+            func.max(CustoManutencaoVeiculo.custo_maximo),
+        )
+        .join(Veiculo, Veiculo.id == CustoManutencaoVeiculo.veiculo_id)
+        .where(*where)
+        .group_by(Veiculo.marca)
+    )
+
+
+def _lock_keys(db, namespace: str, keys: set, key_type: str) -> None:
+    # Duas escritas em veículos da mesma marca (são poucas marcas) recalculam a
+    # mesma chave; sem o lock, em READ COMMITTED o DELETE da segunda espera a
+    # primeira, não encontra mais a linha e o INSERT viola a chave primária.
+    # O advisory lock da transação serializa o recálculo por chave, e o SELECT
+    # seguinte já vê o que a outra transação gravou. As chaves são travadas
+    # em ordem para que duas escritas não fiquem esperando uma pela outra
+    if db.get_bind().dialect.name != "postgresql" or not keys:
+        return
+    key = "k" if key_type == "integer" else "hashtext(k)"
+    db.execute(
+        text(
+            f"SELECT pg_advisory_xact_lock(hashtext(:namespace), {key}) "
+            f"FROM (SELECT unnest(CAST(:keys AS {key_type}[])) AS k ORDER BY 1) AS chaves"
+        ),
+        {"namespace": namespace, "keys": sorted(keys)},
+    )
+
+
+def refresh_rollups(db, veiculo_ids: Iterable[int] = (), marcas: Iterable[str] = ()) -> None:
+    # Não faz commit: roda na transação da escrita que afetou os agregados
+    veiculo_ids = {veiculo_id for veiculo_id in veiculo_ids if veiculo_id is not None}
+    marcas = {marca for marca in marcas if marca is not None}
+    db.flush()
+    if veiculo_ids:
+        _lock_keys(db, CustoManutencaoVeiculo.__tablename__, veiculo_ids, "integer")
+        db.execute(delete(CustoManutencaoVeiculo).where(CustoManutencaoVeiculo.veiculo_id.in_(veiculo_ids)))
+        db.execute(insert(CustoManutencaoVeiculo).from_select(
+            VEICULO_COLUMNS, _veiculo_totals(VeiculoManutencao.veiculo_id.in_(veiculo_ids))
+        ))
+        marcas.update(db.scalars(select(Veiculo.marca).where(Veiculo.id.in_(veiculo_ids))))
+    if marcas:
+        _lock_keys(db, CustoManutencaoMarca.__tablename__, marcas, "text")
+        db.execute(delete(CustoManutencaoMarca).where(CustoManutencaoMarca.marca.in_(marcas)))
+        db.execute(insert(CustoManutencaoMarca).from_select(MARCA_COLUMNS, _marca_totals(Veiculo.marca.in_(marcas))))
+
+
+def discard_veiculo_rollups(db, veiculo_ids: Iterable[int]) -> None:
+    # Remove os agregados de veículos que vão ser excluídos antes do DELETE do
+    # veículo, para não depender do ON DELETE CASCADE da chave estrangeira
+    veiculo_ids = set(veiculo_ids)
+    _lock_keys(db, CustoManutencaoVeiculo.__tablename__, veiculo_ids, "integer")
+    db.execute(delete(CustoManutencaoVeiculo).where(CustoManutencaoVeiculo.veiculo_id.in_(veiculo_ids)))
+
+
+def veiculos_da_manutencao(db, manutencao_ids: Iterable[int]) -> list[int]:
+    return list(db.scalars(
+        select(VeiculoManutencao.veiculo_id.distinct()).where(VeiculoManutencao.manutencao_id.in_(list(manutencao_ids)))
+    ))
+
+
+def rebuild_rollups(db) -> tuple[int, int]:
+    db.execute(delete(CustoManutencaoMarca))
+    db.execute(delete(CustoManutencaoVeiculo))
+    veiculos = db.execute(insert(CustoManutencaoVeiculo).from_select(VEICULO_COLUMNS, _veiculo_totals())).rowcount
+    marcas = db.execute(insert(CustoManutencaoMarca).from_select(MARCA_COLUMNS, _marca_totals())).rowcount
+    db.commit()
+    return veiculos, marcas
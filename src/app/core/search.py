@@ -0,0 +1,40 @@
+import time
+
+from sqlalchemy import Float, func, literal, text
+
+# Por quanto tempo (segundos) o resultado da verificação do pg_trgm vale; um
+# CREATE EXTENSION feito com a aplicação rodando passa a valer depois disso
+PG_TRGM_CHECK_TTL = 60
+
+# Resultado da verificação do pg_trgm e horário em que foi feita, por URL do banco
+_pg_trgm_available: dict[str, tuple[bool, float]] = {}
+
+
+def _has_pg_trgm(db) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = str(bind.url)
+    cached = _pg_trgm_available.get(key)
+    if cached is None or time.monotonic() - cached[1] >= PG_TRGM_CHECK_TTL:
+        available = db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        ).scalar()
+        cached = _pg_trgm_available[key] = (available, time.monotonic())
+    return cached[0]
+
+
+def search_condition(db, column, term: str) -> tuple:
+    """Retorna (filtro de substring, expressão de relevância) para buscar term em column."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    condition = column.ilike(f"%{escaped}%", escape="\\")
+    if _has_pg_trgm(db):
+        # ILIKE '%x%' é atendido pelos índices GIN gin_trgm_ops
+        return condition, func.similarity(column, term, type_=Float)
+    # Sem pg_trgm (ex.: SQLite) a busca é uma redução deliberada: o ILIKE
+    # percorre a tabela inteira e a relevância é só uma aproximação, a fração
+    # do texto coberta pelo termo (1.0 para o texto igual ao termo). O índice
+    # de n-gramas em memória foi removido porque precisava inlinar cada id
+    # encontrado na consulta e ser recarregado a cada escrita, o que custava
+    # mais que a varredura. Implantações que precisam de busca rápida usam Postgres
+    return condition, literal(float(len(term)), Float) / func.length(column)
@@ -0,0 +1,44 @@
+from operator import attrgetter
+from typing import Callable, Iterable
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from src.app.models.PaginationResult import PaginationResult
+
+_serializers: dict[type, Callable] = {}
+
+
+def serializer_for(model) -> Callable:
+    # Função row -> dict sobre as colunas da tabela, com um attrgetter no lugar
+    # da introspecção que o jsonable_encoder faz a cada objeto. Relacionamentos
+    # ficam de fora, como no model_dump dos models
+    serializer = _serializers.get(model)
+    if serializer is None:
+        columns = tuple(column.key for column in model.__table__.columns)
+        getter = attrgetter(*columns)
+        serializer = _serializers[model] = lambda row: dict(zip(columns, getter(row)))
+    return serializer
+
+
+def serialize_rows(model, rows: Iterable) -> list[dict]:
+    serializer = serializer_for(model)
+    return [serializer(row) for row in rows]
+
+
+def serialize_page(model, result: PaginationResult) -> dict:
+    return {
+        "page": result.page,
+        "limit": result.limit,
+        "total_items": result.total_items,
+        "number_of_pages": result.number_of_pages,
+        "next_cursor": result.next_cursor,
+        "data": serialize_rows(model, result.data),
+    }
+
+
+def json_response(content, response: Response | None = None) -> ORJSONResponse:
+    # Retornar um Response direto faz o FastAPI ignorar os headers definidos
+    # pelas dependências (ex.: Cache-Control), então eles são copiados aqui
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, headers=headers)
@@ -9,13 +9,15 @@ from fastapi.openapi.utils import get_openapi
 from sqlmodel import SQLModel, create_engine
 
 from src.app.core.config import DatabaseSettings, AppSettings, EnvironmentSettings, EnvironmentOption
-from src.app.core.db.database import engine
+from src.app.core.db import database
+from src.app.core.metrics import render
+from src.app.core.middleware import ConditionalGetMiddleware, QueryCounterMiddleware, RequestMetricsMiddleware
 
 
 # --------------------------- database ---------------------------
 def create_tables() -> None:
-    with engine.begin() as conn:
-        SQLModel.metadata.create_all(bind=conn.engine)
+    with database.engine.begin() as conn:
+        SQLModel.metadata.create_all(bind=conn)
 
 # --------------------------- application ---------------------------
 def lifespan_factory(
@@ -62,6 +64,17 @@ def create_application(
 
     application = FastAPI(lifespan = lifespan, **kwargs)
     application.include_router(router)
+    application.add_middleware(ConditionalGetMiddleware)
+    application.add_middleware(QueryCounterMiddleware)
+    application.add_middleware(RequestMetricsMiddleware)
+
+    metrics_router = APIRouter()
+
+    @metrics_router.get("/metrics", include_in_schema=False)
+    def get_metrics() -> fastapi.responses.PlainTextResponse:
+        return fastapi.responses.PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    application.include_router(metrics_router)
 
     if isinstance(settings, EnvironmentSettings):
         if settings.ENVIRONMENT != EnvironmentOption.PRODUCTION:
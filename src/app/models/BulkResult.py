@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class BulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    total: int
+    inserted: int
+    ids: list[int]
+    errors: list[BulkError]
+
+
+class BulkDeleteResult(BaseModel):
+    total: int
+    deleted: int
+    ids: list[int]
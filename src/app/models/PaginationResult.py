@@ -1,9 +1,12 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class PaginationResult(BaseModel):
-    page: int
+    page: Optional[int] = None
     limit: int
-    total_items: int
-    number_of_pages: int
-    data: list
\ No newline at end of file
+    total_items: Optional[int] = None
+    number_of_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    data: list
@@ -8,10 +8,10 @@ from src.app.models.veiculo import Veiculo
 
 class Contrato(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True, index=True, nullable=False)
-    usuario_id: int = Field(foreign_key="usuario.id", nullable=False)
-    veiculo_id: int = Field(foreign_key="veiculo.id", nullable=False)
-    pagamento_id: int = Field(foreign_key="pagamento.id", nullable=True)
-    data_inicio: datetime = Field(nullable=False)
+    usuario_id: int = Field(foreign_key="usuario.id", nullable=False, index=True)
+    veiculo_id: int = Field(foreign_key="veiculo.id", nullable=False, index=True)
+    pagamento_id: Optional[int] = Field(default=None, foreign_key="pagamento.id", ondelete="SET NULL", nullable=True, index=True)
+    data_inicio: datetime = Field(nullable=False, index=True)
     data_fim: datetime = Field(nullable=False)
 
     usuario: Optional["Usuario"] = Relationship(back_populates="contratos")
@@ -19,4 +19,12 @@ class Contrato(SQLModel, table=True):
     pagamento: Optional[Pagamento] = Relationship(sa_relationship_kwargs={"uselist": False}, back_populates="contrato")
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class ContratoUpdate(SQLModel):
+    usuario_id: Optional[int] = None
+    veiculo_id: Optional[int] = None
+    pagamento_id: Optional[int] = None
+    data_inicio: Optional[datetime] = None
+    data_fim: Optional[datetime] = None
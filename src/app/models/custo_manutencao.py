@@ -0,0 +1,30 @@
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+# Agregados de custo de manutenção mantidos incrementalmente por
+# src.app.core.rollup; podem ser recalculados com src.scripts.rebuild_rollups
+class CustoManutencaoVeiculo(SQLModel, table=True):
+    __tablename__ = "custo_manutencao_veiculo"
+    __table_args__ = (Index("ix_custo_manutencao_veiculo_custo_total", "custo_total"),)
+
+    veiculo_id: int = Field(primary_key=True, foreign_key="veiculo.id", ondelete="CASCADE", nullable=False)
+    custo_total: float = Field(nullable=False)
+    quantidade: int = Field(nullable=False)
+    custo_maximo: float = Field(nullable=False)
+
+    class Config:
+        orm_mode = True
+
+
+class CustoManutencaoMarca(SQLModel, table=True):
+    __tablename__ = "custo_manutencao_marca"
+    __table_args__ = (Index("ix_custo_manutencao_marca_custo_total", "custo_total"),)
+
+    marca: str = Field(max_length=100, primary_key=True, nullable=False)
+    custo_total: float = Field(nullable=False)
+    quantidade: int = Field(nullable=False)
+    custo_maximo: float = Field(nullable=False)
+
+    class Config:
+        orm_mode = True
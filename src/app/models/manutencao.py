@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
@@ -6,9 +7,11 @@ from src.app.models.veiculo_manutencao import VeiculoManutencao
 
 
 class Manutencao (SQLModel, table=True):
+    __table_args__ = (Index("ix_manutencao_data_id", "data", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True, nullable=False)
     data: datetime = Field(nullable=False)
-    tipo_manutencao: str = Field(nullable=False)
+    tipo_manutencao: str = Field(nullable=False, index=True)
     custo : float = Field(nullable=False)
     observacao: str = Field(nullable=False)
 
@@ -19,3 +22,10 @@ class Manutencao (SQLModel, table=True):
 
     class Config:
         orm_mode = True
+
+
+class ManutencaoUpdate(SQLModel):
+    data: Optional[datetime] = None
+    tipo_manutencao: Optional[str] = None
+    custo: Optional[float] = None
+    observacao: Optional[str] = None
@@ -1,10 +1,17 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 
 class Pagamento(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_pagamento_vencimento_id", "vencimento", "id"),
+        Index("ix_pagamento_pago_vencimento_id", "pago", "vencimento", "id"),
+        Index("ix_pagamento_pendente", "id", postgresql_include=["valor"], postgresql_where=text("NOT pago")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True, nullable=False)
     valor: float = Field(nullable=False)
     forma_pagamento: str = Field(max_length=100, nullable=False)
@@ -14,4 +21,11 @@ class Pagamento(SQLModel, table=True):
     contrato: Optional["Contrato"] = Relationship(back_populates="pagamento")
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class PagamentoUpdate(SQLModel):
+    valor: Optional[float] = None
+    forma_pagamento: Optional[str] = Field(default=None, max_length=100)
+    vencimento: Optional[datetime] = None
+    pago: Optional[bool] = None
@@ -14,4 +14,11 @@ class Usuario(SQLModel, table=True):
     contratos: Optional["Contrato"] = Relationship(back_populates="usuario")
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class UsuarioUpdate(SQLModel):
+    nome: Optional[str] = Field(default=None, max_length=100)
+    email: Optional[str] = Field(default=None, max_length=100)
+    celular: Optional[str] = Field(default=None, max_length=20)
+    cpf: Optional[str] = Field(default=None, max_length=14)
@@ -8,7 +8,7 @@ from src.app.models.veiculo_manutencao import VeiculoManutencao
 class Veiculo(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True, index=True, nullable=False)
     modelo: str = Field(max_length=100, nullable=False)
-    marca: str = Field(max_length=100, nullable=False)
+    marca: str = Field(max_length=100, nullable=False, index=True)
     placa: str = Field(max_length=7, nullable=False, unique=True)
     ano: int = Field(nullable=False)
 
@@ -18,4 +18,11 @@ class Veiculo(SQLModel, table=True):
     )
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class VeiculoUpdate(SQLModel):
+    modelo: Optional[str] = Field(default=None, max_length=100)
+    marca: Optional[str] = Field(default=None, max_length=100)
+    placa: Optional[str] = Field(default=None, max_length=7)
+    ano: Optional[int] = None
@@ -1,10 +1,18 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class VeiculoManutencao(SQLModel, table=True):
+    __table_args__ = (Index("ix_veiculomanutencao_veiculo_id_manutencao_id", "veiculo_id", "manutencao_id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True, nullable=False)
-    veiculo_id: int = Field(nullable=False, foreign_key="veiculo.id")
-    manutencao_id: int = Field(nullable=False, foreign_key="manutencao.id")
+    veiculo_id: int = Field(nullable=False, foreign_key="veiculo.id", ondelete="CASCADE")
+    manutencao_id: int = Field(nullable=False, foreign_key="manutencao.id", ondelete="CASCADE", index=True)
 
     class Config:
         orm_mode = True
+
+
+class VeiculoManutencaoUpdate(SQLModel):
+    veiculo_id: Optional[int] = None
+    manutencao_id: Optional[int] = None
@@ -0,0 +1,71 @@
+import inspect
+
+from starlette.concurrency import run_in_threadpool
+
+from src.app.core.cache import result_cache
+from src.app.core.config import settings
+from src.app.core.db import database
+from src.app.core.db.unit_of_work import current_unit_of_work
+from src.app.repositories.batch_loader import BatchLoader, loaders
+from src.app.repositories.single_flight import flights
+
+
+class AsyncRepository:
+    """Variante assíncrona de um repositório.
+
+    Com POSTGRES_USE_ASYNC cada método roda numa AsyncSession (asyncpg) via
+    run_sync, sem ocupar uma thread do pool do anyio; sem ele o método
+    síncrono original roda no threadpool, como nas rotas def. Dentro de uma
+    unidade de trabalho (Depends(unit_of_work)) todos os métodos usam a sessão
+    dela.
+
+    Fora da unidade de trabalho, get_by_id passa por um BatchLoader: chamadas
+    concorrentes dentro de BATCH_LOADER_WINDOW viram um único get_many. Os
+    métodos marcados com @single_flight têm as chamadas idênticas
+    concorrentes deduplicadas; a chave inclui a geração de escritas do cache,
+    então quem chega depois de uma escrita não recebe um resultado anterior a ela.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.use_async = settings.POSTGRES_USE_ASYNC
+        self.loader = None
+        if hasattr(repository, "get_many"):
+            self.loader = BatchLoader(self._load_many, settings.BATCH_LOADER_WINDOW, settings.MAX_IDS_PER_REQUEST)
+            loaders[type(repository).__name__] = self.loader
+
+    async def _load_many(self, ids: list[int]) -> dict:
+        return {entity.id: entity for entity in await self.get_many(ids)}
+
+    async def get_by_id(self, entity_id: int):
+        if self.loader is None or current_unit_of_work.get() is not None:
+            return await self.__getattr__("get_by_id")(entity_id)
+        return await self.loader.load(entity_id)
+
+    def __getattr__(self, name):
+        method = getattr(self.repository, name)
+        # Geradores (ex.: stream_all) são consumidos pelo StreamingResponse,
+        # que já os itera no threadpool
+        if not callable(method) or inspect.isgeneratorfunction(method):
+            return method
+
+        async def call(*args, **kwargs):
+            uow = current_unit_of_work.get()
+            if uow is not None:
+                return await uow.run(method, *args, **kwargs)
+            if getattr(method, "single_flight", False):
+                key = (method.__qualname__, args, tuple(sorted(kwargs.items())), result_cache.generation)
+                try:
+                    hash(key)
+                except TypeError:
+                    return await self._execute(method, *args, **kwargs)
+                return await flights.do(method.__qualname__, key, lambda: self._execute(method, *args, **kwargs))
+            return await self._execute(method, *args, **kwargs)
+
+        return call
+
+    async def _execute(self, method, *args, **kwargs):
+        if not self.use_async:
+            return await run_in_threadpool(method, *args, **kwargs)
+        async with database.async_local_session() as db:
+            return await db.run_sync(lambda session: database.call_with_session(session, method, *args, **kwargs))
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+# Loaders criados pelos AsyncRepository, por nome do repositório; expostos em /internal/cache
+loaders: dict[str, "BatchLoader"] = {}
+
+
+class _Batch:
+    def __init__(self):
+        self.futures: dict[Hashable, asyncio.Future] = {}
+        self.dispatched = False
+
+
+class BatchLoader:
+    # Agrupa as chamadas concorrentes de load feitas dentro de uma janela curta
+    # numa única chamada a load_many, no estilo do DataLoader: cada chave
+    # distinta entra uma vez no lote e todos que pediram a mesma chave recebem
+    # o mesmo resultado. load_many recebe a lista de chaves e devolve um dict
+    # chave -> valor; chaves ausentes resolvem para None. Roda só no event
+    # loop, então o estado não precisa de lock
+    def __init__(self, load_many: Callable[[list], Awaitable[dict]], window: float, max_batch_size: int):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._batch: _Batch | None = None
+        self.counters = {"loads": 0, "batches": 0, "keys": 0}
+
+    async def load(self, key: Hashable) -> Any:
+        loop = asyncio.get_running_loop()
+        self.counters["loads"] += 1
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch()
+            loop.call_later(self.window, self._dispatch, batch)
+        future = batch.futures.get(key)
+        if future is None:
+            future = batch.futures[key] = loop.create_future()
+            if len(batch.futures) >= self.max_batch_size:
+                self._dispatch(batch)
+        # shield: se uma requisição for cancelada, o lote segue para as outras
+        return await asyncio.shield(future)
+
+    def _dispatch(self, batch: _Batch) -> None:
+        if batch.dispatched:
+            return
+        batch.dispatched = True
+        if self._batch is batch:
+            self._batch = None
+        self.counters["batches"] += 1
+        self.counters["keys"] += len(batch.futures)
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _Batch) -> None:
+        try:
+            results = await self.load_many(list(batch.futures))
+        except Exception as e:
+            logger.exception("Erro ao carregar lote")
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def snapshot(self) -> dict:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "keys_per_batch": self.counters["keys"] / batches if batches else 0.0,
+        }
@@ -1,17 +1,25 @@
 import logging
 from datetime import datetime, timedelta
-from sqlite3 import IntegrityError
-from typing import Optional
+from typing import Iterator, Optional
 
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from sqlmodel import extract
 
-from src.app.core.db.database import get_db
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import CountStrategy, paginate
+from src.app.core.search import search_condition
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
 from src.app.models.PaginationResult import PaginationResult
-from src.app.models.contrato import Contrato
+from src.app.models.contrato import Contrato, ContratoUpdate
 from src.app.models.pagamento import Pagamento
 from src.app.models.usuario import Usuario
 from src.app.models.veiculo import Veiculo
+from src.app.repositories.single_flight import single_flight
 
 
 class ContratoRepository:
@@ -20,66 +28,81 @@ class ContratoRepository:
 
     def create(self, contrato: Contrato) -> Contrato:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(contrato)
                 db.commit()
                 db.refresh(contrato)
+                invalidate_table(Contrato.__tablename__)
                 self.logger.info("Contrato criado com sucesso!")
                 return contrato
         except IntegrityError:
             self.logger.error("Erro ao criar contrato!")
             raise ValueError("Erro ao criar contrato!")
 
+    def create_many(self, contratos: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, Contrato, contratos, chunk_size)
+            invalidate_table(Contrato.__tablename__)
+            self.logger.info("Contratos criados em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all_no_pagination(self) -> list[Contrato]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os contratos, sem paginação")
             return db.query(Contrato).all()
 
-    def get_all(self, data_inicial: Optional[datetime] = None, data_final: Optional[datetime] = None, page: Optional[int] = 1, limit: Optional[int] = 10) -> list[Contrato]:
-        with next(get_db()) as db:
+    def stream_all(self, batch_size: int = 1000) -> Iterator[dict]:
+        with session_scope() as db:
+            self.logger.info("Exportando todos os contratos em streaming")
+            result = db.execute(select(Contrato.__table__).execution_options(yield_per=batch_size))
+            for row in result.mappings():
+                yield dict(row)
+
+    @single_flight
+    def get_all(self, data_inicial: Optional[datetime] = None, data_final: Optional[datetime] = None, page: Optional[int] = 1, limit: Optional[int] = 10, cursor: Optional[str] = None, count: CountStrategy = CountStrategy.EXACT) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Contrato)
             if data_inicial and data_final:
                 query = query.filter(Contrato.data_inicio >= data_inicial, Contrato.data_fim <= data_final)
             if data_inicial:
                 query = query.filter(Contrato.data_inicio == data_inicial)
-            self.logger.info(f"Buscando contratos com data inicial {data_inicial} e data final {data_final}")
-
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
+            self.logger.info("Buscando contratos com data inicial %s e data final %s", data_inicial, data_final)
 
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            return paginate(query, (Contrato.id,), page, limit, cursor, count)
 
     def get_by_id(self, contrato_id: int) -> Contrato:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando contrato de id {contrato_id}")
-            return db.query(Contrato).filter(Contrato.id == contrato_id).first()
+        self.logger.info("Buscando contrato de id %s", contrato_id)
+        return entity_cache.get(Contrato, contrato_id)
 
+    def get_many(self, contrato_ids: list[int]) -> list[Contrato]:
+        self.logger.info("Buscando contratos de ids %s", contrato_ids)
+        found = entity_cache.get_many(Contrato, contrato_ids)
+        return [found[contrato_id] for contrato_id in contrato_ids if contrato_id in found]
+
+    @single_flight
     def get_contratos_by_usuario_veiculo(self) -> list[Contrato]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os contratos com usuario e veiculo")
             return db.query(Contrato).options(joinedload(Contrato.usuario), joinedload(Contrato.veiculo)).all()
 
+    @single_flight
     def get_contratos_by_usuario_id(self, usuario_id: int) -> list[Contrato]:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando todos os contratos com usuario de id {usuario_id}")
+        with session_scope() as db:
+            self.logger.info("Buscando todos os contratos com usuario de id %s", usuario_id)
             return db.query(Contrato).filter(Contrato.usuario_id == usuario_id).options(joinedload(Contrato.usuario), joinedload(Contrato.veiculo)).all()
 
+    @single_flight
     def get_contratos_by_veiculo_marca_pagamento_pago(self, veiculo_marca: str, pagamento_pago: Optional[bool] = None) -> list[Contrato]:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando todos os contratos com veiculo de marca {veiculo_marca} e pagamento pago {pagamento_pago}")
+        with session_scope() as db:
+            self.logger.info("Buscando todos os contratos com veiculo de marca %s e pagamento pago %s", veiculo_marca, pagamento_pago)
             if pagamento_pago is None:
                 return db.query(Contrato).filter(Contrato.veiculo.has(marca=veiculo_marca)).options(joinedload(Contrato.veiculo), joinedload(Contrato.pagamento)).all()
             return db.query(Contrato).filter(Contrato.veiculo.has(marca=veiculo_marca), Contrato.pagamento.has(pago=pagamento_pago)).options(joinedload(Contrato.veiculo), joinedload(Contrato.pagamento)).all()
 
+    @single_flight
     def get_contratos_by_pagamento_vencimento_month_and_usuario_id(self, vencimento_month: datetime, usuario_id: Optional[int] = None) -> list[Contrato]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             vencimento_inicio = vencimento_month.replace(day=1)
             vencimento_fim = (vencimento_inicio + timedelta(days=31)).replace(day=1)
 
@@ -89,38 +112,35 @@ class ContratoRepository:
             )#.options(joinedload(Contrato.pagamento))
             if usuario_id:
                 query = query.filter(Contrato.usuario_id == usuario_id).options(joinedload(Contrato.usuario))
-            self.logger.info(f"Buscando todos os contratos com pagamento de vencimento no mes {vencimento_month.month} e ano {vencimento_month.year}")
+            self.logger.info("Buscando todos os contratos com pagamento de vencimento no mes %s e ano %s", vencimento_month.month, vencimento_month.year)
             return query.all()
 
+    @single_flight
     def get_quantidade_contratos(self) -> int:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando quantidade de contratos")
             return db.query(Contrato).count()
 
-    def search(self, placa: Optional[str] = None, nome_usuario: Optional[str] = None, page: Optional[int] = 1, limit: Optional[int] = 10) -> list[Contrato]:
-        with next(get_db()) as db:
+    @single_flight
+    def search(self, placa: Optional[str] = None, nome_usuario: Optional[str] = None, page: Optional[int] = 1, limit: Optional[int] = 10, cursor: Optional[str] = None, count: CountStrategy = CountStrategy.EXACT) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Contrato).join(Usuario).join(Veiculo)
+            rank = None
             if placa:
-                query = query.filter(Veiculo.placa.ilike(f"%{placa}%"))
+                condition, placa_rank = search_condition(db, Veiculo.placa, placa)
+                query = query.filter(condition)
+                rank = placa_rank
             if nome_usuario:
-                query = query.filter(Usuario.nome.ilike(f"%{nome_usuario}%"))
-
-            self.logger.info(f"Buscando contratos com filtro placa={placa} e nome_usuario={nome_usuario}")
+                condition, nome_rank = search_condition(db, Usuario.nome, nome_usuario)
+                query = query.filter(condition)
+                rank = nome_rank if rank is None else rank + nome_rank
 
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
+            self.logger.info("Buscando contratos com filtro placa=%s e nome_usuario=%s", placa, nome_usuario)
 
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            return paginate(query, (Contrato.id,), page, limit, cursor, count, rank)
 
     def update(self, contrato_id: int, contrato_data: dict) -> Contrato:
-        with next(get_db()) as db:
+        with session_scope() as db:
             contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
             if not contrato:
                 return None
@@ -129,15 +149,34 @@ class ContratoRepository:
                     setattr(contrato, key, value)
             db.commit()
             db.refresh(contrato)
-            self.logger.info(f"Contrato de id {contrato_id} atualizado")
+            invalidate_table(Contrato.__tablename__, contrato_id)
+            self.logger.info("Contrato de id %s atualizado", contrato_id)
             return contrato
 
+    def patch(self, contrato_id: int, contrato_data: ContratoUpdate) -> Optional[Contrato]:
+        contratos = self.patch_many([contrato_id], contrato_data)
+        return contratos[0] if contratos else None
+
+    def patch_many(self, contrato_ids: list[int], contrato_data: ContratoUpdate) -> list[Contrato]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = contrato_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            contratos, _ = update_returning(db, Contrato, contrato_ids, values)
+            db.commit()
+            invalidate_table(Contrato.__tablename__, *contrato_ids)
+            self.logger.info("Contratos de ids %s atualizados parcialmente", contrato_ids)
+            return contratos
+
     def delete(self, contrato_id: int) -> bool:
-        with next(get_db()) as db:
-            contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
-            if not contrato:
-                return False
-            db.delete(contrato)
+        return self.delete_many([contrato_id]).deleted > 0
+
+    def delete_many(self, contrato_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            deleted = delete_returning(db, Contrato, contrato_ids, chunk_size)
             db.commit()
-            self.logger.info(f"Contrato de id {contrato_id} deletado")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(Contrato.__tablename__, *ids)
+            self.logger.info("Contratos deletados: %s de %s", len(ids), len(contrato_ids))
+            return BulkDeleteResult(total=len(contrato_ids), deleted=len(ids), ids=ids)
@@ -1,11 +1,21 @@
 import logging
 from datetime import datetime
-from sqlite3 import IntegrityError
-from typing import Optional
+from typing import Iterator, Optional
 
-from src.app.core.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import CountStrategy, paginate
+from src.app.core.rollup import refresh_rollups, veiculos_da_manutencao
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
 from src.app.models.PaginationResult import PaginationResult
-from src.app.models.manutencao import Manutencao
+from src.app.models.manutencao import Manutencao, ManutencaoUpdate
+from src.app.models.veiculo_manutencao import VeiculoManutencao
+from src.app.repositories.single_flight import single_flight
 
 
 class ManutencaoRepository:
@@ -14,30 +24,49 @@ class ManutencaoRepository:
 
     def create(self, manutencao: Manutencao) -> Manutencao:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(manutencao)
                 db.commit()
                 db.refresh(manutencao)
+                invalidate_table(Manutencao.__tablename__)
                 self.logger.info("Manutenção criada com sucesso!")
                 return manutencao
         except IntegrityError:
             self.logger.error("Erro ao criar manutenção!")
             raise ValueError("Erro ao criar manutenção!")
 
+    def create_many(self, manutencoes: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, Manutencao, manutencoes, chunk_size)
+            invalidate_table(Manutencao.__tablename__)
+            self.logger.info("Manutenções criadas em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all_no_pagination(self) -> list[Manutencao]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todas as manutenções, sem paginação")
             return db.query(Manutencao).all()
 
+    def stream_all(self, batch_size: int = 1000) -> Iterator[dict]:
+        with session_scope() as db:
+            self.logger.info("Exportando todas as manutenções em streaming")
+            result = db.execute(select(Manutencao.__table__).execution_options(yield_per=batch_size))
+            for row in result.mappings():
+                yield dict(row)
+
+    @single_flight
     def get_all(
             self,
             data_inicial: Optional[datetime] = None,
             data_final: Optional[datetime] = None,
             tipo_manutencao: Optional[str] = None,
             page: Optional[int] = 1,
-            limit: Optional[int] = 10
-    ) -> list[Manutencao]:
-        with next(get_db()) as db:
+            limit: Optional[int] = 10,
+            cursor: Optional[str] = None,
+            count: CountStrategy = CountStrategy.EXACT
+    ) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Manutencao)
             if data_inicial and data_final:
                 query = query.filter(Manutencao.data >= data_inicial, Manutencao.data <= data_final)
@@ -48,27 +77,22 @@ class ManutencaoRepository:
 
             self.logger.info("Buscando todas as manutenções")
 
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
-
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            return paginate(query, (Manutencao.data, Manutencao.id), page, limit, cursor, count)
 
     def get_by_id(self, manutencao_id: int) -> Manutencao:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando manutenção de id {manutencao_id}")
-            return db.query(Manutencao).filter(Manutencao.id == manutencao_id).first()
+        self.logger.info("Buscando manutenção de id %s", manutencao_id)
+        return entity_cache.get(Manutencao, manutencao_id)
+
+    def get_many(self, manutencao_ids: list[int]) -> list[Manutencao]:
+        self.logger.info("Buscando manutenções de ids %s", manutencao_ids)
+        found = entity_cache.get_many(Manutencao, manutencao_ids)
+        return [found[manutencao_id] for manutencao_id in manutencao_ids if manutencao_id in found]
 
+    @single_flight
     def get_tipos_manutencao_mais_frequentes(self) -> list:
         from sqlalchemy import func
 
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Consultando tipos de manutenção mais frequentes")
             return (
                 db.query(
@@ -80,30 +104,58 @@ class ManutencaoRepository:
                 .all()
             )
 
+    @single_flight
     def get_quantidade_manutencoes(self) -> int:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando quantidade de manutenções")
             return db.query(Manutencao).count()
 
     def update(self, manutencao_id: int, manutencao_data: dict) -> Manutencao:
-        with next(get_db()) as db:
+        with session_scope() as db:
             manutencao = db.query(Manutencao).filter(Manutencao.id == manutencao_id).first()
             if not manutencao:
                 return None
             for key, value in manutencao_data.items():
                 if hasattr(manutencao, key):
                     setattr(manutencao, key, value)
+            if "custo" in manutencao_data:
+                refresh_rollups(db, veiculos_da_manutencao(db, [manutencao_id]))
             db.commit()
             db.refresh(manutencao)
-            self.logger.info(f"Manutenção de id {manutencao_id} atualizada")
+            invalidate_table(Manutencao.__tablename__, manutencao_id)
+            self.logger.info("Manutenção de id %s atualizada", manutencao_id)
             return manutencao
 
+    def patch(self, manutencao_id: int, manutencao_data: ManutencaoUpdate) -> Optional[Manutencao]:
+        manutencoes = self.patch_many([manutencao_id], manutencao_data)
+        return manutencoes[0] if manutencoes else None
+
+    def patch_many(self, manutencao_ids: list[int], manutencao_data: ManutencaoUpdate) -> list[Manutencao]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = manutencao_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            manutencoes, _ = update_returning(db, Manutencao, manutencao_ids, values)
+            if "custo" in values:
+                refresh_rollups(db, veiculos_da_manutencao(db, [manutencao.id for manutencao in manutencoes]))
+            db.commit()
+            invalidate_table(Manutencao.__tablename__, *manutencao_ids)
+            self.logger.info("Manutenções de ids %s atualizadas parcialmente", manutencao_ids)
+            return manutencoes
+
     def delete(self, manutencao_id: int) -> bool:
-        with next(get_db()) as db:
-            manutencao = db.query(Manutencao).filter(Manutencao.id == manutencao_id).first()
-            if not manutencao:
-                return False
-            db.delete(manutencao)
+        return self.delete_many([manutencao_id]).deleted > 0
+
+    def delete_many(self, manutencao_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            veiculo_ids = veiculos_da_manutencao(db, manutencao_ids)
+            deleted = delete_returning(db, Manutencao, manutencao_ids, chunk_size)
+            refresh_rollups(db, veiculo_ids)
             db.commit()
-            self.logger.info(f"Manutenção de id {manutencao_id} deletada")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(Manutencao.__tablename__, *ids)
+            # Os vínculos com manutenção saem por ON DELETE CASCADE
+            invalidate_table(VeiculoManutencao.__tablename__, cascade=True)
+            self.logger.info("Manutenções deletadas: %s de %s", len(ids), len(manutencao_ids))
+            return BulkDeleteResult(total=len(manutencao_ids), deleted=len(ids), ids=ids)
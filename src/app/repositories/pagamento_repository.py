@@ -1,13 +1,21 @@
 import logging
 from datetime import datetime
-from sqlite3 import IntegrityError
-from typing import Optional
+from typing import Iterator, Optional
 
-from src.app.core.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import cached, entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import CountStrategy, paginate
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
 from src.app.models.PaginationResult import PaginationResult
 from src.app.models.contrato import Contrato
-from src.app.models.pagamento import Pagamento
+from src.app.models.pagamento import Pagamento, PagamentoUpdate
 from src.app.models.usuario import Usuario
+from src.app.repositories.single_flight import single_flight
 
 
 class PagamentoRepository:
@@ -16,30 +24,49 @@ class PagamentoRepository:
 
     def create(self, pagamento: Pagamento) -> Pagamento:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(pagamento)
                 db.commit()
                 db.refresh(pagamento)
+                invalidate_table(Pagamento.__tablename__)
                 self.logger.info("Pagamento criado com sucesso!")
                 return pagamento
         except IntegrityError:
             self.logger.error("Erro ao criar pagamento!")
             raise ValueError("Erro ao criar pagamento!")
 
+    def create_many(self, pagamentos: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, Pagamento, pagamentos, chunk_size)
+            invalidate_table(Pagamento.__tablename__)
+            self.logger.info("Pagamentos criados em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all_no_pagination(self) -> list[Pagamento]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os pagamentos, sem paginação")
             return db.query(Pagamento).all()
 
+    def stream_all(self, batch_size: int = 1000) -> Iterator[dict]:
+        with session_scope() as db:
+            self.logger.info("Exportando todos os pagamentos em streaming")
+            result = db.execute(select(Pagamento.__table__).execution_options(yield_per=batch_size))
+            for row in result.mappings():
+                yield dict(row)
+
+    @single_flight
     def get_all(
             self,
             data_inicial: Optional[datetime] = None,
             data_final: Optional[datetime] = None,
             pago: Optional[bool] = None,
             page: Optional[int] = 1,
-            limit: Optional[int] = 10
-    ):
-        with next(get_db()) as db:
+            limit: Optional[int] = 10,
+            cursor: Optional[str] = None,
+            count: CountStrategy = CountStrategy.EXACT
+    ) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Pagamento)
             if data_inicial and data_final:
                 query = query.filter(Pagamento.vencimento >= data_inicial, Pagamento.vencimento <= data_final)
@@ -48,29 +75,25 @@ class PagamentoRepository:
             if pago is not None:
                 query = query.filter(Pagamento.pago == pago)
 
-            self.logger.info(f"Buscando pagamentos com filtros: data_inicial={data_inicial}, data_final={data_final}, pago={pago}")
+            self.logger.info("Buscando pagamentos com filtros: data_inicial=%s, data_final=%s, pago=%s", data_inicial, data_final, pago)
 
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
-
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            return paginate(query, (Pagamento.vencimento, Pagamento.id), page, limit, cursor, count)
 
     def get_by_id(self, pagamento_id: int) -> Pagamento:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando pagamento de id {pagamento_id}")
-            return db.query(Pagamento).filter(Pagamento.id == pagamento_id).first()
+        self.logger.info("Buscando pagamento de id %s", pagamento_id)
+        return entity_cache.get(Pagamento, pagamento_id)
+
+    def get_many(self, pagamento_ids: list[int]) -> list[Pagamento]:
+        self.logger.info("Buscando pagamentos de ids %s", pagamento_ids)
+        found = entity_cache.get_many(Pagamento, pagamento_ids)
+        return [found[pagamento_id] for pagamento_id in pagamento_ids if pagamento_id in found]
 
+    @single_flight
+    @cached(Usuario.__tablename__, Contrato.__tablename__, Pagamento.__tablename__)
     def get_pagamentos_pendentes_por_usuario(self) -> list:
         from sqlalchemy import func
 
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Consultando pagamentos pendentes por usuário")
             return (
                 db.query(
@@ -87,7 +110,7 @@ class PagamentoRepository:
             )
 
     def update(self, pagamento_id: int, pagamento_data: dict) -> Pagamento:
-        with next(get_db()) as db:
+        with session_scope() as db:
             pagamento = db.query(Pagamento).filter(Pagamento.id == pagamento_id).first()
             if not pagamento:
                 return None
@@ -96,15 +119,36 @@ class PagamentoRepository:
                     setattr(pagamento, key, value)
             db.commit()
             db.refresh(pagamento)
-            self.logger.info(f"Pagamento de id {pagamento_id} atualizado")
+            invalidate_table(Pagamento.__tablename__, pagamento_id)
+            self.logger.info("Pagamento de id %s atualizado", pagamento_id)
             return pagamento
 
+    def patch(self, pagamento_id: int, pagamento_data: PagamentoUpdate) -> Optional[Pagamento]:
+        pagamentos = self.patch_many([pagamento_id], pagamento_data)
+        return pagamentos[0] if pagamentos else None
+
+    def patch_many(self, pagamento_ids: list[int], pagamento_data: PagamentoUpdate) -> list[Pagamento]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = pagamento_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            pagamentos, _ = update_returning(db, Pagamento, pagamento_ids, values)
+            db.commit()
+            invalidate_table(Pagamento.__tablename__, *pagamento_ids)
+            self.logger.info("Pagamentos de ids %s atualizados parcialmente", pagamento_ids)
+            return pagamentos
+
     def delete(self, pagamento_id: int) -> bool:
-        with next(get_db()) as db:
-            pagamento = db.query(Pagamento).filter(Pagamento.id == pagamento_id).first()
-            if not pagamento:
-                return False
-            db.delete(pagamento)
+        return self.delete_many([pagamento_id]).deleted > 0
+
+    def delete_many(self, pagamento_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            deleted = delete_returning(db, Pagamento, pagamento_ids, chunk_size)
             db.commit()
-            self.logger.info(f"Pagamento de id {pagamento_id} deletado")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(Pagamento.__tablename__, *ids)
+            # Contratos que apontavam para os pagamentos ficam com pagamento_id nulo (ON DELETE SET NULL)
+            invalidate_table(Contrato.__tablename__, cascade=True)
+            self.logger.info("Pagamentos deletados: %s de %s", len(ids), len(pagamento_ids))
+            return BulkDeleteResult(total=len(pagamento_ids), deleted=len(ids), ids=ids)
@@ -0,0 +1,49 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+def single_flight(method):
+    # Marca um método de leitura do repositório para o AsyncRepository
+    # deduplicar chamadas idênticas concorrentes. Só para leituras: quem
+    # chega durante a execução recebe o mesmo resultado, sem rodar de novo
+    method.single_flight = True
+    return method
+
+
+class SingleFlight:
+    # Mantém no máximo uma execução em andamento por chave. Quem pede a mesma
+    # chave enquanto ela roda aguarda a mesma task em vez de repetir a
+    # consulta. Roda só no event loop, então o estado não precisa de lock
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.counters: dict[str, dict[str, int]] = defaultdict(lambda: {"executions": 0, "saved": 0})
+
+    async def do(self, name: str, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.counters[name]["executions"] += 1
+            # A execução é uma task própria: se quem a iniciou for cancelado,
+            # os outros que aguardam continuam recebendo o resultado
+            task = self._calls[key] = asyncio.ensure_future(run())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.counters[name]["saved"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def snapshot(self) -> dict:
+        executions = sum(counter["executions"] for counter in self.counters.values())
+        saved = sum(counter["saved"] for counter in self.counters.values())
+        return {
+            "executions": executions,
+            "saved": saved,
+            "in_flight": len(self._calls),
+            "methods": {name: dict(counter) for name, counter in self.counters.items()},
+        }
+
+
+flights = SingleFlight()
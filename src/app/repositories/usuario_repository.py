@@ -1,10 +1,17 @@
 import logging
-from sqlite3 import IntegrityError
 from typing import Optional
 
-from src.app.core.db.database import get_db
+from sqlalchemy.exc import IntegrityError
+
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import CountStrategy, paginate
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
 from src.app.models.PaginationResult import PaginationResult
-from src.app.models.usuario import Usuario
+from src.app.models.usuario import Usuario, UsuarioUpdate
+from src.app.repositories.single_flight import single_flight
 
 
 class UsuarioRepository:
@@ -13,51 +20,56 @@ class UsuarioRepository:
 
     def create(self, usuario: Usuario) -> Usuario:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(usuario)
                 db.commit()
                 db.refresh(usuario)
+                invalidate_table(Usuario.__tablename__)
                 self.logger.info("Usuário criado com sucesso!")
                 return usuario
         except IntegrityError:
             self.logger.error("Erro ao criar usuário!")
             raise ValueError("Erro ao criar usuário!")
 
+    def create_many(self, usuarios: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, Usuario, usuarios, chunk_size)
+            invalidate_table(Usuario.__tablename__)
+            self.logger.info("Usuários criados em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all_no_pagination(self) -> list[Usuario]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os usuários, sem paginação")
             return db.query(Usuario).all()
 
-    def get_all(self, page: Optional[int] = 1, limit: Optional[int] = 10) -> list[Usuario]:
-        with next(get_db()) as db:
+    @single_flight
+    def get_all(self, page: Optional[int] = 1, limit: Optional[int] = 10, cursor: Optional[str] = None, count: CountStrategy = CountStrategy.EXACT) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Usuario)
 
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
-
             self.logger.info("Buscando todos os usuários")
 
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            return paginate(query, (Usuario.id,), page, limit, cursor, count)
 
     def get_by_id(self, usuario_id: int) -> Usuario:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando usuário de id {usuario_id}")
-            return db.query(Usuario).filter(Usuario.id == usuario_id).first()
+        self.logger.info("Buscando usuário de id %s", usuario_id)
+        return entity_cache.get(Usuario, usuario_id)
 
+    def get_many(self, usuario_ids: list[int]) -> list[Usuario]:
+        self.logger.info("Buscando usuários de ids %s", usuario_ids)
+        found = entity_cache.get_many(Usuario, usuario_ids)
+        return [found[usuario_id] for usuario_id in usuario_ids if usuario_id in found]
+
+    @single_flight
     def get_quantidade_usuarios(self) -> int:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando quantidade de usuários")
             return db.query(Usuario).count()
 
     def update(self, usuario_id: int, usuario_data: dict) -> Usuario:
-        with next(get_db()) as db:
+        with session_scope() as db:
             usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
             if not usuario:
                 return None
@@ -66,15 +78,34 @@ class UsuarioRepository:
                     setattr(usuario, key, value)
             db.commit()
             db.refresh(usuario)
-            self.logger.info(f"Usuário de id {usuario_id} atualizado com sucesso!")
+            invalidate_table(Usuario.__tablename__, usuario_id)
+            self.logger.info("Usuário de id %s atualizado com sucesso!", usuario_id)
             return usuario
 
+    def patch(self, usuario_id: int, usuario_data: UsuarioUpdate) -> Optional[Usuario]:
+        usuarios = self.patch_many([usuario_id], usuario_data)
+        return usuarios[0] if usuarios else None
+
+    def patch_many(self, usuario_ids: list[int], usuario_data: UsuarioUpdate) -> list[Usuario]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = usuario_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            usuarios, _ = update_returning(db, Usuario, usuario_ids, values)
+            db.commit()
+            invalidate_table(Usuario.__tablename__, *usuario_ids)
+            self.logger.info("Usuários de ids %s atualizados parcialmente", usuario_ids)
+            return usuarios
+
     def delete(self, usuario_id: int) -> bool:
-        with next(get_db()) as db:
-            usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
-            if not usuario:
-                return False
-            db.delete(usuario)
+        return self.delete_many([usuario_id]).deleted > 0
+
+    def delete_many(self, usuario_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            deleted = delete_returning(db, Usuario, usuario_ids, chunk_size)
             db.commit()
-            self.logger.info(f"Usuário de id {usuario_id} deletado com sucesso!")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(Usuario.__tablename__, *ids)
+            self.logger.info("Usuários deletados: %s de %s", len(ids), len(usuario_ids))
+            return BulkDeleteResult(total=len(usuario_ids), deleted=len(ids), ids=ids)
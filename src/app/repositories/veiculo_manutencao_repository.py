@@ -1,13 +1,21 @@
 import logging
 from datetime import datetime
-from sqlite3 import IntegrityError
-
-from sqlalchemy import func
-
-from src.app.core.db.database import get_db
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import cached, entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.rollup import refresh_rollups
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.custo_manutencao import CustoManutencaoMarca, CustoManutencaoVeiculo
 from src.app.models.manutencao import Manutencao
 from src.app.models.veiculo import Veiculo
-from src.app.models.veiculo_manutencao import VeiculoManutencao
+from src.app.models.veiculo_manutencao import VeiculoManutencao, VeiculoManutencaoUpdate
+from src.app.repositories.single_flight import single_flight
 
 
 class VeiculoManutencaoRepository:
@@ -16,44 +24,60 @@ class VeiculoManutencaoRepository:
 
     def create(self, veiculo_manutencao: VeiculoManutencao) -> VeiculoManutencao:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(veiculo_manutencao)
+                refresh_rollups(db, [veiculo_manutencao.veiculo_id])
                 db.commit()
                 db.refresh(veiculo_manutencao)
+                invalidate_table(VeiculoManutencao.__tablename__)
                 self.logger.info("Veículo_manutencao criado com sucesso!")
                 return veiculo_manutencao
         except IntegrityError:
             self.logger.error("Erro ao criar veículo_manutencao!")
             raise ValueError("Erro ao criar veículo_manutencao!")
 
+    def create_many(self, veiculos_manutencao: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, VeiculoManutencao, veiculos_manutencao, chunk_size)
+            if result.ids:
+                refresh_rollups(db, db.scalars(
+                    select(VeiculoManutencao.veiculo_id.distinct()).where(VeiculoManutencao.id.in_(result.ids))
+                ).all())
+                db.commit()
+            invalidate_table(VeiculoManutencao.__tablename__)
+            self.logger.info("Veículos_manutencao criados em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all(self) -> list[VeiculoManutencao]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os veículos_manutencao")
             return db.query(VeiculoManutencao).all()
 
     def get_by_id(self, veiculo_manutencao_id: int) -> VeiculoManutencao:
-        with next(get_db()) as db:
-            self.logger.info(f"Bucando veículo_manutencao de id {veiculo_manutencao_id}")
-            return db.query(VeiculoManutencao).filter(VeiculoManutencao.id == veiculo_manutencao_id).first()
+        self.logger.info("Bucando veículo_manutencao de id %s", veiculo_manutencao_id)
+        return entity_cache.get(VeiculoManutencao, veiculo_manutencao_id)
+
+    def get_many(self, veiculo_manutencao_ids: list[int]) -> list[VeiculoManutencao]:
+        self.logger.info("Buscando veículos_manutencao de ids %s", veiculo_manutencao_ids)
+        found = entity_cache.get_many(VeiculoManutencao, veiculo_manutencao_ids)
+        return [found[veiculo_manutencao_id] for veiculo_manutencao_id in veiculo_manutencao_ids if veiculo_manutencao_id in found]
 
+    @single_flight
+    @cached(Veiculo.__tablename__, Manutencao.__tablename__, VeiculoManutencao.__tablename__)
     def get_total_custo_manutencao_por_marca(self) -> list:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando total de custo de manutenção por marca")
             return (
-                db.query(
-                    Veiculo.marca,
-                    func.sum(Manutencao.custo).label("custo_total")
-                )
-                .join(VeiculoManutencao, VeiculoManutencao.veiculo_id == Veiculo.id)
-                .join(Manutencao, Manutencao.id == VeiculoManutencao.manutencao_id)
-                .group_by(Veiculo.marca)
-                .order_by(func.sum(Manutencao.custo).desc())
+                db.query(CustoManutencaoMarca.marca, CustoManutencaoMarca.custo_total)
+                .order_by(CustoManutencaoMarca.custo_total.desc())
                 .all()
             )
 
+    @single_flight
     def get_veiculos_com_mais_manutencoes(self, start_date: datetime, end_date: datetime) -> list:
-        with next(get_db()) as db:
-            self.logger.info(f"Consultando veículos com mais manutenções entre {start_date} e {end_date}")
+        with session_scope() as db:
+            self.logger.info("Consultando veículos com mais manutenções entre %s e %s", start_date, end_date)
             return (
                 db.query(
                     Veiculo.modelo,
@@ -68,8 +92,10 @@ class VeiculoManutencaoRepository:
                 .all()
             )
 
+    @single_flight
+    @cached(Veiculo.__tablename__, Manutencao.__tablename__, VeiculoManutencao.__tablename__)
     def get_manutencao_mais_cara_por_veiculo(self) -> list:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Consultando manutenção mais cara por veículo")
             subquery = (
                 db.query(
@@ -95,48 +121,68 @@ class VeiculoManutencaoRepository:
                 .all()
             )
 
+    @single_flight
+    @cached(Veiculo.__tablename__, Manutencao.__tablename__, VeiculoManutencao.__tablename__)
     def get_veiculos_com_maior_custo_manutencao(self) -> list:
-        from sqlalchemy import func
-
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Consultando veículos com maior custo de manutenção acumulado")
             return (
-                db.query(
-                    Veiculo.modelo,
-                    Veiculo.marca,
-                    func.sum(Manutencao.custo).label("custo_total")
-                )
-                .join(VeiculoManutencao, Veiculo.id == VeiculoManutencao.veiculo_id)
-                .join(Manutencao, VeiculoManutencao.manutencao_id == Manutencao.id)
-                .group_by(Veiculo.id)
-                .order_by(func.sum(Manutencao.custo).desc())
+                db.query(Veiculo.modelo, Veiculo.marca, CustoManutencaoVeiculo.custo_total)
+                .join(CustoManutencaoVeiculo, CustoManutencaoVeiculo.veiculo_id == Veiculo.id)
+                .order_by(CustoManutencaoVeiculo.custo_total.desc())
                 .all()
             )
 
+    @single_flight
     def get_quantidade_veiculos_manutencao(self) -> int:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando quantidade de veículos_manutencao")
             return db.query(VeiculoManutencao).count()
 
     def update(self, veiculo_manutencao_id: int, veiculo_manutencao_data: dict) -> VeiculoManutencao:
-        with next(get_db()) as db:
+        with session_scope() as db:
             veiculo_manutencao = db.query(VeiculoManutencao).filter(VeiculoManutencao.id == veiculo_manutencao_id).first()
             if not veiculo_manutencao:
                 return None
+            veiculo_anterior = veiculo_manutencao.veiculo_id
             for key, value in veiculo_manutencao_data.items():
                 if hasattr(veiculo_manutencao, key):
                     setattr(veiculo_manutencao, key, value)
+            refresh_rollups(db, [veiculo_anterior, veiculo_manutencao.veiculo_id])
             db.commit()
             db.refresh(veiculo_manutencao)
-            self.logger.info(f"Veículo_manutencao de id {veiculo_manutencao_id} atualizado")
+            invalidate_table(VeiculoManutencao.__tablename__, veiculo_manutencao_id)
+            self.logger.info("Veículo_manutencao de id %s atualizado", veiculo_manutencao_id)
             return veiculo_manutencao
 
+    def patch(self, veiculo_manutencao_id: int, veiculo_manutencao_data: VeiculoManutencaoUpdate) -> Optional[VeiculoManutencao]:
+        veiculos_manutencao = self.patch_many([veiculo_manutencao_id], veiculo_manutencao_data)
+        return veiculos_manutencao[0] if veiculos_manutencao else None
+
+    def patch_many(self, veiculo_manutencao_ids: list[int], veiculo_manutencao_data: VeiculoManutencaoUpdate) -> list[VeiculoManutencao]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = veiculo_manutencao_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            veiculos_manutencao, anteriores = update_returning(db, VeiculoManutencao, veiculo_manutencao_ids, values, previous=("veiculo_id",))
+            if "veiculo_id" in values or "manutencao_id" in values:
+                veiculo_ids = [anterior["veiculo_id"] for anterior in anteriores.values()]
+                refresh_rollups(db, veiculo_ids + [veiculo_manutencao.veiculo_id for veiculo_manutencao in veiculos_manutencao])
+            db.commit()
+            invalidate_table(VeiculoManutencao.__tablename__, *veiculo_manutencao_ids)
+            self.logger.info("Veículos_manutencao de ids %s atualizados parcialmente", veiculo_manutencao_ids)
+            return veiculos_manutencao
+
     def delete(self, veiculo_manutencao_id: int) -> bool:
-        with next(get_db()) as db:
-            veiculo_manutencao = db.query(VeiculoManutencao).filter(VeiculoManutencao.id == veiculo_manutencao_id).first()
-            if not veiculo_manutencao:
-                return False
-            db.delete(veiculo_manutencao)
+        return self.delete_many([veiculo_manutencao_id]).deleted > 0
+
+    def delete_many(self, veiculo_manutencao_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            deleted = delete_returning(db, VeiculoManutencao, veiculo_manutencao_ids, chunk_size, returning=("veiculo_id",))
+            refresh_rollups(db, [row.veiculo_id for row in deleted])
             db.commit()
-            self.logger.info(f"Veículo_manutencao de id {veiculo_manutencao_id} deletado")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(VeiculoManutencao.__tablename__, *ids)
+            self.logger.info("Veículos_manutencao deletados: %s de %s", len(ids), len(veiculo_manutencao_ids))
+            return BulkDeleteResult(total=len(veiculo_manutencao_ids), deleted=len(ids), ids=ids)
@@ -1,16 +1,25 @@
 import logging
-from sqlite3 import IntegrityError
-from typing import Optional
+from typing import Iterator, Optional
 
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
-from src.app.core.db.database import get_db
-from src.app.core.logger import setup_logging
+from src.app.core.bulk import bulk_insert, delete_returning, update_returning
+from src.app.core.cache import cached, entity_cache, invalidate_table
+from src.app.core.config import settings
+from src.app.core.db.database import session_scope
+from src.app.core.pagination import CountStrategy, paginate
+from src.app.core.rollup import discard_veiculo_rollups, refresh_rollups
+from src.app.core.search import search_condition
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
 from src.app.models.PaginationResult import PaginationResult
+from src.app.core.logger import setup_logging
+from src.app.models.custo_manutencao import CustoManutencaoVeiculo
 from src.app.models.manutencao import Manutencao
-from src.app.models.veiculo import Veiculo
+from src.app.models.veiculo import Veiculo, VeiculoUpdate
 from src.app.models.veiculo_manutencao import VeiculoManutencao
+from src.app.repositories.single_flight import single_flight
 
 
 class VeiculoRepository:
@@ -19,57 +28,85 @@ class VeiculoRepository:
 
     def create(self, veiculo: Veiculo) -> Veiculo:
         try:
-            with next(get_db()) as db:
+            with session_scope() as db:
                 db.add(veiculo)
                 db.commit()
                 db.refresh(veiculo)
+                invalidate_table(Veiculo.__tablename__)
                 self.logger.info("Veículo criado com sucesso!")
                 return veiculo
         except IntegrityError:
             self.logger.error("Erro ao criar veículo!")
             raise ValueError("Erro ao criar veículo!")
 
+    def create_many(self, veiculos: list[dict], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkResult:
+        with session_scope() as db:
+            result = bulk_insert(db, Veiculo, veiculos, chunk_size)
+            invalidate_table(Veiculo.__tablename__)
+            self.logger.info("Veículos criados em lote: %s de %s", result.inserted, result.total)
+            return result
+
+    @single_flight
     def get_all_no_pagination(self) -> list[Veiculo]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando todos os veículos")
             return db.query(Veiculo).all()
 
+    def stream_all(self, batch_size: int = 1000) -> Iterator[dict]:
+        with session_scope() as db:
+            self.logger.info("Exportando todos os veículos em streaming")
+            result = db.execute(select(Veiculo.__table__).execution_options(yield_per=batch_size))
+            for row in result.mappings():
+                yield dict(row)
+
     def get_by_id(self, veiculo_id: int) -> Veiculo:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando veículo de id {veiculo_id}")
-            return db.query(Veiculo).filter(Veiculo.id == veiculo_id).first()
+        self.logger.info("Buscando veículo de id %s", veiculo_id)
+        return entity_cache.get(Veiculo, veiculo_id)
+
+    def get_many(self, veiculo_ids: list[int]) -> list[Veiculo]:
+        self.logger.info("Buscando veículos de ids %s", veiculo_ids)
+        found = entity_cache.get_many(Veiculo, veiculo_ids)
+        return [found[veiculo_id] for veiculo_id in veiculo_ids if veiculo_id in found]
 
+    @single_flight
     def get_veiculos_com_manutencoes(self) -> list[Veiculo]:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando veículos com manutenções")
             return db.query(Veiculo).options(joinedload(Veiculo.manutencoes)).all()
 
+    @single_flight
     def get_veiculos_by_tipo_manutencao(self, tipo_manutencao: str) -> list[Veiculo]:
-        with next(get_db()) as db:
-            self.logger.info(f"Buscando veículos com manutenções do tipo {tipo_manutencao}")
+        with session_scope() as db:
+            self.logger.info("Buscando veículos com manutenções do tipo %s", tipo_manutencao)
+            condition, rank = search_condition(db, Manutencao.tipo_manutencao, tipo_manutencao)
             return (
                 db.query(Veiculo)
                 .join(VeiculoManutencao)
                 .join(Manutencao)
-                .filter(Manutencao.tipo_manutencao.ilike(f"%{tipo_manutencao}%"))
+                .filter(condition)
                 .options(joinedload(Veiculo.manutencoes))
+                .order_by(rank.desc(), Veiculo.id)
                 .all()
             )
 
+    @single_flight
     def get_quantidade_veiculos(self) -> int:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Buscando quantidade de veículos")
             return db.query(Veiculo).count()
 
+    @single_flight
     def get_all(self,
         tipo: Optional[str] = None,
         marca: Optional[str] = None,
         modelo: Optional[str] = None,
         ano: Optional[int] = None,
         page: Optional[int] = 1,
-        limit: Optional[int] = 10
-    ) -> list[Veiculo]:
-        with next(get_db()) as db:
+        limit: Optional[int] = 10,
+        cursor: Optional[str] = None,
+        count: CountStrategy = CountStrategy.EXACT
+    ) -> PaginationResult:
+        with session_scope() as db:
             query = db.query(Veiculo)
             if tipo:
                 query = query.filter(Veiculo.tipo == tipo)
@@ -79,55 +116,77 @@ class VeiculoRepository:
                 query = query.filter(Veiculo.modelo == modelo)
             if ano:
                 query = query.filter(Veiculo.ano == ano)
-            self.logger.info(f"Buscando veículos com filtro tipo={tipo}, marca={marca}, modelo={modelo}, ano={ano}")
-
-            total_items = query.count()
-            number_of_pages = total_items // limit if total_items % limit == 0 else (total_items // limit) + 1
-            data = query.offset((page - 1) * limit).limit(limit).all()
-
-            return PaginationResult(
-                page=page,
-                limit=limit,
-                total_items=total_items,
-                number_of_pages=number_of_pages,
-                data=data
-            )
+            self.logger.info("Buscando veículos com filtro tipo=%s, marca=%s, modelo=%s, ano=%s", tipo, marca, modelo, ano)
 
+            return paginate(query, (Veiculo.id,), page, limit, cursor, count)
+
+    @single_flight
+    @cached(Veiculo.__tablename__, Manutencao.__tablename__, VeiculoManutencao.__tablename__)
     def get_custo_medio_manutencoes_por_veiculo(self) -> list:
-        with next(get_db()) as db:
+        with session_scope() as db:
             self.logger.info("Consultando custo médio de manutenções por veículo")
+            custo_medio = CustoManutencaoVeiculo.custo_total / func.nullif(CustoManutencaoVeiculo.quantidade, 0)
             return (
                 db.query(
                     Veiculo.modelo,
                     Veiculo.marca,
-                    func.coalesce(func.avg(Manutencao.custo), 0).label("custo_medio")
+                    func.coalesce(custo_medio, 0).label("custo_medio")
                 )
-                .outerjoin(VeiculoManutencao, Veiculo.id == VeiculoManutencao.veiculo_id)
-                .outerjoin(Manutencao, VeiculoManutencao.manutencao_id == Manutencao.id)
-                .group_by(Veiculo.id)
-                .order_by(func.avg(Manutencao.custo).desc())
+                .outerjoin(CustoManutencaoVeiculo, CustoManutencaoVeiculo.veiculo_id == Veiculo.id)
+                .order_by(custo_medio.desc())
                 .all()
             )
 
     def update(self, veiculo_id: int, veiculo_data: dict) -> Veiculo:
-        with next(get_db()) as db:
+        with session_scope() as db:
             veiculo = db.query(Veiculo).filter(Veiculo.id == veiculo_id).first()
             if not veiculo:
                 return None
+            marca_anterior = veiculo.marca
             for key, value in veiculo_data.items():
                 if hasattr(veiculo, key):
                     setattr(veiculo, key, value)
+            if veiculo.marca != marca_anterior:
+                refresh_rollups(db, marcas=[marca_anterior, veiculo.marca])
             db.commit()
             db.refresh(veiculo)
-            self.logger.info(f"Veículo de id {veiculo_id} atualizado")
+            invalidate_table(Veiculo.__tablename__, veiculo_id)
+            self.logger.info("Veículo de id %s atualizado", veiculo_id)
             return veiculo
 
+    def patch(self, veiculo_id: int, veiculo_data: VeiculoUpdate) -> Optional[Veiculo]:
+        veiculos = self.patch_many([veiculo_id], veiculo_data)
+        return veiculos[0] if veiculos else None
+
+    def patch_many(self, veiculo_ids: list[int], veiculo_data: VeiculoUpdate) -> list[Veiculo]:
+        # Só os campos enviados entram no SET; ids inexistentes ficam de fora do retorno
+        values = veiculo_data.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("Nenhum campo para atualizar!")
+        with session_scope() as db:
+            veiculos, anteriores = update_returning(db, Veiculo, veiculo_ids, values, previous=("marca",))
+            if anteriores:
+                # Troca de marca move os totais do veículo entre as marcas antiga e nova
+                marcas = [anterior["marca"] for anterior in anteriores.values()] + [veiculo.marca for veiculo in veiculos]
+                refresh_rollups(db, marcas=marcas)
+            db.commit()
+            invalidate_table(Veiculo.__tablename__, *veiculo_ids)
+            self.logger.info("Veículos de ids %s atualizados parcialmente", veiculo_ids)
+            return veiculos
+
     def delete(self, veiculo_id: int) -> bool:
-        with next(get_db()) as db:
-            veiculo = db.query(Veiculo).filter(Veiculo.id == veiculo_id).first()
-            if not veiculo:
-                return False
-            db.delete(veiculo)
+        return self.delete_many([veiculo_id]).deleted > 0
+
+    def delete_many(self, veiculo_ids: list[int], chunk_size: int = settings.BULK_CHUNK_SIZE) -> BulkDeleteResult:
+        with session_scope() as db:
+            discard_veiculo_rollups(db, veiculo_ids)
+            deleted = delete_returning(db, Veiculo, veiculo_ids, chunk_size, returning=("marca",))
+            # A marca perde os totais dos veículos excluídos
+            refresh_rollups(db, marcas=[row.marca for row in deleted])
             db.commit()
-            self.logger.info(f"Veículo de id {veiculo_id} deletado")
-            return True
\ No newline at end of file
+            ids = [row.id for row in deleted]
+            invalidate_table(Veiculo.__tablename__, *ids)
+            # Os vínculos com manutenção saem por ON DELETE CASCADE
+            invalidate_table(VeiculoManutencao.__tablename__, cascade=True)
+            self.logger.info("Veículos deletados: %s de %s", len(ids), len(veiculo_ids))
+            return BulkDeleteResult(total=len(veiculo_ids), deleted=len(ids), ids=ids)
@@ -1,58 +1,105 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
 from pydantic import BaseModel
 
-from src.app.models.contrato import Contrato
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.export import ExportFormat, export_response
+from src.app.core.http_cache import conditional_get
+from src.app.core.pagination import CountStrategy
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_page, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.contrato import Contrato, ContratoUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.contrato_repository import ContratoRepository
 
 contrato_router = APIRouter(prefix="/api/contratos", tags=["Contratos"])
 
-contrato_repository = ContratoRepository()
+contrato_repository = AsyncRepository(ContratoRepository())
 
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
 
-@contrato_router.post("/", response_model=Contrato, status_code=status.HTTP_201_CREATED)
-def create_contrato(contrato: Contrato):
+
+@contrato_router.post("/", response_model=Contrato, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_contrato(contrato: Contrato):
     try:
-        return contrato_repository.create(contrato)
+        # Modelos de tabela não validam no construtor; validar do dict (sem os relacionamentos) converte as datas
+        return await contrato_repository.create(Contrato.model_validate(contrato.model_dump()))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@contrato_router.get("/")
-def get_contratos(
+@contrato_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_contratos_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        contratos = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await contrato_repository.create_many(contratos, chunk_size)
+
+
+@contrato_router.get("/", dependencies=[validators])
+async def get_contratos(
+    response: Response,
     data_inicial: Optional[datetime] = Query(None),
     data_final: Optional[datetime] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
 ):
-    return contrato_repository.get_all(data_inicial, data_final, page, limit)
+    try:
+        contratos = await contrato_repository.get_all(data_inicial, data_final, page, limit, cursor, count)
+        return json_response(serialize_page(Contrato, contratos), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @contrato_router.get("/all")
-def get_all_contratos():
-    return contrato_repository.get_all_no_pagination()
+async def get_all_contratos(response: Response, formato: Optional[ExportFormat] = Query(None)):
+    if formato:
+        return export_response(contrato_repository.stream_all(), formato, Contrato)
+    contratos = await contrato_repository.get_all_no_pagination()
+    return json_response(serialize_rows(Contrato, contratos), response)
 
 
-@contrato_router.get("/total", response_model=int)
-def get_total_contratos():
-    return contrato_repository.get_quantidade_contratos()
+@contrato_router.get("/total", response_model=int, dependencies=[validators])
+async def get_total_contratos():
+    return await contrato_repository.get_quantidade_contratos()
 
 
-@contrato_router.get("/search")
-def search_contratos(
+@contrato_router.get("/search", dependencies=[validators])
+async def search_contratos(
+    response: Response,
     placa: Optional[str] = Query(None),
     nome_usuario: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
 ):
-    return contrato_repository.search(placa, nome_usuario, page, limit)
+    try:
+        contratos = await contrato_repository.search(placa, nome_usuario, page, limit, cursor, count)
+        return json_response(serialize_page(Contrato, contratos), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 
+@contrato_router.get("/batch", dependencies=[validators])
+async def get_contratos_batch(response: Response, ids: list[int] = Depends(id_list)):
+    contratos = await contrato_repository.get_many(ids)
+    return json_response(serialize_rows(Contrato, contratos), response)
 
-@contrato_router.get("/{contrato_id}", response_model=Contrato)
-def get_contrato_by_id(contrato_id: int = Path(..., title="The ID of the contrato to get")):
-    contrato = contrato_repository.get_by_id(contrato_id)
+
+@contrato_router.get("/{contrato_id}", response_model=Contrato, dependencies=[validators])
+async def get_contrato_by_id(contrato_id: int = Path(..., title="The ID of the contrato to get")):
+    contrato = await contrato_repository.get_by_id(contrato_id)
     if not contrato:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contrato não encontrado"
@@ -60,40 +107,67 @@ def get_contrato_by_id(contrato_id: int = Path(..., title="The ID of the contrat
     return contrato
 
 
-@contrato_router.get("/usuario-veiculo/")
-def get_contratos_by_usuario_veiculo():
-    return contrato_repository.get_contratos_by_usuario_veiculo()
+@contrato_router.get("/usuario-veiculo/", dependencies=[validators])
+async def get_contratos_by_usuario_veiculo(response: Response):
+    contratos = await contrato_repository.get_contratos_by_usuario_veiculo()
+    return json_response(serialize_rows(Contrato, contratos), response)
 
 
-@contrato_router.get("/usuario/{usuario_id}")
-def get_contratos_by_usuario_id(
+@contrato_router.get("/usuario/{usuario_id}", dependencies=[validators])
+async def get_contratos_by_usuario_id(
+    response: Response,
     usuario_id: int = Path(..., title="The ID of the user to get contracts")
 ):
-    return contrato_repository.get_contratos_by_usuario_id(usuario_id)
+    contratos = await contrato_repository.get_contratos_by_usuario_id(usuario_id)
+    return json_response(serialize_rows(Contrato, contratos), response)
 
 
-@contrato_router.get("/veiculo/{veiculo_marca}")
-def get_contratos_by_veiculo_marca(
+@contrato_router.get("/veiculo/{veiculo_marca}", dependencies=[validators])
+async def get_contratos_by_veiculo_marca(
+    response: Response,
     veiculo_marca: str = Path(
         ..., title="The brand of the vehicle to get contracts"
     ),
     pagamento_pago: Optional[bool] = Query(None),
 ):
-    return contrato_repository.get_contratos_by_veiculo_marca_pagamento_pago(
+    contratos = await contrato_repository.get_contratos_by_veiculo_marca_pagamento_pago(
         veiculo_marca, pagamento_pago
     )
+    return json_response(serialize_rows(Contrato, contratos), response)
 
-@contrato_router.get("/pagamento/vencimento/{vencimento_month}")
-def get_contratos_by_pagamento_vencimento_month(
+@contrato_router.get("/pagamento/vencimento/{vencimento_month}", dependencies=[validators])
+async def get_contratos_by_pagamento_vencimento_month(
+    response: Response,
     vencimento_month: datetime = Path(..., title="The month and year of the due date"),
     usuario_id: Optional[int] = Query(None),
 ):
-    return contrato_repository.get_contratos_by_pagamento_vencimento_month_and_usuario_id(vencimento_month, usuario_id)
+    contratos = await contrato_repository.get_contratos_by_pagamento_vencimento_month_and_usuario_id(vencimento_month, usuario_id)
+    return json_response(serialize_rows(Contrato, contratos), response)
+
+
+@contrato_router.patch("/bulk", dependencies=[transactional])
+async def patch_contratos_bulk(contrato_data: ContratoUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        contratos = await contrato_repository.patch_many(ids, contrato_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(Contrato, contratos))
+
+
+@contrato_router.patch("/{contrato_id}", response_model=Contrato, dependencies=[transactional])
+async def patch_contrato(contrato_id: int, contrato_data: ContratoUpdate):
+    try:
+        contrato = await contrato_repository.patch(contrato_id, contrato_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not contrato:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contrato não encontrado")
+    return contrato
 
 
-@contrato_router.put("/{contrato_id}", response_model=Contrato)
-def update_contrato(contrato_id: int, contrato_data: dict):
-    updated_contrato = contrato_repository.update(contrato_id, contrato_data)
+@contrato_router.put("/{contrato_id}", response_model=Contrato, dependencies=[transactional])
+async def update_contrato(contrato_id: int, contrato_data: dict):
+    updated_contrato = await contrato_repository.update(contrato_id, contrato_data)
     if not updated_contrato:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contrato não encontrado"
@@ -101,9 +175,20 @@ def update_contrato(contrato_id: int, contrato_data: dict):
     return updated_contrato
 
 
-@contrato_router.delete("/{contrato_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_contrato(contrato_id: int):
-    deleted = contrato_repository.delete(contrato_id)
+@contrato_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_contratos_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await contrato_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@contrato_router.delete("/{contrato_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[transactional])
+async def delete_contrato(contrato_id: int):
+    try:
+        deleted = await contrato_repository.delete(contrato_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contrato não encontrado"
@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+
+from src.app.core.cache import entity_cache, result_cache
+from src.app.core.db import database
+from src.app.core.logger import log_stats
+from src.app.repositories.batch_loader import loaders
+from src.app.repositories.single_flight import flights
+
+internal_router = APIRouter(prefix="/internal", tags=["Internal"], include_in_schema=False)
+
+
+@internal_router.get("/pool")
+async def get_pool_metrics():
+    engines = {"sync": database.engine}
+    if database.async_engine is not None:
+        engines["async"] = database.async_engine.sync_engine
+    return {
+        name: engine.pool.metrics.snapshot(engine.pool)
+        for name, engine in engines.items()
+        if hasattr(engine.pool, "metrics")
+    }
+
+
+@internal_router.get("/cache")
+async def get_cache_metrics():
+    return {
+        "results": result_cache.snapshot(),
+        "entities": entity_cache.snapshot(),
+        "loaders": {name: loader.snapshot() for name, loader in loaders.items()},
+        "single_flight": flights.snapshot(),
+    }
+
+
+@internal_router.get("/logging")
+async def get_logging_metrics():
+    return log_stats()
@@ -1,65 +1,136 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
 
-from src.app.models.manutencao import Manutencao
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.export import ExportFormat, export_response
+from src.app.core.http_cache import ANALYTICS, conditional_get
+from src.app.core.pagination import CountStrategy
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_page, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.manutencao import Manutencao, ManutencaoUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.manutencao_repository import ManutencaoRepository
 
 manutencao_router = APIRouter(prefix="/api/manutencoes", tags=["Manutenções"])
 
-manutencao_repository = ManutencaoRepository()
+manutencao_repository = AsyncRepository(ManutencaoRepository())
 
-@manutencao_router.post("/", response_model=Manutencao, status_code=status.HTTP_201_CREATED)
-def create_manutencao(manutencao: Manutencao):
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
+analytics_validators = Depends(conditional_get(cache_control=ANALYTICS))
+
+@manutencao_router.post("/", response_model=Manutencao, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_manutencao(manutencao: Manutencao):
+    try:
+        # Modelos de tabela não validam no construtor; validar do dict (sem os relacionamentos) converte as datas
+        return await manutencao_repository.create(Manutencao.model_validate(manutencao.model_dump()))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@manutencao_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_manutencoes_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
     try:
-        return manutencao_repository.create(manutencao)
+        manutencoes = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await manutencao_repository.create_many(manutencoes, chunk_size)
 
-@manutencao_router.get("/")
-def get_manutencoes(
+@manutencao_router.get("/", dependencies=[validators])
+async def get_manutencoes(
+    response: Response,
     data_inicial: Optional[datetime] = Query(None),
     data_final: Optional[datetime] = Query(None),
     tipo_manutencao: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
 ):
-    return manutencao_repository.get_all(data_inicial, data_final, tipo_manutencao, page, limit)
+    try:
+        manutencoes = await manutencao_repository.get_all(data_inicial, data_final, tipo_manutencao, page, limit, cursor, count)
+        return json_response(serialize_page(Manutencao, manutencoes), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @manutencao_router.get("/all")
-def get_all_manutencoes():
-    return manutencao_repository.get_all_no_pagination()
+async def get_all_manutencoes(response: Response, formato: Optional[ExportFormat] = Query(None)):
+    if formato:
+        return export_response(manutencao_repository.stream_all(), formato, Manutencao)
+    manutencoes = await manutencao_repository.get_all_no_pagination()
+    return json_response(serialize_rows(Manutencao, manutencoes), response)
 
 
-@manutencao_router.get("/total", response_model=int)
-def get_total_manutencoes():
-    return manutencao_repository.get_quantidade_manutencoes()
+@manutencao_router.get("/total", response_model=int, dependencies=[validators])
+async def get_total_manutencoes():
+    return await manutencao_repository.get_quantidade_manutencoes()
 
 
-@manutencao_router.get("/tipos-frequentes", response_model=List[dict])
-def get_tipos_manutencao_frequentes():
-    tipos_frequentes = manutencao_repository.get_tipos_manutencao_mais_frequentes()
+@manutencao_router.get("/tipos-frequentes", response_model=List[dict], dependencies=[analytics_validators])
+async def get_tipos_manutencao_frequentes():
+    tipos_frequentes = await manutencao_repository.get_tipos_manutencao_mais_frequentes()
     return [{"tipo_manutencao": tipo, "frequencia": frequencia} for tipo, frequencia in tipos_frequentes]
 
 
-@manutencao_router.get("/{manutencao_id}", response_model=Manutencao)
-def get_manutencao_by_id(manutencao_id: int = Path(..., title="The ID of the manutencao to get")):
-    manutencao = manutencao_repository.get_by_id(manutencao_id)
+@manutencao_router.get("/batch", dependencies=[validators])
+async def get_manutencoes_batch(response: Response, ids: list[int] = Depends(id_list)):
+    manutencoes = await manutencao_repository.get_many(ids)
+    return json_response(serialize_rows(Manutencao, manutencoes), response)
+
+
+@manutencao_router.get("/{manutencao_id}", response_model=Manutencao, dependencies=[validators])
+async def get_manutencao_by_id(manutencao_id: int = Path(..., title="The ID of the manutencao to get")):
+    manutencao = await manutencao_repository.get_by_id(manutencao_id)
     if not manutencao:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manutenção não encontrada")
     return manutencao
 
-@manutencao_router.put("/{manutencao_id}", response_model=Manutencao)
-def update_manutencao(manutencao_id: int, manutencao_data: dict):
-    updated_manutencao = manutencao_repository.update(manutencao_id, manutencao_data)
+@manutencao_router.patch("/bulk", dependencies=[transactional])
+async def patch_manutencoes_bulk(manutencao_data: ManutencaoUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        manutencoes = await manutencao_repository.patch_many(ids, manutencao_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(Manutencao, manutencoes))
+
+
+@manutencao_router.patch("/{manutencao_id}", response_model=Manutencao, dependencies=[transactional])
+async def patch_manutencao(manutencao_id: int, manutencao_data: ManutencaoUpdate):
+    try:
+        manutencao = await manutencao_repository.patch(manutencao_id, manutencao_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not manutencao:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manutenção não encontrada")
+    return manutencao
+
+
+@manutencao_router.put("/{manutencao_id}", response_model=Manutencao, dependencies=[transactional])
+async def update_manutencao(manutencao_id: int, manutencao_data: dict):
+    updated_manutencao = await manutencao_repository.update(manutencao_id, manutencao_data)
     if not updated_manutencao:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manutenção não encontrada")
     return updated_manutencao
 
-@manutencao_router.delete("/{manutencao_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_manutencao(manutencao_id: int):
-    deleted = manutencao_repository.delete(manutencao_id)
+@manutencao_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_manutencoes_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await manutencao_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@manutencao_router.delete("/{manutencao_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[transactional])
+async def delete_manutencao(manutencao_id: int):
+    try:
+        deleted = await manutencao_repository.delete(manutencao_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manutenção não encontrada")
     return None
\ No newline at end of file
@@ -1,48 +1,89 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Query, Path
-
-from src.app.models.pagamento import Pagamento
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
+
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.export import ExportFormat, export_response
+from src.app.core.http_cache import ANALYTICS, conditional_get
+from src.app.core.pagination import CountStrategy
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_page, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.pagamento import Pagamento, PagamentoUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.pagamento_repository import PagamentoRepository
 
 pagamento_router = APIRouter(prefix="/api/pagamentos", tags=["Pagamentos"])
 
-pagamento_repository = PagamentoRepository()
+pagamento_repository = AsyncRepository(PagamentoRepository())
+
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
+analytics_validators = Depends(conditional_get(cache_control=ANALYTICS))
+
+
+@pagamento_router.post("/", response_model=Pagamento, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_pagamento(pagamento: Pagamento):
+    try:
+        # Modelos de tabela não validam no construtor; validar do dict (sem os relacionamentos) converte as datas
+        return await pagamento_repository.create(Pagamento.model_validate(pagamento.model_dump()))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@pagamento_router.post("/", response_model=Pagamento, status_code=status.HTTP_201_CREATED)
-def create_pagamento(pagamento: Pagamento):
+@pagamento_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_pagamentos_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
     try:
-        return pagamento_repository.create(pagamento)
+        pagamentos = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await pagamento_repository.create_many(pagamentos, chunk_size)
 
 
-@pagamento_router.get("/")
-def get_pagamentos(
+@pagamento_router.get("/", dependencies=[validators])
+async def get_pagamentos(
+    response: Response,
     data_inicial: Optional[datetime] = Query(None),
     data_final: Optional[datetime] = Query(None),
     pago: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
 ):
-    return pagamento_repository.get_all(data_inicial, data_final, pago, page, limit)
+    try:
+        pagamentos = await pagamento_repository.get_all(data_inicial, data_final, pago, page, limit, cursor, count)
+        return json_response(serialize_page(Pagamento, pagamentos), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @pagamento_router.get("/all")
-def get_all_pagamentos():
-    return pagamento_repository.get_all_no_pagination()
+async def get_all_pagamentos(response: Response, formato: Optional[ExportFormat] = Query(None)):
+    if formato:
+        return export_response(pagamento_repository.stream_all(), formato, Pagamento)
+    pagamentos = await pagamento_repository.get_all_no_pagination()
+    return json_response(serialize_rows(Pagamento, pagamentos), response)
 
 
-@pagamento_router.get("/pendentes-por-usuario", response_model=List[dict])
-def get_pagamentos_pendentes_por_usuario():
-    pagamentos_pendentes = pagamento_repository.get_pagamentos_pendentes_por_usuario()
+@pagamento_router.get("/pendentes-por-usuario", response_model=List[dict], dependencies=[analytics_validators])
+async def get_pagamentos_pendentes_por_usuario():
+    pagamentos_pendentes = await pagamento_repository.get_pagamentos_pendentes_por_usuario()
     return [{"nome": nome, "email": email, "total_pendente": total_pendente} for nome, email, total_pendente in pagamentos_pendentes]
 
-@pagamento_router.get("/{pagamento_id}", response_model=Pagamento)
-def get_pagamento_by_id(pagamento_id: int = Path(..., title="The ID of the pagamento to get")):
-    pagamento = pagamento_repository.get_by_id(pagamento_id)
+@pagamento_router.get("/batch", dependencies=[validators])
+async def get_pagamentos_batch(response: Response, ids: list[int] = Depends(id_list)):
+    pagamentos = await pagamento_repository.get_many(ids)
+    return json_response(serialize_rows(Pagamento, pagamentos), response)
+
+
+@pagamento_router.get("/{pagamento_id}", response_model=Pagamento, dependencies=[validators])
+async def get_pagamento_by_id(pagamento_id: int = Path(..., title="The ID of the pagamento to get")):
+    pagamento = await pagamento_repository.get_by_id(pagamento_id)
     if not pagamento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Pagamento não encontrado"
@@ -50,9 +91,29 @@ def get_pagamento_by_id(pagamento_id: int = Path(..., title="The ID of the pagam
     return pagamento
 
 
-@pagamento_router.put("/{pagamento_id}", response_model=Pagamento)
-def update_pagamento(pagamento_id: int, pagamento_data: dict):
-    updated_pagamento = pagamento_repository.update(pagamento_id, pagamento_data)
+@pagamento_router.patch("/bulk", dependencies=[transactional])
+async def patch_pagamentos_bulk(pagamento_data: PagamentoUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        pagamentos = await pagamento_repository.patch_many(ids, pagamento_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(Pagamento, pagamentos))
+
+
+@pagamento_router.patch("/{pagamento_id}", response_model=Pagamento, dependencies=[transactional])
+async def patch_pagamento(pagamento_id: int, pagamento_data: PagamentoUpdate):
+    try:
+        pagamento = await pagamento_repository.patch(pagamento_id, pagamento_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not pagamento:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pagamento não encontrado")
+    return pagamento
+
+
+@pagamento_router.put("/{pagamento_id}", response_model=Pagamento, dependencies=[transactional])
+async def update_pagamento(pagamento_id: int, pagamento_data: dict):
+    updated_pagamento = await pagamento_repository.update(pagamento_id, pagamento_data)
     if not updated_pagamento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Pagamento não encontrado"
@@ -60,9 +121,20 @@ def update_pagamento(pagamento_id: int, pagamento_data: dict):
     return updated_pagamento
 
 
-@pagamento_router.delete("/{pagamento_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_pagamento(pagamento_id: int):
-    deleted = pagamento_repository.delete(pagamento_id)
+@pagamento_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_pagamentos_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await pagamento_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@pagamento_router.delete("/{pagamento_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[transactional])
+async def delete_pagamento(pagamento_id: int):
+    try:
+        deleted = await pagamento_repository.delete(pagamento_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Pagamento não encontrado"
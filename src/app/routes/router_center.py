@@ -6,6 +6,7 @@ from src.app.routes.veiculo_router import veiculo_router
 from src.app.routes.veiculo_manutencao_router import veiculo_manutencao_router
 from src.app.routes.manutencao_router import manutencao_router
 from src.app.routes.pagamento_router import pagamento_router
+from src.app.routes.internal_router import internal_router
 
 router = APIRouter()
 
@@ -15,3 +16,4 @@ router.include_router(veiculo_router)
 router.include_router(veiculo_manutencao_router)
 router.include_router(manutencao_router)
 router.include_router(pagamento_router)
+router.include_router(internal_router)
@@ -1,30 +1,103 @@
-from fastapi import APIRouter
+from typing import Optional
 
-from src.app.models.usuario import Usuario
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.http_cache import conditional_get
+from src.app.core.pagination import CountStrategy
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_page, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.usuario import Usuario, UsuarioUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.usuario_repository import UsuarioRepository
 
 usuario_router = APIRouter()
 usuario_router.prefix = "/api/usuarios"
 usuario_router.tags = ["Usuários"]
 
-usuario_repository = UsuarioRepository()
+usuario_repository = AsyncRepository(UsuarioRepository())
+
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
+
+@usuario_router.post("/", dependencies=[transactional])
+async def create_usuario(usuario: Usuario):
+    try:
+        return await usuario_repository.create(usuario)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@usuario_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_usuarios_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        usuarios = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await usuario_repository.create_many(usuarios, chunk_size)
+
+@usuario_router.get("/", dependencies=[validators])
+async def get_usuarios(
+    response: Response,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
+):
+    try:
+        usuarios = await usuario_repository.get_all(page, limit, cursor, count)
+        return json_response(serialize_page(Usuario, usuarios), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@usuario_router.get("/batch", dependencies=[validators])
+async def get_usuarios_batch(response: Response, ids: list[int] = Depends(id_list)):
+    usuarios = await usuario_repository.get_many(ids)
+    return json_response(serialize_rows(Usuario, usuarios), response)
+
+
+@usuario_router.get("/{usuario_id}", dependencies=[validators])
+async def get_usuario_by_id(usuario_id: int):
+    return await usuario_repository.get_by_id(usuario_id)
+
+@usuario_router.patch("/bulk", dependencies=[transactional])
+async def patch_usuarios_bulk(usuario_data: UsuarioUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        usuarios = await usuario_repository.patch_many(ids, usuario_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(Usuario, usuarios))
+
+
+@usuario_router.patch("/{usuario_id}", response_model=Usuario, dependencies=[transactional])
+async def patch_usuario(usuario_id: int, usuario_data: UsuarioUpdate):
+    try:
+        usuario = await usuario_repository.patch(usuario_id, usuario_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not usuario:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado")
+    return usuario
 
-@usuario_router.post("/")
-def create_usuario(usuario: Usuario):
-    return usuario_repository.create(usuario)
 
-@usuario_router.get("/")
-def get_usuarios():
-    return usuario_repository.get_all()
+@usuario_router.put("/{usuario_id}", dependencies=[transactional])
+async def update_usuario(usuario_id: int, usuario_data: dict):
+    return await usuario_repository.update(usuario_id, usuario_data)
 
-@usuario_router.get("/{usuario_id}")
-def get_usuario_by_id(usuario_id: int):
-    return usuario_repository.get_by_id(usuario_id)
+@usuario_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_usuarios_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await usuario_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-@usuario_router.put("/{usuario_id}")
-def update_usuario(usuario_id: int, usuario_data: dict):
-    return usuario_repository.update(usuario_id, usuario_data)
 
-@usuario_router.delete("/{usuario_id}")
-def delete_usuario(usuario_id: int):
-    return usuario_repository.delete(usuario_id)
\ No newline at end of file
+@usuario_router.delete("/{usuario_id}", dependencies=[transactional])
+async def delete_usuario(usuario_id: int):
+    try:
+        return await usuario_repository.delete(usuario_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
\ No newline at end of file
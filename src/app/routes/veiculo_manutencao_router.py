@@ -1,76 +1,136 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Query, Path
-
-from src.app.models.veiculo_manutencao import VeiculoManutencao
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
+
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.http_cache import ANALYTICS, conditional_get
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.veiculo_manutencao import VeiculoManutencao, VeiculoManutencaoUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.veiculo_manutencao_repository import VeiculoManutencaoRepository
 
 veiculo_manutencao_router = APIRouter(prefix="/api/veiculos-manutencao", tags=["Veículos-Manutenção"])
 
-veiculo_manutencao_repository = VeiculoManutencaoRepository()
+veiculo_manutencao_repository = AsyncRepository(VeiculoManutencaoRepository())
+
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
+analytics_validators = Depends(conditional_get(cache_control=ANALYTICS))
+
+
+@veiculo_manutencao_router.post("/", response_model=VeiculoManutencao, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_veiculo_manutencao(veiculo_manutencao: VeiculoManutencao):
+    try:
+        return await veiculo_manutencao_repository.create(veiculo_manutencao)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@veiculo_manutencao_router.post("/", response_model=VeiculoManutencao, status_code=status.HTTP_201_CREATED)
-def create_veiculo_manutencao(veiculo_manutencao: VeiculoManutencao):
+@veiculo_manutencao_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_veiculos_manutencao_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
     try:
-        return veiculo_manutencao_repository.create(veiculo_manutencao)
+        veiculos_manutencao = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await veiculo_manutencao_repository.create_many(veiculos_manutencao, chunk_size)
+
 
-@veiculo_manutencao_router.get("/", response_model=List[VeiculoManutencao])
-def get_veiculos_manutencao():
-    return veiculo_manutencao_repository.get_all()
+@veiculo_manutencao_router.get("/", response_model=List[VeiculoManutencao], dependencies=[validators])
+async def get_veiculos_manutencao():
+    return await veiculo_manutencao_repository.get_all()
 
 
-@veiculo_manutencao_router.get("/total", response_model=int)
-def get_total_veiculos_manutencao():
-    return veiculo_manutencao_repository.get_quantidade_veiculos_manutencao()
+@veiculo_manutencao_router.get("/total", response_model=int, dependencies=[validators])
+async def get_total_veiculos_manutencao():
+    return await veiculo_manutencao_repository.get_quantidade_veiculos_manutencao()
 
 
-@veiculo_manutencao_router.get("/custo-por-marca", response_model=List[dict])
-def get_total_custo_manutencao_por_marca():
-    custos_por_marca = veiculo_manutencao_repository.get_total_custo_manutencao_por_marca()
+@veiculo_manutencao_router.get("/custo-por-marca", response_model=List[dict], dependencies=[analytics_validators])
+async def get_total_custo_manutencao_por_marca():
+    custos_por_marca = await veiculo_manutencao_repository.get_total_custo_manutencao_por_marca()
     return [{"marca": marca, "custo_total": custo_total} for marca, custo_total in custos_por_marca]
 
 
-@veiculo_manutencao_router.get("/mais-manutencoes", response_model=List[dict])
-def get_veiculos_com_mais_manutencoes(start_date: datetime = Query(...), end_date: datetime = Query(...)):
-    veiculos_manutencoes = veiculo_manutencao_repository.get_veiculos_com_mais_manutencoes(start_date, end_date)
+@veiculo_manutencao_router.get("/mais-manutencoes", response_model=List[dict], dependencies=[analytics_validators])
+async def get_veiculos_com_mais_manutencoes(start_date: datetime = Query(...), end_date: datetime = Query(...)):
+    veiculos_manutencoes = await veiculo_manutencao_repository.get_veiculos_com_mais_manutencoes(start_date, end_date)
     return [{"modelo": modelo, "marca": marca, "num_manutencoes": num_manutencoes} for modelo, marca, num_manutencoes in veiculos_manutencoes]
 
 
-@veiculo_manutencao_router.get("/manutencao-mais-cara", response_model=List[dict])
-def get_manutencao_mais_cara_por_veiculo():
-    manutencoes_caras = veiculo_manutencao_repository.get_manutencao_mais_cara_por_veiculo()
+@veiculo_manutencao_router.get("/manutencao-mais-cara", response_model=List[dict], dependencies=[analytics_validators])
+async def get_manutencao_mais_cara_por_veiculo():
+    manutencoes_caras = await veiculo_manutencao_repository.get_manutencao_mais_cara_por_veiculo()
     return [{"modelo": modelo, "marca": marca, "tipo_manutencao": tipo_manutencao, "custo": custo, "observacao": observacao} for modelo, marca, tipo_manutencao, custo, observacao in manutencoes_caras]
 
 
-@veiculo_manutencao_router.get("/maior-custo-total", response_model=List[dict])
-def get_veiculos_com_maior_custo_manutencao():
-    veiculos_custos = veiculo_manutencao_repository.get_veiculos_com_maior_custo_manutencao()
+@veiculo_manutencao_router.get("/maior-custo-total", response_model=List[dict], dependencies=[analytics_validators])
+async def get_veiculos_com_maior_custo_manutencao():
+    veiculos_custos = await veiculo_manutencao_repository.get_veiculos_com_maior_custo_manutencao()
     return [{"modelo": modelo, "marca": marca, "custo_total": custo_total} for modelo, marca, custo_total in veiculos_custos]
 
 
-@veiculo_manutencao_router.get("/{veiculo_manutencao_id}", response_model=VeiculoManutencao)
-def get_veiculo_manutencao_by_id(veiculo_manutencao_id: int = Path(..., title="The ID of the veiculo_manutencao to get")):
-    veiculo_manutencao = veiculo_manutencao_repository.get_by_id(veiculo_manutencao_id)
+@veiculo_manutencao_router.get("/batch", dependencies=[validators])
+async def get_veiculos_manutencao_batch(response: Response, ids: list[int] = Depends(id_list)):
+    veiculos_manutencao = await veiculo_manutencao_repository.get_many(ids)
+    return json_response(serialize_rows(VeiculoManutencao, veiculos_manutencao), response)
+
+
+@veiculo_manutencao_router.get("/{veiculo_manutencao_id}", response_model=VeiculoManutencao, dependencies=[validators])
+async def get_veiculo_manutencao_by_id(veiculo_manutencao_id: int = Path(..., title="The ID of the veiculo_manutencao to get")):
+    veiculo_manutencao = await veiculo_manutencao_repository.get_by_id(veiculo_manutencao_id)
     if not veiculo_manutencao:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo-Manutenção não encontrado")
     return veiculo_manutencao
 
 
-@veiculo_manutencao_router.put("/{veiculo_manutencao_id}", response_model=VeiculoManutencao)
-def update_veiculo_manutencao(veiculo_manutencao_id: int, veiculo_manutencao_data: dict):
-    updated_veiculo_manutencao = veiculo_manutencao_repository.update(veiculo_manutencao_id, veiculo_manutencao_data)
+@veiculo_manutencao_router.patch("/bulk", dependencies=[transactional])
+async def patch_veiculos_manutencao_bulk(veiculo_manutencao_data: VeiculoManutencaoUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        veiculos_manutencao = await veiculo_manutencao_repository.patch_many(ids, veiculo_manutencao_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(VeiculoManutencao, veiculos_manutencao))
+
+
+@veiculo_manutencao_router.patch("/{veiculo_manutencao_id}", response_model=VeiculoManutencao, dependencies=[transactional])
+async def patch_veiculo_manutencao(veiculo_manutencao_id: int, veiculo_manutencao_data: VeiculoManutencaoUpdate):
+    try:
+        veiculo_manutencao = await veiculo_manutencao_repository.patch(veiculo_manutencao_id, veiculo_manutencao_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not veiculo_manutencao:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo-Manutenção não encontrado")
+    return veiculo_manutencao
+
+
+@veiculo_manutencao_router.put("/{veiculo_manutencao_id}", response_model=VeiculoManutencao, dependencies=[transactional])
+async def update_veiculo_manutencao(veiculo_manutencao_id: int, veiculo_manutencao_data: dict):
+    updated_veiculo_manutencao = await veiculo_manutencao_repository.update(veiculo_manutencao_id, veiculo_manutencao_data)
     if not updated_veiculo_manutencao:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo-Manutenção não encontrado")
     return updated_veiculo_manutencao
 
 
-@veiculo_manutencao_router.delete("/{veiculo_manutencao_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_veiculo_manutencao(veiculo_manutencao_id: int):
-    deleted = veiculo_manutencao_repository.delete(veiculo_manutencao_id)
+@veiculo_manutencao_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_veiculos_manutencao_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await veiculo_manutencao_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@veiculo_manutencao_router.delete("/{veiculo_manutencao_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[transactional])
+async def delete_veiculo_manutencao(veiculo_manutencao_id: int):
+    try:
+        deleted = await veiculo_manutencao_repository.delete(veiculo_manutencao_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not deleted:
        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo-Manutenção não encontrado")
     return None
\ No newline at end of file
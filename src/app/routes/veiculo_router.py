@@ -1,77 +1,148 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Query, Path
-
-from src.app.models.veiculo import Veiculo
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
+
+from src.app.core.bulk import parse_bulk_body
+from src.app.core.config import settings
+from src.app.core.db.unit_of_work import transaction
+from src.app.core.export import ExportFormat, export_response
+from src.app.core.http_cache import ANALYTICS, conditional_get
+from src.app.core.pagination import CountStrategy
+from src.app.core.params import id_list
+from src.app.core.serialization import json_response, serialize_page, serialize_rows
+from src.app.models.BulkResult import BulkDeleteResult, BulkResult
+from src.app.models.veiculo import Veiculo, VeiculoUpdate
+from src.app.repositories.async_repository import AsyncRepository
 from src.app.repositories.veiculo_repository import VeiculoRepository
 
 veiculo_router = APIRouter(prefix="/api/veiculos", tags=["Veículos"])
 
-veiculo_repository = VeiculoRepository()
+veiculo_repository = AsyncRepository(VeiculoRepository())
+
+validators = Depends(conditional_get())
+# Rotas de escrita rodam numa unidade de trabalho com commit ao final
+transactional = Depends(transaction)
+analytics_validators = Depends(conditional_get(cache_control=ANALYTICS))
 
-@veiculo_router.post("/", response_model=Veiculo, status_code=status.HTTP_201_CREATED)
-def create_veiculo(veiculo: Veiculo):
+@veiculo_router.post("/", response_model=Veiculo, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_veiculo(veiculo: Veiculo):
     try:
-        return veiculo_repository.create(veiculo)
+        return await veiculo_repository.create(veiculo)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+@veiculo_router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED, dependencies=[transactional])
+async def create_veiculos_bulk(request: Request, chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        veiculos = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await veiculo_repository.create_many(veiculos, chunk_size)
 
-@veiculo_router.get("/")
-def get_veiculos(
+@veiculo_router.get("/", dependencies=[validators])
+async def get_veiculos(
+    response: Response,
     tipo: Optional[str] = Query(None),
     marca: Optional[str] = Query(None),
     modelo: Optional[str] = Query(None),
     ano: Optional[int] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    count: CountStrategy = Query(CountStrategy.EXACT),
 ):
-    return veiculo_repository.get_all(tipo, marca, modelo, ano, page, limit)
+    try:
+        veiculos = await veiculo_repository.get_all(tipo, marca, modelo, ano, page, limit, cursor, count)
+        return json_response(serialize_page(Veiculo, veiculos), response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @veiculo_router.get("/all")
-def get_all_veiculos():
-    return veiculo_repository.get_all_no_pagination()
+async def get_all_veiculos(response: Response, formato: Optional[ExportFormat] = Query(None)):
+    if formato:
+        return export_response(veiculo_repository.stream_all(), formato, Veiculo)
+    veiculos = await veiculo_repository.get_all_no_pagination()
+    return json_response(serialize_rows(Veiculo, veiculos), response)
 
 
-@veiculo_router.get("/total", response_model=int)
-def get_total_veiculos():
-    return veiculo_repository.get_quantidade_veiculos()
+@veiculo_router.get("/total", response_model=int, dependencies=[validators])
+async def get_total_veiculos():
+    return await veiculo_repository.get_quantidade_veiculos()
 
 
-@veiculo_router.get("/com-manutencoes")
-def get_veiculos_com_manutencoes():
-    return veiculo_repository.get_veiculos_com_manutencoes()
+@veiculo_router.get("/com-manutencoes", dependencies=[validators])
+async def get_veiculos_com_manutencoes(response: Response):
+    veiculos = await veiculo_repository.get_veiculos_com_manutencoes()
+    return json_response(serialize_rows(Veiculo, veiculos), response)
 
 
-@veiculo_router.get("/tipo-manutencao/{tipo_manutencao}")
-def get_veiculos_by_tipo_manutencao(tipo_manutencao: str = Path(..., title="The type of maintenance to filter vehicles")):
-    return veiculo_repository.get_veiculos_by_tipo_manutencao(tipo_manutencao)
+@veiculo_router.get("/tipo-manutencao/{tipo_manutencao}", dependencies=[validators])
+async def get_veiculos_by_tipo_manutencao(response: Response, tipo_manutencao: str = Path(..., title="The type of maintenance to filter vehicles")):
+    veiculos = await veiculo_repository.get_veiculos_by_tipo_manutencao(tipo_manutencao)
+    return json_response(serialize_rows(Veiculo, veiculos), response)
 
 
-@veiculo_router.get("/custo-medio-manutencoes", response_model=List[dict])
-def get_custo_medio_manutencoes_por_veiculo():
-    custos_medios = veiculo_repository.get_custo_medio_manutencoes_por_veiculo()
+@veiculo_router.get("/custo-medio-manutencoes", response_model=List[dict], dependencies=[analytics_validators])
+async def get_custo_medio_manutencoes_por_veiculo():
+    custos_medios = await veiculo_repository.get_custo_medio_manutencoes_por_veiculo()
     return [{"modelo": modelo, "marca": marca, "custo_medio": custo_medio} for modelo, marca, custo_medio in custos_medios]
 
-@veiculo_router.get("/{veiculo_id}", response_model=Veiculo)
-def get_veiculo_by_id(veiculo_id: int = Path(..., title="The ID of the vehicle to get")):
-    veiculo = veiculo_repository.get_by_id(veiculo_id)
+@veiculo_router.get("/batch", dependencies=[validators])
+async def get_veiculos_batch(response: Response, ids: list[int] = Depends(id_list)):
+    veiculos = await veiculo_repository.get_many(ids)
+    return json_response(serialize_rows(Veiculo, veiculos), response)
+
+
+@veiculo_router.get("/{veiculo_id}", response_model=Veiculo, dependencies=[validators])
+async def get_veiculo_by_id(veiculo_id: int = Path(..., title="The ID of the vehicle to get")):
+    veiculo = await veiculo_repository.get_by_id(veiculo_id)
     if not veiculo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
     return veiculo
 
 
-@veiculo_router.put("/{veiculo_id}", response_model=Veiculo)
-def update_veiculo(veiculo_id: int, veiculo_data: dict):
-    updated_veiculo = veiculo_repository.update(veiculo_id, veiculo_data)
+@veiculo_router.patch("/bulk", dependencies=[transactional])
+async def patch_veiculos_bulk(veiculo_data: VeiculoUpdate, ids: list[int] = Depends(id_list)):
+    try:
+        veiculos = await veiculo_repository.patch_many(ids, veiculo_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return json_response(serialize_rows(Veiculo, veiculos))
+
+
+@veiculo_router.patch("/{veiculo_id}", response_model=Veiculo, dependencies=[transactional])
+async def patch_veiculo(veiculo_id: int, veiculo_data: VeiculoUpdate):
+    try:
+        veiculo = await veiculo_repository.patch(veiculo_id, veiculo_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not veiculo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
+    return veiculo
+
+
+@veiculo_router.put("/{veiculo_id}", response_model=Veiculo, dependencies=[transactional])
+async def update_veiculo(veiculo_id: int, veiculo_data: dict):
+    updated_veiculo = await veiculo_repository.update(veiculo_id, veiculo_data)
     if not updated_veiculo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
     return updated_veiculo
 
 
-@veiculo_router.delete("/{veiculo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_veiculo(veiculo_id: int):
-    deleted = veiculo_repository.delete(veiculo_id)
+@veiculo_router.delete("/", response_model=BulkDeleteResult, dependencies=[transactional])
+async def delete_veiculos_bulk(ids: list[int] = Depends(id_list), chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)):
+    try:
+        return await veiculo_repository.delete_many(ids, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@veiculo_router.delete("/{veiculo_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[transactional])
+async def delete_veiculo(veiculo_id: int):
+    try:
+        deleted = await veiculo_repository.delete(veiculo_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
     return None
\ No newline at end of file
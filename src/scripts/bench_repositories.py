@@ -0,0 +1,425 @@
+"""Microbenchmarks dos repositórios, com comparação contra uma baseline.
+
+Chama diretamente cada método de ContratoRepository, VeiculoRepository,
+VeiculoManutencaoRepository, PagamentoRepository, ManutencaoRepository e
+UsuarioRepository sobre conjuntos de dados fixos (gerados de forma
+determinística a partir de --seed) de 10 mil, 100 mil ou 1 milhão de
+contratos. Para cada tamanho e método registra:
+    tempo         mediana, p95 e mínimo de --repeat chamadas, em ms
+    statements    comandos SQL executados por chamada
+    peak_kb       pico de memória alocada durante uma chamada (tracemalloc)
+Os caches de resultado e de entidades são esvaziados antes de cada chamada,
+então o tempo medido é sempre o do caminho até o banco. Os logs INFO dos
+repositórios ficam desligados durante a medição.
+
+Cada tamanho usa o banco dado por --database-url, onde {rows} é trocado pelo
+número de contratos. Um banco vazio é populado na primeira execução e
+reaproveitado nas seguintes; um banco com outra contagem de linhas só é
+recriado com --rebuild. Métodos que carregam a tabela inteira só rodam até
+--full-scan-limit contratos.
+
+Com --baseline, compara com um resultado salvo anteriormente (--output) e
+termina com código 1 se algum método ficou mais lento ou usou mais memória
+que --threshold, ou passou a executar mais comandos SQL.
+
+Uso:
+    python -m src.scripts.bench_repositories --rows 10000 100000 --output bench.json
+    python -m src.scripts.bench_repositories --rows 10000 --baseline bench.json --threshold 0.25
+    python -m src.scripts.bench_repositories --database-url "postgresql://postgres@localhost/bench_{rows}" --rows 1000000 --only Contrato
+"""
+import argparse
+import itertools
+import json
+import logging
+import random
+import re
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, insert, select
+from sqlmodel import SQLModel
+
+from src.app.core.cache import entity_cache, result_cache
+from src.app.core.db import database
+from src.app.core.db.query_stats import RequestQueryStats, current_request_stats
+from src.app.core.rollup import rebuild_rollups
+from src.app.models.contrato import Contrato, ContratoUpdate
+from src.app.models.custo_manutencao import CustoManutencaoMarca, CustoManutencaoVeiculo  # noqa: F401 (metadata)
+from src.app.models.manutencao import Manutencao, ManutencaoUpdate
+from src.app.models.pagamento import Pagamento, PagamentoUpdate
+from src.app.models.usuario import Usuario, UsuarioUpdate
+from src.app.models.veiculo import Veiculo, VeiculoUpdate
+from src.app.models.veiculo_manutencao import VeiculoManutencao, VeiculoManutencaoUpdate
+from src.app.repositories.contrato_repository import ContratoRepository
+from src.app.repositories.manutencao_repository import ManutencaoRepository
+from src.app.repositories.pagamento_repository import PagamentoRepository
+from src.app.repositories.usuario_repository import UsuarioRepository
+from src.app.repositories.veiculo_manutencao_repository import VeiculoManutencaoRepository
+from src.app.repositories.veiculo_repository import VeiculoRepository
+
+logger = logging.getLogger(__name__)
+
+# Marcas com distribuição assimétrica, como numa frota real
+MARCAS = ("Fiat", "Volkswagen", "Chevrolet", "Ford", "Toyota", "Hyundai", "Renault", "Honda")
+PESOS_MARCAS = (30, 22, 16, 10, 9, 6, 4, 3)
+MODELOS = ("Hatch", "Sedan", "SUV", "Picape", "Van")
+TIPOS_MANUTENCAO = ("oleo", "pneu", "freio", "revisao", "suspensao", "eletrica")
+FORMAS_PAGAMENTO = ("pix", "boleto", "cartao")
+INICIO = datetime(2024, 1, 1)
+
+INSERT_CHUNK = 10000
+
+_BASE36 = string.digits + string.ascii_uppercase
+
+
+def _base36(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, rest = divmod(value, 36)
+        digits.append(_BASE36[rest])
+    return "".join(reversed(digits))
+
+
+def table_sizes(rows: int) -> dict[str, int]:
+    # Proporções do conjunto fixo a partir do número de contratos
+    return {
+        Usuario.__tablename__: rows // 4,
+        Veiculo.__tablename__: rows // 4,
+        Manutencao.__tablename__: rows // 2,
+        Pagamento.__tablename__: rows,
+        Contrato.__tablename__: rows,
+        VeiculoManutencao.__tablename__: rows // 2,
+    }
+
+
+def _dataset_rows(table: str, sizes: dict[str, int], rng: random.Random):
+    usuarios, veiculos = sizes[Usuario.__tablename__], sizes[Veiculo.__tablename__]
+    for i in range(sizes[table]):
+        if table == Usuario.__tablename__:
+            yield {"nome": f"Usuário {i + 1}", "email": f"usuario{i + 1}@exemplo.com", "celular": None, "cpf": f"{i + 1:011d}"}
+        elif table == Veiculo.__tablename__:
+            yield {"modelo": rng.choice(MODELOS), "marca": rng.choices(MARCAS, PESOS_MARCAS)[0],
+                   "placa": _base36(i + 1, 7), "ano": rng.randint(2005, 2024)}
+        elif table == Manutencao.__tablename__:
+            yield {"data": INICIO + timedelta(days=rng.randrange(365)), "tipo_manutencao": rng.choice(TIPOS_MANUTENCAO),
+                   "custo": round(rng.uniform(50, 5000), 2), "observacao": "benchmark"}
+        elif table == Pagamento.__tablename__:
+            yield {"valor": round(rng.uniform(100, 3000), 2), "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+                   "vencimento": INICIO + timedelta(days=rng.randrange(365)), "pago": rng.random() < 0.7}
+        elif table == Contrato.__tablename__:
+            # Contratos de um mesmo veículo em janelas de 30 dias consecutivas, sem sobreposição
+            data_inicio = INICIO + timedelta(days=30 * (i // veiculos))
+            yield {"usuario_id": rng.randint(1, usuarios), "veiculo_id": i % veiculos + 1, "pagamento_id": i + 1,
+                   "data_inicio": data_inicio, "data_fim": data_inicio + timedelta(days=rng.randint(7, 29))}
+        else:
+            yield {"veiculo_id": rng.randint(1, veiculos), "manutencao_id": i + 1}
+
+
+MODELS = (Usuario, Veiculo, Manutencao, Pagamento, Contrato, VeiculoManutencao)
+
+
+def prepare_dataset(rows: int, seed: int, rebuild: bool) -> None:
+    sizes = table_sizes(rows)
+    SQLModel.metadata.create_all(database.engine)
+    with database.engine.connect() as conn:
+        current = {model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar_one() for model in MODELS}
+    if current == sizes:
+        logger.info("Reaproveitando o conjunto de %s contratos", rows)
+        return
+    if any(current.values()) and not rebuild:
+        raise SystemExit(f"O banco tem {current}, diferente do conjunto esperado {sizes}; use --rebuild para recriá-lo")
+
+    started = time.perf_counter()
+    SQLModel.metadata.drop_all(database.engine)
+    SQLModel.metadata.create_all(database.engine)
+    rng = random.Random(seed)
+    with database.engine.begin() as conn:
+        for model in MODELS:
+            generated = _dataset_rows(model.__tablename__, sizes, rng)
+            while chunk := list(itertools.islice(generated, INSERT_CHUNK)):
+                conn.execute(insert(model.__table__), chunk)
+    with database.session_scope() as db:
+        rebuild_rollups(db)
+        db.commit()
+    logger.info("Conjunto de %s contratos criado em %.1fs", rows, time.perf_counter() - started)
+
+
+class Context:
+    # Tamanhos das tabelas e gerador de valores únicos para as linhas novas
+    def __init__(self, rows: int, seed: int):
+        self.rows = rows
+        self.sizes = table_sizes(rows)
+        self.rng = random.Random(seed)
+        self._sequence = itertools.count(time.time_ns() // 1000 % 10 ** 12)
+
+    def random_id(self, model) -> int:
+        return self.rng.randint(1, self.sizes[model.__tablename__])
+
+    def random_ids(self, model, k: int = 20) -> list[int]:
+        return self.rng.sample(range(1, self.sizes[model.__tablename__] + 1), k)
+
+    def unique(self) -> int:
+        return next(self._sequence)
+
+
+def new_row(model, ctx: Context) -> dict:
+    # Linha fora do conjunto fixo, para os benchmarks de criação e exclusão
+    rng = ctx.rng
+    if model is Usuario:
+        n = ctx.unique()
+        return {"nome": f"Novo {n}", "email": f"novo{n}@exemplo.com", "cpf": f"9{n:013d}"[-14:]}
+    if model is Veiculo:
+        return {"modelo": rng.choice(MODELOS), "marca": rng.choices(MARCAS, PESOS_MARCAS)[0],
+                "placa": "Z" + _base36(ctx.unique(), 6), "ano": rng.randint(2005, 2024)}
+    if model is Manutencao:
+        return {"data": INICIO + timedelta(days=rng.randrange(365)), "tipo_manutencao": rng.choice(TIPOS_MANUTENCAO),
+                "custo": round(rng.uniform(50, 5000), 2), "observacao": "benchmark"}
+    if model is Pagamento:
+        return {"valor": round(rng.uniform(100, 3000), 2), "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+                "vencimento": INICIO + timedelta(days=rng.randrange(365)), "pago": False}
+    if model is Contrato:
+        data_inicio = INICIO + timedelta(days=rng.randrange(365))
+        return {"usuario_id": ctx.random_id(Usuario), "veiculo_id": ctx.random_id(Veiculo), "pagamento_id": None,
+                "data_inicio": data_inicio, "data_fim": data_inicio + timedelta(days=15)}
+    return {"veiculo_id": ctx.random_id(Veiculo), "manutencao_id": ctx.random_id(Manutencao)}
+
+
+def patch_values(model, ctx: Context) -> dict:
+    rng = ctx.rng
+    return {
+        Usuario: lambda: {"celular": f"119{rng.randrange(10 ** 8):08d}"},
+        Veiculo: lambda: {"modelo": rng.choice(MODELOS)},
+        Manutencao: lambda: {"custo": round(rng.uniform(50, 5000), 2)},
+        Pagamento: lambda: {"pago": rng.random() < 0.7},
+        Contrato: lambda: {"data_fim": INICIO + timedelta(days=rng.randrange(365, 730))},
+        VeiculoManutencao: lambda: {"veiculo_id": ctx.random_id(Veiculo)},
+    }[model]()
+
+
+class Case:
+    # prepare roda fora da medição e devolve o estado passado a run e cleanup
+    def __init__(self, name: str, run: Callable[[Any, Any], Any], prepare: Optional[Callable[[Any, Context], Any]] = None,
+                 cleanup: Optional[Callable[[Any, Any, Any], None]] = None, full_scan: bool = False):
+        self.name = name
+        self.run = run
+        self.prepare = prepare or (lambda repository, ctx: None)
+        self.cleanup = cleanup or (lambda repository, state, result: None)
+        self.full_scan = full_scan
+
+
+def crud_cases(model, update_schema) -> list[Case]:
+    def created_ids(repository, ctx, n):
+        return repository.create_many([new_row(model, ctx) for _ in range(n)]).ids
+
+    return [
+        Case("get_by_id", lambda r, ctx: r.get_by_id(ctx.random_id(model))),
+        Case("get_many", lambda r, ids: r.get_many(ids), lambda r, ctx: ctx.random_ids(model)),
+        Case("update", lambda r, state: r.update(*state), lambda r, ctx: (ctx.random_id(model), patch_values(model, ctx))),
+        Case("patch", lambda r, state: r.patch(*state), lambda r, ctx: (ctx.random_id(model), update_schema(**patch_values(model, ctx)))),
+        Case("patch_many", lambda r, state: r.patch_many(*state),
+             lambda r, ctx: (ctx.random_ids(model), update_schema(**patch_values(model, ctx)))),
+        Case("create", lambda r, row: r.create(model(**row)), lambda r, ctx: new_row(model, ctx),
+             lambda r, row, created: r.delete(created.id)),
+        Case("create_many", lambda r, rows: r.create_many(rows), lambda r, ctx: [new_row(model, ctx) for _ in range(100)],
+             lambda r, rows, result: r.delete_many(result.ids)),
+        Case("delete", lambda r, ids: r.delete(ids[0]), lambda r, ctx: created_ids(r, ctx, 1)),
+        Case("delete_many", lambda r, ids: r.delete_many(ids), lambda r, ctx: created_ids(r, ctx, 100)),
+    ]
+
+
+def _trimestre(ctx: Context) -> tuple[datetime, datetime]:
+    start = INICIO + timedelta(days=91 * ctx.rng.randrange(4))
+    return start, start + timedelta(days=91)
+
+
+def _no_args(method: str, full_scan: bool = False) -> Case:
+    return Case(method, lambda r, state: getattr(r, method)(), full_scan=full_scan)
+
+
+SUITES = {
+    "ContratoRepository": (ContratoRepository, [
+        *crud_cases(Contrato, ContratoUpdate),
+        Case("get_all", lambda r, ctx: r.get_all(page=ctx.rng.randint(1, 50), limit=20)),
+        Case("search_placa", lambda r, ctx: r.search(placa=_base36(ctx.random_id(Veiculo), 7))),
+        Case("search_nome_usuario", lambda r, ctx: r.search(nome_usuario=f"Usuário {ctx.random_id(Usuario)}")),
+        Case("get_contratos_by_usuario_id", lambda r, ctx: r.get_contratos_by_usuario_id(ctx.random_id(Usuario))),
+        Case("get_contratos_by_pagamento_vencimento_month_and_usuario_id",
+             lambda r, ctx: r.get_contratos_by_pagamento_vencimento_month_and_usuario_id(
+                 datetime(2024, ctx.rng.randint(1, 12), 1), ctx.random_id(Usuario))),
+        _no_args("get_quantidade_contratos"),
+        Case("get_contratos_by_veiculo_marca_pagamento_pago",
+             lambda r, ctx: r.get_contratos_by_veiculo_marca_pagamento_pago(ctx.rng.choice(MARCAS), False), full_scan=True),
+        _no_args("get_contratos_by_usuario_veiculo", full_scan=True),
+        _no_args("get_all_no_pagination", full_scan=True),
+        _no_args("stream_all", full_scan=True),
+    ]),
+    "VeiculoRepository": (VeiculoRepository, [
+        *crud_cases(Veiculo, VeiculoUpdate),
+        Case("get_all", lambda r, ctx: r.get_all(page=ctx.rng.randint(1, 50), limit=20)),
+        Case("get_all_marca", lambda r, ctx: r.get_all(marca=ctx.rng.choice(MARCAS), limit=20)),
+        _no_args("get_quantidade_veiculos"),
+        _no_args("get_custo_medio_manutencoes_por_veiculo"),
+        _no_args("get_veiculos_com_manutencoes", full_scan=True),
+        Case("get_veiculos_by_tipo_manutencao", lambda r, ctx: r.get_veiculos_by_tipo_manutencao(ctx.rng.choice(TIPOS_MANUTENCAO)),
+             full_scan=True),
+        _no_args("get_all_no_pagination", full_scan=True),
+        _no_args("stream_all", full_scan=True),
+    ]),
+    "VeiculoManutencaoRepository": (VeiculoManutencaoRepository, [
+        *crud_cases(VeiculoManutencao, VeiculoManutencaoUpdate),
+        _no_args("get_total_custo_manutencao_por_marca"),
+        Case("get_veiculos_com_mais_manutencoes", lambda r, ctx: r.get_veiculos_com_mais_manutencoes(*_trimestre(ctx))),
+        _no_args("get_manutencao_mais_cara_por_veiculo"),
+        _no_args("get_veiculos_com_maior_custo_manutencao"),
+        _no_args("get_quantidade_veiculos_manutencao"),
+        _no_args("get_all", full_scan=True),
+    ]),
+    "PagamentoRepository": (PagamentoRepository, [
+        *crud_cases(Pagamento, PagamentoUpdate),
+        Case("get_all_pendentes", lambda r, ctx: r.get_all(pago=False, page=ctx.rng.randint(1, 50), limit=20)),
+        _no_args("get_pagamentos_pendentes_por_usuario"),
+        _no_args("get_all_no_pagination", full_scan=True),
+        _no_args("stream_all", full_scan=True),
+    ]),
+    "ManutencaoRepository": (ManutencaoRepository, [
+        *crud_cases(Manutencao, ManutencaoUpdate),
+        Case("get_all_tipo", lambda r, ctx: r.get_all(tipo_manutencao=ctx.rng.choice(TIPOS_MANUTENCAO), limit=20)),
+        Case("get_all_periodo", lambda r, ctx: r.get_all(*_trimestre(ctx), limit=20)),
+        _no_args("get_tipos_manutencao_mais_frequentes"),
+        _no_args("get_quantidade_manutencoes"),
+        _no_args("get_all_no_pagination", full_scan=True),
+        _no_args("stream_all", full_scan=True),
+    ]),
+    "UsuarioRepository": (UsuarioRepository, [
+        *crud_cases(Usuario, UsuarioUpdate),
+        Case("get_all", lambda r, ctx: r.get_all(page=ctx.rng.randint(1, 50), limit=20)),
+        _no_args("get_quantidade_usuarios"),
+        _no_args("get_all_no_pagination", full_scan=True),
+    ]),
+}
+
+
+def _call(case: Case, repository, ctx: Context):
+    # Sem prepare, run recebe o Context para sortear os argumentos; o sorteio
+    # fica dentro da medição, mas custa microssegundos
+    state = case.prepare(repository, ctx)
+    result_cache.clear()
+    entity_cache.clear()
+    started = time.perf_counter()
+    result = case.run(repository, ctx if state is None else state)
+    if hasattr(result, "__next__"):
+        for _ in result:
+            pass
+    elapsed = time.perf_counter() - started
+    case.cleanup(repository, state, result)
+    return elapsed
+
+
+def measure(case: Case, repository, ctx: Context, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        _call(case, repository, ctx)
+    timings = sorted(_call(case, repository, ctx) for _ in range(repeat))
+
+    # Contagem de comandos e memória numa chamada à parte: o tracemalloc
+    # deixa a execução bem mais lenta e distorceria os tempos
+    stats = RequestQueryStats()
+    token = current_request_stats.set(stats)
+    tracemalloc.start()
+    try:
+        _call(case, repository, ctx)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        current_request_stats.reset(token)
+    return {
+        "calls": repeat,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[max(0, -(-len(timings) * 95 // 100) - 1)] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "statements": stats.queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> dict:
+    # O número de comandos é determinístico: qualquer aumento conta como piora.
+    # Tempo e memória têm ruído, então só contam acima de threshold (fração)
+    # e de uma diferença mínima absoluta
+    regressions = {}
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        problems = []
+        if current["median_ms"] > previous["median_ms"] * (1 + threshold) and current["median_ms"] - previous["median_ms"] > min_delta_ms:
+            problems.append(f"mediana {previous['median_ms']}ms -> {current['median_ms']}ms")
+        if current["statements"] > previous["statements"]:
+            problems.append(f"comandos SQL {previous['statements']} -> {current['statements']}")
+        if current["peak_kb"] > previous["peak_kb"] * (1 + threshold) and current["peak_kb"] - previous["peak_kb"] > 64:
+            problems.append(f"memória {previous['peak_kb']}KB -> {current['peak_kb']}KB")
+        if problems:
+            regressions[key] = problems
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks dos repositórios")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000], help="contratos em cada conjunto (ex.: 10000 100000 1000000)")
+    parser.add_argument("--database-url", default="sqlite:///bench_repositories_{rows}.db",
+                        help="banco de cada conjunto; {rows} é trocado pelo tamanho")
+    parser.add_argument("--rebuild", action="store_true", help="recria o conjunto se o banco tiver outros dados")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", help="regex aplicada a Repositorio.metodo")
+    parser.add_argument("--full-scan-limit", type=int, default=100000, help="maior conjunto em que rodam os métodos que leem a tabela toda")
+    parser.add_argument("--output", help="arquivo para gravar os resultados JSON (padrão: stdout)")
+    parser.add_argument("--baseline", help="resultados anteriores para comparação")
+    parser.add_argument("--threshold", type=float, default=0.25, help="piora relativa tolerada em tempo e memória")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="diferença mínima de tempo para contar como piora")
+    args = parser.parse_args(argv)
+
+    only = re.compile(args.only) if args.only else None
+    results = {}
+    for rows in args.rows:
+        database.use_database(args.database_url.format(rows=rows))
+        prepare_dataset(rows, args.seed, args.rebuild)
+        ctx = Context(rows, args.seed)
+        # Os logs INFO por chamada dos repositórios mediriam o log, não a consulta
+        logging.getLogger("src.app").setLevel(logging.WARNING)
+        for suite, (repository_class, cases) in SUITES.items():
+            repository = repository_class()
+            for case in cases:
+                name = f"{suite}.{case.name}"
+                if (only and not only.search(name)) or (case.full_scan and rows > args.full_scan_limit):
+                    continue
+                results[f"{rows}/{name}"] = result = measure(case, repository, ctx, args.repeat, args.warmup)
+                print(f"{rows:>8} {name:<75}{result['median_ms']:>10.2f} ms{result['statements']:>5} SQL"
+                      f"{result['peak_kb']:>10.0f} KB", file=sys.stderr)
+        logging.getLogger("src.app").setLevel(logging.NOTSET)
+
+    report = {"generated_at": datetime.now().isoformat(timespec="seconds"), "seed": args.seed, "results": results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(results, json.load(f)["results"], args.threshold, args.min_delta_ms)
+        for key, problems in report["regressions"].items():
+            logger.warning("Regressão em %s: %s", key, "; ".join(problems))
+            status = 1
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    return status
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Compara o custo por linha de serialização das respostas de listagem.
+
+Monta instâncias em memória de cada model (sem banco) e mede dois caminhos:
+    antes:  jsonable_encoder + json.dumps, o que o FastAPI faz por padrão
+    depois: serializer compilado (core.serialization) + orjson.dumps
+Os resultados são impressos em microssegundos por linha.
+
+Uso:
+    python -m src.scripts.bench_serialization [--rows 1000] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from src.app.core.serialization import serializer_for
+from src.app.models.contrato import Contrato
+from src.app.models.manutencao import Manutencao
+from src.app.models.pagamento import Pagamento
+from src.app.models.usuario import Usuario
+from src.app.models.veiculo import Veiculo
+
+INICIO = datetime(2024, 1, 1)
+
+
+def sample_rows(model, n: int) -> list:
+    factories = {
+        Contrato: lambda i: Contrato(id=i, usuario_id=i, veiculo_id=i, pagamento_id=i,
+                                     data_inicio=INICIO + timedelta(days=i), data_fim=INICIO + timedelta(days=i + 30)),
+        Veiculo: lambda i: Veiculo(id=i, modelo=f"Modelo {i}", marca="Fiat", placa=f"ABC{i:04d}", ano=2020),
+        Pagamento: lambda i: Pagamento(id=i, valor=i * 10.5, forma_pagamento="pix", vencimento=INICIO + timedelta(days=i), pago=i % 2 == 0),
+        Manutencao: lambda i: Manutencao(id=i, data=INICIO + timedelta(days=i), tipo_manutencao="oleo", custo=i * 3.25, observacao="obs"),
+        Usuario: lambda i: Usuario(id=i, nome=f"Usuário {i}", email=f"u{i}@x.com", celular=None, cpf=f"{i:011d}"),
+    }
+    return [factories[model](i) for i in range(1, n + 1)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mede o custo de serialização por linha")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'model':<12}{'antes (us/linha)':>18}{'depois (us/linha)':>19}{'ganho':>8}")
+    for model in (Contrato, Veiculo, Pagamento, Manutencao, Usuario):
+        rows = sample_rows(model, args.rows)
+        serializer = serializer_for(model)
+
+        # Mesma saída nos dois caminhos, a menos da ordem das chaves
+        if json.loads(json.dumps(jsonable_encoder(rows))) != json.loads(orjson.dumps([serializer(row) for row in rows])):
+            print(f"{model.__name__}: saídas diferentes entre os dois caminhos")
+            return 1
+
+        antes = min(timeit.repeat(lambda: json.dumps(jsonable_encoder(rows)), number=1, repeat=args.repeat))
+        depois = min(timeit.repeat(lambda: orjson.dumps([serializer(row) for row in rows]), number=1, repeat=args.repeat))
+        print(f"{model.__name__:<12}{antes / args.rows * 1e6:>18.2f}{depois / args.rows * 1e6:>19.2f}{antes / depois:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
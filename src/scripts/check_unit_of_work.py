@@ -0,0 +1,157 @@
+"""Verifica o commit e o rollback da unidade de trabalho (core.db.unit_of_work).
+
+Roda contra um banco de verdade, usando os repositórios e as rotas da aplicação:
+    - sem uow.commit() o que a unidade de trabalho gravou é desfeito;
+    - com uow.commit() as escritas ficam no banco;
+    - uma leitura feita fora da unidade de trabalho antes do commit (que
+      ainda vê o valor antigo e o guarda no cache de entidades) não sobrevive
+      ao commit: os caches são invalidados de novo no commit real;
+    - uma rota de escrita grava quando responde com sucesso e não deixa nada
+      quando responde com erro;
+    - as rotas de criação com datas (contrato, pagamento e manutenção) gravam
+      o registro com as chaves estrangeiras enviadas.
+Cada verificação imprime [OK] ou [FALHA]; o código de saída é 1 se alguma falhar.
+
+Uso:
+    python -m src.scripts.check_unit_of_work [--database-url sqlite:///uow.db]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+from sqlalchemy import func, select
+
+
+def _usuario(tag: str, nome: str = "Usuário UoW") -> dict:
+    # cpf e email únicos por execução, para rodar mais de uma vez no mesmo banco
+    return {"nome": nome, "email": f"uow-{tag}@exemplo.com", "cpf": tag[:14], "celular": None}
+
+
+async def run_checks(results: list[tuple[bool, str]]) -> None:
+    from src.app.core.cache import entity_cache
+    from src.app.core.db.database import session_scope
+    from src.app.core.db.unit_of_work import unit_of_work
+    from src.app.main import app
+    from src.app.models.contrato import Contrato
+    from src.app.models.usuario import Usuario
+    from src.app.repositories.async_repository import AsyncRepository
+    from src.app.repositories.usuario_repository import UsuarioRepository
+
+    sync_repository = UsuarioRepository()
+    repository = AsyncRepository(sync_repository)
+    # A mesma dependência das rotas, usada como gerenciador de contexto
+    uow_scope = asynccontextmanager(unit_of_work)
+    loop = asyncio.get_running_loop()
+
+    def exists(email: str) -> bool:
+        with session_scope() as db:
+            return db.scalar(select(func.count()).select_from(Usuario).where(Usuario.email == email)) > 0
+
+    def usuario_por_email(email: str) -> int:
+        with session_scope() as db:
+            return db.scalar(select(Usuario.id).where(Usuario.email == email))
+
+    def contrato_por_id(contrato_id: int):
+        with session_scope() as db:
+            return db.get(Contrato, contrato_id)
+
+    def outside(function, *args):
+        # Roda numa thread do executor, fora do contexto (e da sessão) da unidade de trabalho
+        return loop.run_in_executor(None, function, *args)
+
+    def check(ok: bool, description: str) -> None:
+        results.append((ok, description))
+
+    # Sem commit: tudo é desfeito quando a unidade de trabalho fecha
+    dados = _usuario(uuid.uuid4().hex)
+    async with uow_scope():
+        await repository.create(Usuario(**dados))
+    check(not await outside(exists, dados["email"]), "sem uow.commit() o usuário criado é desfeito")
+
+    # Com commit: a escrita fica no banco
+    dados = _usuario(uuid.uuid4().hex)
+    async with uow_scope() as uow:
+        await repository.create(Usuario(**dados))
+        await uow.commit()
+    check(await outside(exists, dados["email"]), "com uow.commit() o usuário criado fica no banco")
+
+    # Leitura concorrente antes do commit guarda o valor antigo no cache de
+    # entidades; o commit real precisa descartá-lo
+    usuario = await outside(sync_repository.create, Usuario(**_usuario(uuid.uuid4().hex, "Nome antigo")))
+    async with uow_scope() as uow:
+        await repository.update(usuario.id, {"nome": "Nome novo"})
+        antes = await outside(sync_repository.get_by_id, usuario.id)
+        await uow.commit()
+    depois = await outside(sync_repository.get_by_id, usuario.id)
+    check(antes.nome == "Nome antigo", "leitura fora da unidade de trabalho não vê a escrita antes do commit")
+    check(depois.nome == "Nome novo", "o commit invalida o cache de entidades preenchido antes dele")
+    entity_cache.clear()
+
+    # Rotas de escrita: Depends(transaction) faz commit no sucesso e desfaz no erro
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://uow") as client:
+        dados = _usuario(uuid.uuid4().hex)
+        response = await client.post("/api/usuarios/", json=dados)
+        check(response.status_code < 300 and await outside(exists, dados["email"]),
+              f"POST /api/usuarios/ grava o usuário (status {response.status_code})")
+
+        duplicado = {**_usuario(uuid.uuid4().hex), "cpf": dados["cpf"]}
+        response = await client.post("/api/usuarios/", json=duplicado)
+        check(response.status_code == 400 and not await outside(exists, duplicado["email"]),
+              f"POST /api/usuarios/ com cpf repetido responde 400 sem gravar (status {response.status_code})")
+
+        usuario_id = await outside(usuario_por_email, dados["email"])
+        placa = uuid.uuid4().hex[:7].upper()
+        response = await client.post("/api/veiculos/", json={"modelo": "Onix", "marca": "Chevrolet", "placa": placa, "ano": 2024})
+        veiculo_id = response.json().get("id")
+        response = await client.post("/api/contratos/", json={
+            "usuario_id": usuario_id, "veiculo_id": veiculo_id,
+            "data_inicio": "2030-01-01T10:00:00", "data_fim": "2030-01-05T10:00:00",
+        })
+        contrato = await outside(contrato_por_id, response.json().get("id")) if response.status_code == 201 else None
+        check(contrato is not None and (contrato.usuario_id, contrato.veiculo_id) == (usuario_id, veiculo_id),
+              f"POST /api/contratos/ grava o contrato com usuário e veículo (status {response.status_code})")
+
+        response = await client.post("/api/pagamentos/", json={"valor": 150.0, "forma_pagamento": "pix", "vencimento": "2030-01-10T00:00:00"})
+        check(response.status_code == 201, f"POST /api/pagamentos/ grava o pagamento (status {response.status_code})")
+
+        response = await client.post("/api/manutencoes/", json={
+            "data": "2030-02-01T08:30:00", "tipo_manutencao": "Revisão", "custo": 320.0, "observacao": "check_unit_of_work",
+        })
+        check(response.status_code == 201, f"POST /api/manutencoes/ grava a manutenção (status {response.status_code})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Verifica commit e rollback da unidade de trabalho")
+    parser.add_argument("--database-url", help="banco usado nas verificações (padrão: SQLite temporário)")
+    args = parser.parse_args(argv)
+
+    from src.app.core.db.database import use_database
+    import src.app.core.startup as startup
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "check_unit_of_work.db")
+    use_database(database_url)
+    from src.app.main import app  # noqa: F401 - registra todos os models antes do create_all
+    startup.create_tables()
+    logging.getLogger("src.app").setLevel(logging.WARNING)
+
+    results: list[tuple[bool, str]] = []
+    asyncio.run(run_checks(results))
+    for ok, description in results:
+        print(f"[{'OK' if ok else 'FALHA'}] {description}")
+    failed = sum(not ok for ok, _ in results)
+    print(f"{len(results) - failed} de {len(results)} verificações passaram")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
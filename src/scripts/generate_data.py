@@ -0,0 +1,362 @@
+"""Gera dados sintéticos para as seis tabelas, em volume, com NumPy.
+
+As colunas são montadas de forma vetorizada a partir de uma semente fixa,
+então a mesma --seed sempre gera os mesmos dados:
+    usuario             cpf válido (dígitos verificadores) e único, email único
+    veiculo             placa Mercosul única, marcas com distribuição de Zipf
+                        e modelo coerente com a marca
+    contrato            períodos sem sobreposição para um mesmo veículo
+    pagamento           um por contrato, com vencimento 5 dias após o fim do
+                        contrato; vencidos até --as-of estão quase todos pagos
+    manutencao          custo log-normal em torno de um valor típico por tipo
+    veiculomanutencao   um vínculo por manutenção
+Os ids são gerados junto com os dados, para que as chaves estrangeiras
+fiquem consistentes sem consultas ao banco.
+
+Destinos:
+    --output-dir DIR    um <tabela>.csv por tabela, com cabeçalho e ids,
+                        carregável com COPY ... FROM ... WITH (FORMAT csv, HEADER)
+    --copy              COPY FROM STDIN direto no Postgres configurado (ou em
+                        --database-url); as tabelas precisam estar vazias, a
+                        não ser com --truncate. Ao final ajusta as sequências
+                        dos ids e recalcula os agregados de custo
+O formato do src.scripts.ingest_csv não é usado porque ele mescla pelas
+chaves naturais e não preserva os ids de pagamentos e manutenções.
+
+Uso:
+    python -m src.scripts.generate_data --contratos 3000000 --copy --truncate
+    python -m src.scripts.generate_data --contratos 100000 --output-dir dados/ --seed 7
+"""
+import argparse
+import io
+import logging
+import math
+import os
+import sys
+import time
+import unicodedata
+from datetime import date
+
+import numpy as np
+
+from src.app.core.db import database
+from src.app.core.rollup import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+INICIO = "2023-01-01"
+
+# Linhas formatadas por vez; limita a memória do texto CSV em geração
+CHUNK_SIZE = 500000
+
+NOMES = ("Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+         "Larissa", "Lucas", "Mariana", "Mateus", "Natália", "Pedro", "Rafaela", "Rodrigo", "Sofia", "Thiago")
+SOBRENOMES = ("Almeida", "Barbosa", "Cardoso", "Costa", "Ferreira", "Gomes", "Lima", "Martins", "Oliveira",
+              "Pereira", "Ribeiro", "Rodrigues", "Santos", "Silva", "Souza")
+DOMINIOS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com.br", "uol.com.br")
+
+# Marcas em ordem de popularidade (a distribuição de Zipf usa essa ordem),
+# com os modelos de cada uma e a diária base de locação
+MARCAS = {
+    "Fiat": (("Mobi", "Argo", "Cronos", "Pulse", "Strada", "Toro"), 110.0),
+    "Volkswagen": (("Polo", "Virtus", "T-Cross", "Nivus", "Saveiro"), 125.0),
+    "Chevrolet": (("Onix", "Onix Plus", "Tracker", "Spin", "S10"), 120.0),
+    "Hyundai": (("HB20", "HB20S", "Creta"), 130.0),
+    "Toyota": (("Yaris", "Corolla", "Corolla Cross", "Hilux"), 160.0),
+    "Renault": (("Kwid", "Sandero", "Logan", "Duster"), 105.0),
+    "Jeep": (("Renegade", "Compass", "Commander"), 180.0),
+    "Honda": (("City", "Civic", "HR-V"), 155.0),
+    "Nissan": (("Versa", "Kicks", "Frontier"), 140.0),
+    "Ford": (("Ranger", "Territory", "Bronco Sport"), 190.0),
+}
+ZIPF_EXPOENTE = 1.1
+
+# Tipo de manutenção -> (peso, custo típico)
+TIPOS_MANUTENCAO = {
+    "troca de oleo": (30, 250.0),
+    "pneus": (18, 1400.0),
+    "freios": (15, 650.0),
+    "revisao": (20, 900.0),
+    "suspensao": (7, 1800.0),
+    "eletrica": (6, 700.0),
+    "funilaria": (4, 2500.0),
+}
+OBSERVACOES = ("Preventiva", "Corretiva", "Recall", "Após sinistro", "Solicitada pelo cliente")
+
+# Forma de pagamento -> peso
+FORMAS_PAGAMENTO = {"pix": 45, "cartao de credito": 35, "boleto": 15, "cartao de debito": 5}
+
+# Domínio das placas Mercosul (LLLNLNN)
+PLACAS_POSSIVEIS = 26 ** 4 * 10 ** 3
+
+TABELAS = {
+    "usuario": ("id", "nome", "email", "celular", "cpf"),
+    "veiculo": ("id", "modelo", "marca", "placa", "ano"),
+    "manutencao": ("id", "data", "tipo_manutencao", "custo", "observacao"),
+    "pagamento": ("id", "valor", "forma_pagamento", "vencimento", "pago"),
+    "contrato": ("id", "usuario_id", "veiculo_id", "pagamento_id", "data_inicio", "data_fim"),
+    "veiculomanutencao": ("id", "veiculo_id", "manutencao_id"),
+}
+
+
+def _permutation(rng, n: int, space: int):
+    # Bijeção afim i -> (a * i + b) mod space: n valores distintos do espaço,
+    # sem materializar o espaço inteiro nem checar duplicados
+    a = int(rng.integers(space // 3, space))
+    while math.gcd(a, space) != 1:
+        a += 1
+    b = int(rng.integers(0, space))
+    return (np.arange(n, dtype=np.int64) * a + b) % space
+
+
+def _ascii(codes):
+    # Matriz (n, largura) de códigos ASCII -> vetor de strings
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    return codes.view(f"S{codes.shape[1]}").ravel().astype(str)
+
+
+def _choice(rng, options, weights, n: int):
+    p = np.asarray(weights, dtype=np.float64)
+    return rng.choice(len(options), size=n, p=p / p.sum())
+
+
+def _slugs(values):
+    # "João" -> "joao", para os emails
+    return np.array([unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower() for value in values])
+
+
+def _timestamps(days, seconds=None):
+    # dias (e segundos) a partir de INICIO -> datetime64[s]
+    values = np.datetime64(INICIO, "s") + days.astype("timedelta64[D]")
+    return values if seconds is None else values + seconds.astype("timedelta64[s]")
+
+
+def cpfs(rng, n: int):
+    bases = _permutation(rng, n + 10, 10 ** 9)
+    digits = bases[:, None] // 10 ** np.arange(8, -1, -1) % 10
+    # Repetições do mesmo dígito (111.111.111-11) passam no cálculo, mas não são CPFs válidos
+    digits = digits[(digits != digits[:, :1]).any(axis=1)][:n]
+    first = digits @ np.arange(10, 1, -1) % 11
+    first = np.where(first < 2, 0, 11 - first)
+    second = (digits @ np.arange(11, 2, -1) + first * 2) % 11
+    second = np.where(second < 2, 0, 11 - second)
+    codes = np.empty((n, 14), dtype=np.uint8)
+    codes[:, [0, 1, 2, 4, 5, 6, 8, 9, 10]] = digits + ord("0")
+    codes[:, [3, 7]] = ord(".")
+    codes[:, 11] = ord("-")
+    codes[:, 12] = first + ord("0")
+    codes[:, 13] = second + ord("0")
+    return _ascii(codes)
+
+
+def placas(rng, n: int):
+    values = _permutation(rng, n, PLACAS_POSSIVEIS)
+    codes = np.empty((n, 7), dtype=np.uint8)
+    for position, (radix, offset) in reversed(list(enumerate(((26, 65), (26, 65), (26, 65), (10, 48), (26, 65), (10, 48), (10, 48))))):
+        values, rest = np.divmod(values, radix)
+        codes[:, position] = rest + offset
+    return _ascii(codes)
+
+
+def generate_usuarios(rng, n: int) -> dict:
+    ids = np.arange(1, n + 1)
+    nome = rng.integers(0, len(NOMES), n)
+    sobrenome = rng.integers(0, len(SOBRENOMES), n)
+    nomes = np.char.add(np.char.add(np.array(NOMES)[nome], " "), np.array(SOBRENOMES)[sobrenome])
+    # O id no email garante unicidade mesmo com nomes repetidos
+    local = np.char.add(np.char.add(_slugs(NOMES)[nome], "."), _slugs(SOBRENOMES)[sobrenome])
+    dominio = np.array(DOMINIOS)[rng.integers(0, len(DOMINIOS), n)]
+    emails = np.char.add(np.char.add(local, ids.astype(str)), np.char.add("@", dominio))
+    celulares = np.char.add("119", rng.integers(10 ** 7, 10 ** 8, n).astype(str))
+    celulares = np.where(rng.random(n) < 0.8, celulares, "")
+    return {"id": ids, "nome": nomes, "email": emails, "celular": celulares, "cpf": cpfs(rng, n)}
+
+
+def generate_veiculos(rng, n: int) -> dict:
+    marcas = list(MARCAS)
+    marca = _choice(rng, marcas, 1 / np.arange(1, len(marcas) + 1) ** ZIPF_EXPOENTE, n)
+    modelos = np.empty(n, dtype=object)
+    for index, nome in enumerate(marcas):
+        mask = marca == index
+        opcoes = np.array(MARCAS[nome][0], dtype=object)
+        modelos[mask] = opcoes[rng.integers(0, len(opcoes), mask.sum())]
+    # Frota mais nova é mais comum
+    anos = np.clip(2025 - rng.geometric(0.25, n) + 1, 2010, 2025)
+    return {"id": np.arange(1, n + 1), "modelo": modelos, "marca": np.array(marcas, dtype=object)[marca],
+            "placa": placas(rng, n), "ano": anos, "_marca": marca}
+
+
+def generate_contratos(rng, n: int, usuarios: int, veiculos: dict) -> dict:
+    veiculo = np.sort(rng.integers(0, len(veiculos["id"]), n))
+    duracao = rng.integers(1, 31, n)
+    intervalo = rng.integers(1, 21, n)
+    # Dentro de cada veículo, cada contrato começa depois do fim do anterior:
+    # início = início do veículo + soma de (duração + intervalo) dos anteriores
+    passo = duracao + intervalo
+    acumulado = np.cumsum(passo) - passo
+    primeiro = np.r_[True, veiculo[1:] != veiculo[:-1]]
+    deslocamento = acumulado - np.maximum.accumulate(np.where(primeiro, acumulado, 0))
+    inicio_veiculo = rng.integers(0, 365, len(veiculos["id"]))
+    dias = inicio_veiculo[veiculo] + deslocamento
+    horas = rng.integers(8, 19, n) * 3600
+    # Ids em ordem cronológica, como numa base real
+    ordem = np.argsort(dias, kind="stable")
+    veiculo, duracao, dias, horas = veiculo[ordem], duracao[ordem], dias[ordem], horas[ordem]
+    ids = np.arange(1, n + 1)
+    # Alguns clientes alugam bem mais que a média (pesos log-normais)
+    return {
+        "id": ids,
+        "usuario_id": _choice(rng, range(usuarios), rng.lognormal(0, 1, usuarios), n) + 1,
+        "veiculo_id": veiculo + 1,
+        "pagamento_id": ids,
+        "data_inicio": _timestamps(dias, horas),
+        "data_fim": _timestamps(dias + duracao, horas),
+        "_duracao": duracao,
+        "_veiculo": veiculo,
+        "_dias": dias,
+    }
+
+
+def generate_pagamentos(rng, contratos: dict, veiculos: dict, as_of: date) -> dict:
+    n = len(contratos["id"])
+    diarias = np.array([diaria for _, diaria in MARCAS.values()])[veiculos["_marca"][contratos["_veiculo"]]]
+    valores = np.round(contratos["_duracao"] * diarias * rng.uniform(0.9, 1.15, n), 2)
+    vencimento_dias = contratos["_dias"] + contratos["_duracao"] + 5
+    vencidos = _timestamps(vencimento_dias) < np.datetime64(as_of)
+    formas = list(FORMAS_PAGAMENTO)
+    return {
+        "id": contratos["pagamento_id"],
+        "valor": valores,
+        "forma_pagamento": np.array(formas, dtype=object)[_choice(rng, formas, list(FORMAS_PAGAMENTO.values()), n)],
+        "vencimento": _timestamps(vencimento_dias),
+        "pago": np.where(vencidos, rng.random(n) < 0.95, rng.random(n) < 0.1),
+    }
+
+
+def generate_manutencoes(rng, n: int, veiculos: int, as_of: date) -> tuple[dict, dict]:
+    tipos = list(TIPOS_MANUTENCAO)
+    tipo = _choice(rng, tipos, [peso for peso, _ in TIPOS_MANUTENCAO.values()], n)
+    custo_tipico = np.array([custo for _, custo in TIPOS_MANUTENCAO.values()])[tipo]
+    periodo = (np.datetime64(as_of) - np.datetime64(INICIO)).astype(int)
+    ids = np.arange(1, n + 1)
+    manutencoes = {
+        "id": ids,
+        "data": _timestamps(rng.integers(0, periodo, n), rng.integers(8, 18, n) * 3600),
+        "tipo_manutencao": np.array(tipos, dtype=object)[tipo],
+        "custo": np.round(custo_tipico * rng.lognormal(0, 0.35, n), 2),
+        "observacao": np.array(OBSERVACOES, dtype=object)[rng.integers(0, len(OBSERVACOES), n)],
+    }
+    vinculos = {"id": ids, "veiculo_id": rng.integers(1, veiculos + 1, n), "manutencao_id": ids}
+    return manutencoes, vinculos
+
+
+def _column_text(values):
+    if values.dtype.kind == "M":
+        return np.datetime_as_string(values, unit="s")
+    if values.dtype.kind == "b":
+        return np.where(values, "t", "f")
+    return values.astype(str)
+
+
+def csv_chunks(table: str, columns: dict):
+    names = TABELAS[table]
+    total = len(columns["id"])
+    for start in range(0, total, CHUNK_SIZE):
+        text_columns = [_column_text(columns[name][start:start + CHUNK_SIZE]).tolist() for name in names]
+        yield "\n".join(map(",".join, zip(*text_columns))) + "\n"
+
+
+class CsvWriter:
+    def __init__(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+
+    def write(self, table: str, columns: dict) -> None:
+        with open(os.path.join(self.output_dir, f"{table}.csv"), "w", encoding="utf-8") as file:
+            file.write(",".join(TABELAS[table]) + "\n")
+            for chunk in csv_chunks(table, columns):
+                file.write(chunk)
+
+    def close(self) -> None:
+        pass
+
+
+class CopyWriter:
+    # Tudo numa transação: se uma tabela falhar, nenhuma fica pela metade
+    def __init__(self, truncate: bool):
+        self.connection = database.engine.raw_connection()
+        with self.connection.cursor() as cursor:
+            if truncate:
+                cursor.execute(f"TRUNCATE {', '.join(TABELAS)}, custo_manutencao_veiculo, custo_manutencao_marca RESTART IDENTITY CASCADE")
+            for table in TABELAS:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+                if cursor.fetchone()[0]:
+                    self.connection.rollback()
+                    raise SystemExit(f"A tabela {table} já tem dados; use --truncate para esvaziá-la antes")
+
+    def write(self, table: str, columns: dict) -> None:
+        with self.connection.cursor() as cursor:
+            for chunk in csv_chunks(table, columns):
+                cursor.copy_expert(f"COPY {table} ({', '.join(TABELAS[table])}) FROM STDIN WITH (FORMAT csv)", io.StringIO(chunk))
+            # Os ids vieram no arquivo; a sequência precisa seguir do maior deles
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))")
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+        with database.session_scope() as db:
+            veiculos, marcas = rebuild_rollups(db)
+        logger.info("Agregados de custo recalculados: %s veículos, %s marcas", veiculos, marcas)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para todas as tabelas")
+    parser.add_argument("--contratos", type=int, default=1000000, help="contratos (e pagamentos) a gerar")
+    parser.add_argument("--usuarios", type=int, help="padrão: contratos / 4")
+    parser.add_argument("--veiculos", type=int, help="padrão: contratos / 8")
+    parser.add_argument("--manutencoes", type=int, help="manutenções (e vínculos com veículos); padrão: contratos / 2")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date(2025, 1, 1), help="data de referência dos pagamentos")
+    parser.add_argument("--seed", type=int, default=42)
+    destination = parser.add_mutually_exclusive_group(required=True)
+    destination.add_argument("--output-dir", help="diretório onde gravar um CSV por tabela")
+    destination.add_argument("--copy", action="store_true", help="carrega direto no banco via COPY")
+    parser.add_argument("--database-url", help="banco do --copy, no lugar do configurado na aplicação")
+    parser.add_argument("--truncate", action="store_true", help="esvazia as tabelas antes do --copy")
+    args = parser.parse_args(argv)
+
+    usuarios = args.usuarios or max(1, args.contratos // 4)
+    veiculos = args.veiculos or max(1, args.contratos // 8)
+    manutencoes = args.manutencoes if args.manutencoes is not None else args.contratos // 2
+
+    if args.copy:
+        if args.database_url:
+            database.use_database(args.database_url)
+        writer = CopyWriter(args.truncate)
+    else:
+        writer = CsvWriter(args.output_dir)
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    tabela_usuarios = generate_usuarios(rng, usuarios)
+    tabela_veiculos = generate_veiculos(rng, veiculos)
+    tabela_contratos = generate_contratos(rng, args.contratos, usuarios, tabela_veiculos)
+    tabela_pagamentos = generate_pagamentos(rng, tabela_contratos, tabela_veiculos, args.as_of)
+    tabela_manutencoes, tabela_vinculos = generate_manutencoes(rng, manutencoes, veiculos, args.as_of)
+    logger.info("Dados gerados em %.1fs", time.perf_counter() - started)
+
+    # Ordem de carga: as tabelas referenciadas vêm antes das que as referenciam
+    total = 0
+    for table, columns in (("usuario", tabela_usuarios), ("veiculo", tabela_veiculos), ("manutencao", tabela_manutencoes),
+                           ("pagamento", tabela_pagamentos), ("contrato", tabela_contratos), ("veiculomanutencao", tabela_vinculos)):
+        table_started = time.perf_counter()
+        writer.write(table, columns)
+        total += len(columns["id"])
+        logger.info("%s: %s linhas em %.1fs", table, len(columns['id']), time.perf_counter() - table_started)
+    writer.close()
+    logger.info("%s linhas em %.1fs", total, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())
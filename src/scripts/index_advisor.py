@@ -0,0 +1,132 @@
+"""Roda EXPLAIN nas consultas dos repositórios e aponta sequential scans.
+
+Cada método de leitura é executado com argumentos de exemplo enquanto um
+listener do engine captura os SELECTs emitidos; depois cada SELECT passa por
+EXPLAIN (FORMAT JSON) e os nós "Seq Scan" do plano são listados junto com o
+filtro aplicado e o tamanho estimado da tabela. Os planos só são
+representativos com um volume de dados realista e estatísticas atualizadas
+(use --analyze).
+
+Uso:
+    python -m src.scripts.index_advisor [--analyze] [--min-rows 1000]
+"""
+import argparse
+import inspect
+import logging
+import sys
+from datetime import datetime
+
+from sqlalchemy import event
+
+from src.app.core.db.database import engine
+from src.app.main import app  # noqa: F401 - registra todos os models
+from src.app.repositories.contrato_repository import ContratoRepository
+from src.app.repositories.manutencao_repository import ManutencaoRepository
+from src.app.repositories.pagamento_repository import PagamentoRepository
+from src.app.repositories.usuario_repository import UsuarioRepository
+from src.app.repositories.veiculo_manutencao_repository import VeiculoManutencaoRepository
+from src.app.repositories.veiculo_repository import VeiculoRepository
+
+contrato_repository = ContratoRepository()
+manutencao_repository = ManutencaoRepository()
+pagamento_repository = PagamentoRepository()
+usuario_repository = UsuarioRepository()
+veiculo_manutencao_repository = VeiculoManutencaoRepository()
+veiculo_repository = VeiculoRepository()
+
+INICIO = datetime(2024, 1, 1)
+FIM = datetime(2024, 12, 31)
+
+CHECKS = [
+    ("ContratoRepository.get_all", contrato_repository.get_all, ()),
+    ("ContratoRepository.get_all(data)", contrato_repository.get_all, (INICIO, FIM)),
+    ("ContratoRepository.get_by_id", contrato_repository.get_by_id, (1,)),
+    ("ContratoRepository.get_contratos_by_usuario_id", contrato_repository.get_contratos_by_usuario_id, (1,)),
+    ("ContratoRepository.get_contratos_by_veiculo_marca_pagamento_pago", contrato_repository.get_contratos_by_veiculo_marca_pagamento_pago, ("Fiat", False)),
+    ("ContratoRepository.get_contratos_by_pagamento_vencimento_month_and_usuario_id", contrato_repository.get_contratos_by_pagamento_vencimento_month_and_usuario_id, (INICIO, 1)),
+    ("ContratoRepository.search", contrato_repository.search, ("ABC", "Silva")),
+    ("ContratoRepository.get_quantidade_contratos", contrato_repository.get_quantidade_contratos, ()),
+    ("VeiculoRepository.get_all(marca)", veiculo_repository.get_all, (None, "Fiat")),
+    ("VeiculoRepository.get_by_id", veiculo_repository.get_by_id, (1,)),
+    ("VeiculoRepository.get_veiculos_by_tipo_manutencao", veiculo_repository.get_veiculos_by_tipo_manutencao, ("oleo",)),
+    ("VeiculoRepository.get_custo_medio_manutencoes_por_veiculo", veiculo_repository.get_custo_medio_manutencoes_por_veiculo, ()),
+    ("PagamentoRepository.get_all(pago)", pagamento_repository.get_all, (None, None, False)),
+    ("PagamentoRepository.get_all(vencimento)", pagamento_repository.get_all, (INICIO, FIM)),
+    ("PagamentoRepository.get_by_id", pagamento_repository.get_by_id, (1,)),
+    ("PagamentoRepository.get_pagamentos_pendentes_por_usuario", pagamento_repository.get_pagamentos_pendentes_por_usuario, ()),
+    ("ManutencaoRepository.get_all(data)", manutencao_repository.get_all, (INICIO, FIM)),
+    ("ManutencaoRepository.get_all(tipo)", manutencao_repository.get_all, (None, None, "oleo")),
+    ("ManutencaoRepository.get_by_id", manutencao_repository.get_by_id, (1,)),
+    ("ManutencaoRepository.get_tipos_manutencao_mais_frequentes", manutencao_repository.get_tipos_manutencao_mais_frequentes, ()),
+    ("VeiculoManutencaoRepository.get_by_id", veiculo_manutencao_repository.get_by_id, (1,)),
+    ("VeiculoManutencaoRepository.get_total_custo_manutencao_por_marca", veiculo_manutencao_repository.get_total_custo_manutencao_por_marca, ()),
+    ("VeiculoManutencaoRepository.get_veiculos_com_mais_manutencoes", veiculo_manutencao_repository.get_veiculos_com_mais_manutencoes, (INICIO, FIM)),
+    ("VeiculoManutencaoRepository.get_manutencao_mais_cara_por_veiculo", veiculo_manutencao_repository.get_manutencao_mais_cara_por_veiculo, ()),
+    ("VeiculoManutencaoRepository.get_veiculos_com_maior_custo_manutencao", veiculo_manutencao_repository.get_veiculos_com_maior_custo_manutencao, ()),
+    ("UsuarioRepository.get_all", usuario_repository.get_all, ()),
+    ("UsuarioRepository.get_by_id", usuario_repository.get_by_id, (1,)),
+]
+
+
+def capture_selects(method, args: tuple) -> list[tuple]:
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = method(*args)
+        if inspect.isgenerator(result):
+            for _ in result:
+                pass
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statements
+
+
+def seq_scans(plan: dict) -> list[dict]:
+    nodes = [plan] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        nodes.extend(seq_scans(child))
+    return nodes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aponta sequential scans nas consultas dos repositórios")
+    parser.add_argument("--analyze", action="store_true", help="roda ANALYZE antes para atualizar as estatísticas")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignora tabelas com menos linhas estimadas")
+    args = parser.parse_args(argv)
+
+    with engine.connect() as conn:
+        if args.analyze:
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+        table_rows = dict(conn.exec_driver_sql(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        ).all())
+
+    flagged = 0
+    for name, method, method_args in CHECKS:
+        statements = capture_selects(method, method_args)
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+                for node in seq_scans(plan):
+                    rows = table_rows.get(node["Relation Name"], -1)
+                    if 0 <= rows < args.min_rows:
+                        continue
+                    flagged += 1
+                    print(f"[SEQ SCAN] {name}: {node['Relation Name']} (~{rows} linhas)"
+                          f" filtro={node.get('Filter', '-')}")
+        if not statements:
+            print(f"[--] {name}: nenhuma consulta capturada")
+
+    print(f"{flagged} sequential scan(s) encontrados em {len(CHECKS)} métodos")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Carga de arquivos CSV grandes no Postgres via COPY.
+
+Cada arquivo é copiado com COPY FROM STDIN para uma tabela de staging
+temporária e depois mesclado na tabela final com um único INSERT ... SELECT,
+que converte os tipos, resolve as chaves estrangeiras pelas chaves naturais
+(cpf do usuário, placa do veículo) e descarta duplicados. Pagamentos não têm
+chave natural, então toda linha do arquivo de pagamentos é inserida.
+Quando veículos ou manutenções são carregados, os agregados de custo de
+manutenção são recalculados ao final (ver src.scripts.rebuild_rollups).
+
+Formato esperado (com cabeçalho) de cada arquivo:
+    usuario:            nome,email,celular,cpf
+    veiculo:            modelo,marca,placa,ano
+    manutencao:         data,tipo_manutencao,custo,observacao
+    pagamento:          valor,forma_pagamento,vencimento,pago
+    contrato:           usuario_cpf,veiculo_placa,pagamento_id,data_inicio,data_fim
+    veiculo_manutencao: veiculo_placa,manutencao_id
+
+Uso:
+    python -m src.scripts.ingest_csv --usuario usuarios.csv --veiculo veiculos.csv --contrato contratos.csv
+"""
+import argparse
+import logging
+import sys
+
+from src.app.core.db.database import engine, session_scope
+from src.app.core.rollup import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Entidades que alimentam as tabelas de agregados de custo de manutenção
+ROLLUP_SOURCES = {"veiculo", "manutencao", "veiculo_manutencao"}
+
+# Ordem de carga: as tabelas referenciadas vêm antes das que as referenciam
+ENTITIES = ("usuario", "veiculo", "manutencao", "pagamento", "contrato", "veiculo_manutencao")
+
+STAGING_COLUMNS = {
+    "usuario": ("nome", "email", "celular", "cpf"),
+    "veiculo": ("modelo", "marca", "placa", "ano"),
+    "manutencao": ("data", "tipo_manutencao", "custo", "observacao"),
+    "pagamento": ("valor", "forma_pagamento", "vencimento", "pago"),
+    "contrato": ("usuario_cpf", "veiculo_placa", "pagamento_id", "data_inicio", "data_fim"),
+    "veiculo_manutencao": ("veiculo_placa", "manutencao_id"),
+}
+
+MERGES = {
+    # Usuários são atualizados pelo cpf; linhas cujo email já pertence a outro cpf são descartadas
+    "usuario": """
+        INSERT INTO usuario (nome, email, celular, cpf)
+        SELECT DISTINCT ON (s.email) s.nome, s.email, NULLIF(s.celular, ''), s.cpf
+        FROM (SELECT DISTINCT ON (cpf) * FROM staging_usuario ORDER BY cpf) s
+        WHERE NOT EXISTS (SELECT 1 FROM usuario u WHERE u.email = s.email AND u.cpf <> s.cpf)
+        ORDER BY s.email
+        ON CONFLICT (cpf) DO UPDATE SET nome = EXCLUDED.nome, email = EXCLUDED.email, celular = EXCLUDED.celular
+    """,
+    "veiculo": """
+        INSERT INTO veiculo (modelo, marca, placa, ano)
+        SELECT DISTINCT ON (s.placa) s.modelo, s.marca, s.placa, s.ano::integer
+        FROM staging_veiculo s
+        ORDER BY s.placa
+        ON CONFLICT (placa) DO UPDATE SET modelo = EXCLUDED.modelo, marca = EXCLUDED.marca, ano = EXCLUDED.ano
+    """,
+    "manutencao": """
+        INSERT INTO manutencao (data, tipo_manutencao, custo, observacao)
+        SELECT DISTINCT s.data::timestamp, s.tipo_manutencao, s.custo::double precision, s.observacao
+        FROM staging_manutencao s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM manutencao m
+            WHERE m.data = s.data::timestamp AND m.tipo_manutencao = s.tipo_manutencao
+              AND m.custo = s.custo::double precision AND m.observacao = s.observacao
+        )
+    """,
+    "pagamento": """
+        INSERT INTO pagamento (valor, forma_pagamento, vencimento, pago)
+        SELECT s.valor::double precision, s.forma_pagamento, s.vencimento::timestamp, COALESCE(NULLIF(s.pago, '')::boolean, false)
+        FROM staging_pagamento s
+    """,
+    "contrato": """
+        INSERT INTO contrato (usuario_id, veiculo_id, pagamento_id, data_inicio, data_fim)
+        SELECT DISTINCT ON (u.id, v.id, s.data_inicio::timestamp)
+            u.id, v.id, NULLIF(s.pagamento_id, '')::integer, s.data_inicio::timestamp, s.data_fim::timestamp
+        FROM staging_contrato s
+        JOIN usuario u ON u.cpf = s.usuario_cpf
+        JOIN veiculo v ON v.placa = s.veiculo_placa
+        WHERE NOT EXISTS (
+            SELECT 1 FROM contrato c
+            WHERE c.usuario_id = u.id AND c.veiculo_id = v.id AND c.data_inicio = s.data_inicio::timestamp
+        )
+        ORDER BY u.id, v.id, s.data_inicio::timestamp
+    """,
+    "veiculo_manutencao": """
+        INSERT INTO veiculomanutencao (veiculo_id, manutencao_id)
+        SELECT DISTINCT v.id, s.manutencao_id::integer
+        FROM staging_veiculo_manutencao s
+        JOIN veiculo v ON v.placa = s.veiculo_placa
+        JOIN manutencao m ON m.id = s.manutencao_id::integer
+        WHERE NOT EXISTS (
+            SELECT 1 FROM veiculomanutencao vm
+            WHERE vm.veiculo_id = v.id AND vm.manutencao_id = m.id
+        )
+    """,
+}
+
+
+def ingest(connection, entity: str, path: str) -> tuple[int, int]:
+    columns = STAGING_COLUMNS[entity]
+    staging = f"staging_{entity}"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} ({', '.join(f'{column} text' for column in columns)}) ON COMMIT DROP"
+        )
+        with open(path, encoding="utf-8") as file:
+            cursor.copy_expert(
+                f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, HEADER true)", file
+            )
+        cursor.execute(f"SELECT count(*) FROM {staging}")
+        staged = cursor.fetchone()[0]
+        cursor.execute(MERGES[entity])
+        merged = cursor.rowcount
+    connection.commit()
+    return staged, merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Carrega arquivos CSV no Postgres via COPY")
+    for entity in ENTITIES:
+        parser.add_argument(f"--{entity.replace('_', '-')}", dest=entity, metavar="ARQUIVO.csv")
+    args = parser.parse_args(argv)
+
+    files = [(entity, getattr(args, entity)) for entity in ENTITIES if getattr(args, entity)]
+    if not files:
+        parser.error("informe ao menos um arquivo")
+
+    connection = engine.raw_connection()
+    try:
+        for entity, path in files:
+            try:
+                staged, merged = ingest(connection, entity, path)
+            except Exception:
+                connection.rollback()
+                logger.exception("Erro ao carregar %s em %s", path, entity)
+                return 1
+            logger.info("%s: %s linhas lidas de %s, %s inseridas/atualizadas, %s descartadas", entity, staged, path, merged, staged - merged)
+    finally:
+        connection.close()
+
+    if ROLLUP_SOURCES.intersection(entity for entity, _ in files):
+        with session_scope() as db:
+            veiculos, marcas = rebuild_rollups(db)
+        logger.info("Agregados de custo recalculados: %s veículos, %s marcas", veiculos, marcas)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())
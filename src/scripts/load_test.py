@@ -0,0 +1,431 @@
+"""Teste de carga HTTP das rotas da API, com relatório de latência por rota.
+
+Popula uma massa de dados do tamanho pedido pelas rotas POST /bulk e depois
+dispara uma mistura ponderada de requisições (listagens, buscas, consultas
+por id, escritas e consultas analíticas) por um tempo fixo, em um de dois
+modos:
+    --concurrency N   N clientes em laço fechado: cada um só envia a próxima
+                      requisição quando recebe a resposta da anterior
+    --rate R          chegadas em laço aberto, R requisições/s em média
+                      (intervalos exponenciais); a latência é medida a
+                      partir do instante agendado, então a fila que se forma
+                      quando o servidor não acompanha entra na medição
+
+O alvo é uma aplicação já rodando (--url) ou a própria aplicação carregada
+em processo (--database-url), útil para rodar contra um SQLite local no
+lugar do Postgres. Em processo, cliente e servidor dividem o mesmo event
+loop: os números servem para comparar versões entre si, não como capacidade
+absoluta.
+
+O relatório em JSON traz, por rota e no total: requisições, erros, taxa de
+erro, vazão (req/s) e latências p50/p95/p99/máx em milissegundos. Com
+--baseline, compara com um relatório salvo anteriormente e termina com
+código 1 se alguma rota piorou além de --max-regression.
+
+Uso:
+    python -m src.scripts.load_test --url http://localhost:8000 --seed-size 2000 --concurrency 32 --duration 60
+    python -m src.scripts.load_test --database-url sqlite:///carga.db --rate 200 --duration 30 --output carga.json
+    python -m src.scripts.load_test --url http://localhost:8000 --seed-size 0 --baseline carga.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import string
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MARCAS = ("Fiat", "Volkswagen", "Chevrolet", "Ford", "Toyota", "Hyundai", "Renault", "Honda")
+MODELOS = ("Hatch", "Sedan", "SUV", "Picape", "Van")
+TIPOS_MANUTENCAO = ("oleo", "pneu", "freio", "revisao", "suspensao", "eletrica")
+FORMAS_PAGAMENTO = ("pix", "boleto", "cartao")
+INICIO = datetime(2024, 1, 1)
+
+# Itens por requisição POST /bulk durante a carga inicial
+SEED_BATCH = 1000
+
+_BASE36 = string.digits + string.ascii_uppercase
+
+
+def _base36(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, rest = divmod(value, 36)
+        digits.append(_BASE36[rest])
+    return "".join(reversed(digits))
+
+
+class Dataset:
+    # Ids criados (ou encontrados) para cada entidade, usados para montar as requisições
+    def __init__(self):
+        self.usuarios: list[int] = []
+        self.veiculos: list[int] = []
+        self.manutencoes: list[int] = []
+        self.pagamentos: list[int] = []
+        self.contratos: list[int] = []
+        self.placas: list[str] = []
+        self.nomes: list[str] = []
+
+
+async def _post_bulk(client: httpx.AsyncClient, path: str, items: list[dict]) -> list[int]:
+    ids = []
+    for start in range(0, len(items), SEED_BATCH):
+        response = await client.post(f"{path}/bulk", json=items[start:start + SEED_BATCH])
+        response.raise_for_status()
+        result = response.json()
+        if result["errors"]:
+            raise RuntimeError(f"Erro ao popular {path}: {result['errors'][:3]}")
+        ids.extend(result["ids"])
+    return ids
+
+
+async def seed_dataset(client: httpx.AsyncClient, size: int, rng: random.Random) -> Dataset:
+    # Prefixo aleatório por execução (fora da semente): cpf, email e placa são únicos, então
+    # rodar a carga de novo sobre o mesmo banco não colide com a anterior
+    tag = random.SystemRandom().randrange(36 ** 2)
+    dataset = Dataset()
+    usuarios = [
+        {"nome": f"Cliente {tag} {i}", "email": f"carga{tag}.{i}@exemplo.com", "cpf": f"{tag:04d}{i:010d}"}
+        for i in range(size)
+    ]
+    veiculos = [
+        {"modelo": rng.choice(MODELOS), "marca": MARCAS[min(int(rng.paretovariate(1.2)) - 1, len(MARCAS) - 1)],
+         "placa": _base36(tag, 2) + _base36(i, 5), "ano": rng.randint(2005, 2024)}
+        for i in range(size)
+    ]
+    manutencoes = [
+        {"data": (INICIO + timedelta(days=rng.randrange(365))).isoformat(), "tipo_manutencao": rng.choice(TIPOS_MANUTENCAO),
+         "custo": round(rng.uniform(50, 5000), 2), "observacao": "carga"}
+        for _ in range(size * 2)
+    ]
+    pagamentos = [
+        {"valor": round(rng.uniform(100, 3000), 2), "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+         "vencimento": (INICIO + timedelta(days=rng.randrange(365))).isoformat(), "pago": rng.random() < 0.7}
+        for _ in range(size)
+    ]
+    dataset.nomes = [usuario["nome"] for usuario in usuarios]
+    dataset.placas = [veiculo["placa"] for veiculo in veiculos]
+    dataset.usuarios = await _post_bulk(client, "/api/usuarios", usuarios)
+    dataset.veiculos = await _post_bulk(client, "/api/veiculos", veiculos)
+    dataset.manutencoes = await _post_bulk(client, "/api/manutencoes", manutencoes)
+    dataset.pagamentos = await _post_bulk(client, "/api/pagamentos", pagamentos)
+
+    contratos = []
+    for i, veiculo_id in enumerate(dataset.veiculos):
+        data_inicio = INICIO + timedelta(days=rng.randrange(365))
+        contratos.append({
+            "usuario_id": rng.choice(dataset.usuarios), "veiculo_id": veiculo_id, "pagamento_id": dataset.pagamentos[i],
+            "data_inicio": data_inicio.isoformat(), "data_fim": (data_inicio + timedelta(days=rng.randint(7, 90))).isoformat(),
+        })
+    dataset.contratos = await _post_bulk(client, "/api/contratos", contratos)
+    await _post_bulk(client, "/api/veiculos-manutencao", [
+        {"veiculo_id": rng.choice(dataset.veiculos), "manutencao_id": manutencao_id} for manutencao_id in dataset.manutencoes
+    ])
+    return dataset
+
+
+async def discover_dataset(client: httpx.AsyncClient) -> Dataset:
+    # Sem carga inicial: usa a primeira página de cada entidade já existente no banco
+    dataset = Dataset()
+    for attribute, path in (("usuarios", "/api/usuarios/"), ("veiculos", "/api/veiculos/"),
+                            ("manutencoes", "/api/manutencoes/"), ("pagamentos", "/api/pagamentos/"),
+                            ("contratos", "/api/contratos/")):
+        response = await client.get(path, params={"limit": 100, "count": "none"})
+        response.raise_for_status()
+        rows = response.json()["data"]
+        if not rows:
+            raise RuntimeError(f"Nenhum registro em {path}; rode com --seed-size maior que zero")
+        setattr(dataset, attribute, [row["id"] for row in rows])
+        if attribute == "veiculos":
+            dataset.placas = [row["placa"] for row in rows]
+        if attribute == "usuarios":
+            dataset.nomes = [row["nome"] for row in rows]
+    return dataset
+
+
+def _trimestre(rng: random.Random) -> dict:
+    start = INICIO + timedelta(days=91 * rng.randrange(4))
+    return {"start_date": start.isoformat(), "end_date": (start + timedelta(days=91)).isoformat()}
+
+
+# Cenários: nome -> (peso, grupo, função que monta (método, caminho, params, corpo))
+SCENARIOS = {
+    "listar_contratos": (10, "listagem", lambda rng, d: ("GET", "/api/contratos/", {"page": rng.randint(1, 5), "limit": 20}, None)),
+    "listar_veiculos_marca": (6, "listagem", lambda rng, d: ("GET", "/api/veiculos/", {"marca": rng.choice(MARCAS), "limit": 20}, None)),
+    "listar_pagamentos_pendentes": (6, "listagem", lambda rng, d: ("GET", "/api/pagamentos/", {"pago": "false", "limit": 20}, None)),
+    "buscar_contratos_placa": (8, "busca", lambda rng, d: ("GET", "/api/contratos/search", {"placa": rng.choice(d.placas)[:5]}, None)),
+    "buscar_contratos_nome": (4, "busca", lambda rng, d: ("GET", "/api/contratos/search", {"nome_usuario": rng.choice(d.nomes)}, None)),
+    "contrato_por_id": (10, "por_id", lambda rng, d: ("GET", f"/api/contratos/{rng.choice(d.contratos)}", None, None)),
+    "veiculo_por_id": (8, "por_id", lambda rng, d: ("GET", f"/api/veiculos/{rng.choice(d.veiculos)}", None, None)),
+    "usuario_por_id": (6, "por_id", lambda rng, d: ("GET", f"/api/usuarios/{rng.choice(d.usuarios)}", None, None)),
+    "veiculos_em_lote": (4, "por_id", lambda rng, d: ("GET", "/api/veiculos/batch", {"ids": ",".join(map(str, rng.sample(d.veiculos, min(20, len(d.veiculos)))))}, None)),
+    "pagar_pagamento": (6, "escrita", lambda rng, d: ("PATCH", f"/api/pagamentos/{rng.choice(d.pagamentos)}", None, {"pago": rng.random() < 0.5})),
+    "atualizar_veiculo": (2, "escrita", lambda rng, d: ("PATCH", f"/api/veiculos/{rng.choice(d.veiculos)}", None, {"modelo": rng.choice(MODELOS)})),
+    "criar_manutencao": (2, "escrita", lambda rng, d: ("POST", "/api/manutencoes/", None, {
+        "data": (INICIO + timedelta(days=rng.randrange(365))).isoformat(), "tipo_manutencao": rng.choice(TIPOS_MANUTENCAO),
+        "custo": round(rng.uniform(50, 5000), 2), "observacao": "carga"})),
+    "custo_por_marca": (3, "analitica", lambda rng, d: ("GET", "/api/veiculos-manutencao/custo-por-marca", None, None)),
+    "mais_manutencoes": (2, "analitica", lambda rng, d: ("GET", "/api/veiculos-manutencao/mais-manutencoes", _trimestre(rng), None)),
+    "manutencao_mais_cara": (1, "analitica", lambda rng, d: ("GET", "/api/veiculos-manutencao/manutencao-mais-cara", None, None)),
+    "pendentes_por_usuario": (2, "analitica", lambda rng, d: ("GET", "/api/pagamentos/pendentes-por-usuario", None, None)),
+    "tipos_frequentes": (2, "analitica", lambda rng, d: ("GET", "/api/manutencoes/tipos-frequentes", None, None)),
+    "custo_medio_manutencoes": (2, "analitica", lambda rng, d: ("GET", "/api/veiculos/custo-medio-manutencoes", None, None)),
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.status: dict[str, Counter] = defaultdict(Counter)
+        self.recording = False
+
+    def record(self, name: str, elapsed: float, status: str) -> None:
+        if not self.recording:
+            return
+        self.latencies[name].append(elapsed)
+        self.status[name][status] += 1
+        if not status.isdigit() or int(status) >= 400:
+            self.errors[name] += 1
+
+
+async def _request(client: httpx.AsyncClient, recorder: Recorder, name: str, request: tuple, started: float) -> None:
+    method, path, params, body = request
+    try:
+        response = await client.request(method, path, params=params, json=body)
+        status = str(response.status_code)
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    recorder.record(name, time.perf_counter() - started, status)
+
+
+def _choose(rng: random.Random, dataset: Dataset):
+    name = rng.choices(_NAMES, weights=_WEIGHTS)[0]
+    return name, SCENARIOS[name][2](rng, dataset)
+
+
+_NAMES = list(SCENARIOS)
+_WEIGHTS = [SCENARIOS[name][0] for name in _NAMES]
+
+
+async def run_closed_loop(client, dataset, recorder, rng, concurrency: int, deadline: float) -> None:
+    async def worker(worker_rng: random.Random):
+        while time.perf_counter() < deadline:
+            name, request = _choose(worker_rng, dataset)
+            await _request(client, recorder, name, request, time.perf_counter())
+
+    await asyncio.gather(*(worker(random.Random(rng.random())) for _ in range(concurrency)))
+
+
+async def run_open_loop(client, dataset, recorder, rng, rate: float, deadline: float, max_in_flight: int) -> None:
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+
+    async def fire(name, request, scheduled):
+        async with slots:
+            await _request(client, recorder, name, request, scheduled)
+
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name, request = _choose(rng, dataset)
+        task = asyncio.ensure_future(fire(name, request, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        scheduled += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    # Nearest-rank: o menor valor com pelo menos fraction das amostras até ele
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def _summary(latencies: list[float], errors: int, elapsed: float, status: Counter | None = None) -> dict:
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values),
+        "errors": errors,
+        "error_rate": round(errors / len(values), 4) if values else 0.0,
+        "throughput": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 0.50) * 1000, 2),
+            "p95": round(percentile(values, 0.95) * 1000, 2),
+            "p99": round(percentile(values, 0.99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if values else 0.0,
+            "mean": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        },
+    }
+    if status is not None:
+        summary["status"] = dict(status)
+    return summary
+
+
+def build_report(recorder: Recorder, elapsed: float, config: dict) -> dict:
+    endpoints = {
+        name: {"group": SCENARIOS[name][1], **_summary(recorder.latencies[name], recorder.errors[name], elapsed, recorder.status[name])}
+        for name in _NAMES if recorder.latencies[name]
+    }
+    everything = [value for values in recorder.latencies.values() for value in values]
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "duration": round(elapsed, 2),
+        "total": _summary(everything, sum(recorder.errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> dict:
+    # Piora = latência p95/p99 ou vazão que variaram além de max_regression
+    # (fração), ou taxa de erro que subiu mais de um ponto percentual. No modo
+    # --rate a vazão é imposta pelo gerador, então só entra na comparação
+    # quando as duas execuções foram em laço fechado
+    closed_loop = report["config"]["mode"] == baseline.get("config", {}).get("mode") == "concurrency"
+    comparison = {}
+    for name, current in {"total": report["total"], **report["endpoints"]}.items():
+        previous = baseline["total"] if name == "total" else baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        changes, regressions = {}, []
+        for key in ("p50", "p95", "p99"):
+            before, after = previous["latency_ms"][key], current["latency_ms"][key]
+            changes[f"{key}_ms"] = {"baseline": before, "atual": after, "variacao": round(after / before - 1, 4) if before else None}
+            if key != "p50" and before and after / before - 1 > max_regression:
+                regressions.append(f"{key} {before}ms -> {after}ms")
+        before, after = previous["throughput"], current["throughput"]
+        changes["throughput"] = {"baseline": before, "atual": after, "variacao": round(after / before - 1, 4) if before else None}
+        if closed_loop and before and 1 - after / before > max_regression:
+            regressions.append(f"vazão {before} -> {after} req/s")
+        before, after = previous["error_rate"], current["error_rate"]
+        changes["error_rate"] = {"baseline": before, "atual": after, "variacao": round(after - before, 4)}
+        if after - before > 0.01:
+            regressions.append(f"taxa de erro {before:.2%} -> {after:.2%}")
+        comparison[name] = {**changes, "regressoes": regressions}
+    return comparison
+
+
+def _print_table(report: dict) -> None:
+    print(f"{'rota':<30}{'req':>8}{'erro %':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}", file=sys.stderr)
+    for name, summary in {**report["endpoints"], "total": report["total"]}.items():
+        latency = summary["latency_ms"]
+        print(f"{name:<30}{summary['requests']:>8}{summary['error_rate'] * 100:>8.2f}{summary['throughput']:>9.1f}"
+              f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}", file=sys.stderr)
+
+
+def _in_process_app(database_url: str):
+    # Aponta a aplicação para database_url antes de importá-la, como um
+    # stand-in local do Postgres (ex.: sqlite:///carga.db)
+    from src.app.core.db.database import use_database
+    import src.app.core.startup as startup
+
+    use_database(database_url)
+    from src.app.main import app
+
+    startup.create_tables()
+    # Os repositórios registram cada chamada em INFO; em processo isso mediria o log, não a API
+    for name in ("src.app", "app_logger"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return app
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    if args.database_url:
+        transport = httpx.ASGITransport(app=_in_process_app(args.database_url), raise_app_exceptions=False)
+        base_url = "http://carga"
+    else:
+        transport = None
+        base_url = args.url
+    limits = httpx.Limits(max_connections=args.concurrency or args.max_in_flight, max_keepalive_connections=args.concurrency or 100)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout, limits=limits) as client:
+        if args.seed_size:
+            started = time.perf_counter()
+            dataset = await seed_dataset(client, args.seed_size, rng)
+            logger.info("Massa de dados criada (%s veículos) em %.1fs", args.seed_size, time.perf_counter() - started)
+        else:
+            dataset = await discover_dataset(client)
+
+        recorder = Recorder()
+        for phase, duration in (("aquecimento", args.warmup), ("medição", args.duration)):
+            if not duration:
+                continue
+            recorder.recording = phase == "medição"
+            logger.info("Iniciando %s por %ss", phase, duration)
+            started = time.perf_counter()
+            deadline = started + duration
+            if args.rate:
+                await run_open_loop(client, dataset, recorder, rng, args.rate, deadline, args.max_in_flight)
+            else:
+                await run_closed_loop(client, dataset, recorder, rng, args.concurrency, deadline)
+        elapsed = time.perf_counter() - started
+
+    config = {
+        "target": args.database_url or args.url,
+        "mode": "rate" if args.rate else "concurrency",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration": args.duration,
+        "seed_size": args.seed_size,
+        "seed": args.seed,
+    }
+    return build_report(recorder, elapsed, config)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga HTTP com relatório de latência por rota")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8000", help="aplicação já rodando")
+    target.add_argument("--database-url", help="carrega a aplicação em processo sobre este banco (ex.: sqlite:///carga.db)")
+    parser.add_argument("--seed-size", type=int, default=1000, help="veículos/usuários/contratos a criar; 0 usa os dados existentes")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=16, help="clientes simultâneos em laço fechado")
+    mode.add_argument("--rate", type=float, help="requisições por segundo em laço aberto")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="limite de requisições pendentes no modo --rate")
+    parser.add_argument("--duration", type=float, default=30, help="segundos de medição")
+    parser.add_argument("--warmup", type=float, default=5, help="segundos de aquecimento, fora do relatório")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42, help="semente da mistura de requisições")
+    parser.add_argument("--output", help="arquivo para gravar o relatório JSON (padrão: stdout)")
+    parser.add_argument("--baseline", help="relatório JSON anterior para comparação")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="piora relativa tolerada na comparação")
+    args = parser.parse_args(argv)
+    if args.rate:
+        args.concurrency = None
+
+    # O httpx registra cada requisição em INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.max_regression)
+        for name, changes in report["comparison"].items():
+            for regression in changes["regressoes"]:
+                logger.warning("Regressão em %s: %s", name, regression)
+                status = 1
+
+    _print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    return status
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())
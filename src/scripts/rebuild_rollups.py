@@ -0,0 +1,29 @@
+"""Recalcula do zero as tabelas de agregados de custo de manutenção.
+
+Os repositórios mantêm custo_manutencao_veiculo e custo_manutencao_marca
+atualizados a cada escrita; este comando só é necessário quando os dados
+mudam por fora da aplicação (ingest_csv, SQL manual, restauração de backup)
+ou para conferir se os agregados divergiram.
+
+Uso:
+    python -m src.scripts.rebuild_rollups
+"""
+import logging
+import sys
+
+from src.app.core.db.database import session_scope
+from src.app.core.rollup import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    with session_scope() as db:
+        veiculos, marcas = rebuild_rollups(db)
+    logger.info("Agregados recalculados: %s veículos, %s marcas", veiculos, marcas)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())